@@ -22,10 +22,10 @@ from django.conf import settings
 from django.contrib import auth
 from django.core.exceptions import ObjectDoesNotExist
 
-from ...client.models import Computer
+from ...client.models import Computer, ComputerIdentity
 from ...client.views.safe import is_computer_changed
 from ...core.models import Platform, Project
-from ...utils import get_client_ip, uuid_change_format
+from ...utils import get_client_ip
 from .. import errmfs
 from ..secure import get_keys_to_client
 from .helpers import add_notification_platform, add_notification_project, return_message
@@ -33,33 +33,6 @@ from .helpers import add_notification_platform, add_notification_project, return
 logger = logging.getLogger('migasfree')
 
 
-def _find_by_uuid(uuid):
-    """Try to find computer by UUID (standard and endian-swapped formats)."""
-    try:
-        return Computer.objects.get(uuid=uuid)
-    except Computer.DoesNotExist:
-        pass
-
-    try:
-        return Computer.objects.get(uuid=uuid_change_format(uuid))
-    except Computer.DoesNotExist:
-        pass
-
-    return None
-
-
-def _find_by_mac_address(uuid):
-    """Try to find computer by MAC address embedded in UUID."""
-    if uuid[0:8] != '0' * 8:
-        return None
-
-    computers = Computer.objects.filter(mac_address__icontains=uuid[-12:])
-    if computers.count() == 1:
-        return computers.first()
-
-    return None
-
-
 def _find_by_name_legacy(name, uuid):
     """
     DEPRECATED: Find computer by name for client <= 2 compatibility.
@@ -101,16 +74,10 @@ def get_computer(name, uuid):
     """
     logger.debug('Looking up computer - name: %s, uuid: %s', name, uuid)
 
-    # Try UUID-based lookups
-    computer = _find_by_uuid(uuid)
-    if computer:
-        logger.debug('Computer found by UUID')
-        return computer
-
-    # Try MAC address
-    computer = _find_by_mac_address(uuid)
+    # Try UUID-based lookups (and MAC address) in the identity index
+    computer = ComputerIdentity.objects.resolve(uuid, None)
     if computer:
-        logger.debug('Computer found by MAC address (in UUID format)')
+        logger.debug('Computer found by UUID or MAC address')
         return computer
 
     # Legacy fallback for old clients
@@ -17,26 +17,24 @@
 """Core synchronization functions - get_properties and upload_computer_info."""
 
 import logging
-from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 
-from ...app_catalog.models import Policy
 from ...client.messages import add_computer_message, remove_computer_messages
-from ...client.models import FaultDefinition, Synchronization, User
+from ...client.models import Synchronization, User
 from ...client.views.safe import is_computer_changed
 from ...core.models import (
     Attribute,
     AttributeSet,
     BasicAttribute,
-    Deployment,
     Domain,
     Platform,
     Project,
     Property,
 )
-from ...utils import get_client_ip, remove_duplicates_preserving_order, replace_keys, to_list
+from ...core.services.sync_plan import SyncPlanService
+from ...utils import get_client_ip, replace_keys
 from .. import errmfs
 from .helpers import add_notification_platform, add_notification_project, return_message
 
@@ -95,7 +93,7 @@ def _auto_register_project(project_name, platform_name, pms_name, computer):
 
 
 def _process_attributes(computer, client_attributes, user):
-    """Process and add all sync attributes for the computer."""
+    """Process and set all sync attributes for the computer."""
     attributes_to_add = []
 
     # Basic attributes
@@ -121,24 +119,23 @@ def _process_attributes(computer, client_attributes, user):
         if client_property:
             attributes_to_add.extend(Attribute.process_kind_property(client_property, value))
 
-    # Batch add basic and client attributes
-    computer.sync_attributes.add(*attributes_to_add)
-
-    # Cache get_all_attributes
-    all_attributes = computer.get_all_attributes()
+    # Cache get_all_attributes (tags + attributes computed so far)
+    tags = list(computer.tags.select_related('property_att'))
+    all_attributes = [tag.id for tag in tags] + attributes_to_add
 
     # Domain attribute
-    computer.sync_attributes.add(*Domain.process(all_attributes))
+    attributes_to_add.extend(Domain.process(all_attributes))
 
     # Tags (server attributes)
-    tags_attrs = []
-    for tag in computer.tags.select_related('property_att').filter(property_att__enabled=True):
-        tags_attrs.extend(Attribute.process_kind_property(tag.property_att, tag.value))
-    if tags_attrs:
-        computer.sync_attributes.add(*tags_attrs)
+    for tag in tags:
+        if tag.property_att.enabled:
+            attributes_to_add.extend(Attribute.process_kind_property(tag.property_att, tag.value))
 
     # AttributeSets
-    computer.sync_attributes.add(*AttributeSet.process(all_attributes))
+    attributes_to_add.extend(AttributeSet.process(all_attributes))
+
+    # Apply only the differences with the current attributes
+    computer.update_sync_attributes(attributes_to_add)
 
     # Return refreshed attributes
     return computer.get_all_attributes()
@@ -146,54 +143,23 @@ def _process_attributes(computer, client_attributes, user):
 
 def _build_sync_response(computer, all_attributes):
     """Build the synchronization response data."""
-    # Fault definitions
-    fault_definitions = [
-        {'language': item.get_language_display(), 'name': item.name, 'code': item.code}
-        for item in FaultDefinition.enabled_for_attributes(all_attributes)
-    ]
-
-    # Deployments and packages
-    lst_pkg_to_remove = []
-    lst_pkg_to_install = []
-
-    deploys = Deployment.available_deployments(computer, all_attributes)
-    lst_deploys = [{'name': dep.name, 'source_template': dep.source_template()} for dep in deploys]
-
-    for dep in deploys:
-        if dep.packages_to_remove:
-            lst_pkg_to_remove.extend(pkg for pkg in to_list(dep.packages_to_remove) if pkg)
-        if dep.packages_to_install:
-            lst_pkg_to_install.extend(pkg for pkg in to_list(dep.packages_to_install) if pkg)
-
-    # Policies
-    policy_pkg_to_install, policy_pkg_to_remove = Policy.get_packages(computer)
-    lst_pkg_to_install.extend(x['package'] for x in policy_pkg_to_install)
-    lst_pkg_to_remove.extend(x['package'] for x in policy_pkg_to_remove)
-
-    # Devices
-    logical_devices = [device.as_dict(computer.project) for device in computer.logical_devices(all_attributes)]
-    default_logical_device = computer.default_logical_device.id if computer.default_logical_device else 0
-
-    # Hardware capture decision
-    capture_hardware = True
-    if computer.last_hardware_capture:
-        capture_hardware = datetime.now() > (
-            computer.last_hardware_capture.replace(tzinfo=None) + timedelta(days=settings.MIGASFREE_HW_PERIOD)
-        )
+    plan = SyncPlanService.build(computer, all_attributes)
 
     return {
-        'faultsdef': fault_definitions,
-        'repositories': lst_deploys,
-        'packages': {
-            'remove': remove_duplicates_preserving_order(lst_pkg_to_remove),
-            'install': remove_duplicates_preserving_order(lst_pkg_to_install),
-        },
+        'faultsdef': [
+            {'language': item['language'], 'name': item['name'], 'code': item['code']}
+            for item in plan.fault_definitions
+        ],
+        'repositories': [
+            {'name': item['name'], 'source_template': item['source_template']} for item in plan.deployments
+        ],
+        'packages': plan.mandatory_packages(),
         'devices': {
-            'logical': logical_devices,
-            'default': default_logical_device,
+            'logical': list(plan.logical_devices),
+            'default': plan.default_logical_device,
         },
         'base': False,  # computerbase and base has been removed
-        'hardware_capture': capture_hardware,
+        'hardware_capture': plan.capture_hardware,
     }
 
 
@@ -245,7 +211,6 @@ def upload_computer_info(request, name, uuid, computer, data):
         user.update_fullname(user_fullname)
 
         computer.update_sync_user(user)
-        computer.sync_attributes.clear()
 
         # Process all attributes
         all_attributes = _process_attributes(computer, client_attributes, user)
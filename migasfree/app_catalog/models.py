@@ -281,12 +281,21 @@ class Policy(models.Model, MigasLink):
         return self.name
 
     @staticmethod
-    def belongs(computer, attributes):
-        return any(attribute.id == 1 or attribute in computer.sync_attributes.all() for attribute in attributes)
+    def belongs(computer, attributes, computer_attributes=None):
+        if computer_attributes is None:
+            computer_attributes = set(computer.sync_attributes.values_list('id', flat=True))
+
+        return any(attribute.id == 1 or attribute.id in computer_attributes for attribute in attributes)
 
     @staticmethod
-    def belongs_excluding(computer, included_attributes, excluded_attributes):
-        return bool(Policy.belongs(computer, included_attributes) and not Policy.belongs(computer, excluded_attributes))
+    def belongs_excluding(computer, included_attributes, excluded_attributes, computer_attributes=None):
+        if computer_attributes is None:
+            computer_attributes = set(computer.sync_attributes.values_list('id', flat=True))
+
+        return bool(
+            Policy.belongs(computer, included_attributes, computer_attributes)
+            and not Policy.belongs(computer, excluded_attributes, computer_attributes)
+        )
 
     @staticmethod
     def get_packages_to_remove(group, project_id=0):
@@ -301,24 +310,39 @@ class Policy(models.Model, MigasLink):
         return _packages
 
     @staticmethod
-    def get_packages(computer):
+    def get_packages(computer, computer_attributes=None):
+        """
+        computer_attributes: ids of the sync attributes of the computer
+        (evaluated once if not provided)
+        """
+        if computer_attributes is None:
+            computer_attributes = set(computer.sync_attributes.values_list('id', flat=True))
+
         to_install = []
         to_remove = []
 
-        for policy in Policy.objects.filter(enabled=True):
-            if policy.belongs_excluding(computer, policy.included_attributes.all(), policy.excluded_attributes.all()):
-                for group in PolicyGroup.objects.filter(policy=policy).order_by('priority'):
+        policies = Policy.objects.filter(enabled=True).prefetch_related('included_attributes', 'excluded_attributes')
+        for policy in policies:
+            if policy.belongs_excluding(
+                computer, policy.included_attributes.all(), policy.excluded_attributes.all(), computer_attributes
+            ):
+                groups = (
+                    PolicyGroup.objects.filter(policy=policy)
+                    .prefetch_related('included_attributes', 'excluded_attributes')
+                    .order_by('priority')
+                )
+                for group in groups:
                     if policy.belongs_excluding(
-                        computer, group.included_attributes.all(), group.excluded_attributes.all()
+                        computer, group.included_attributes.all(), group.excluded_attributes.all(), computer_attributes
                     ):
                         for pkgs in group.applications.filter(
-                            packages_by_project__project__id=computer.project.id
+                            packages_by_project__project__id=computer.project_id
                         ).values_list('packages_by_project__packages_to_install', flat=True):
                             for item in to_list(pkgs):
                                 to_install.append({'package': item, 'name': policy.name, 'id': policy.id})
 
                         if policy.exclusive:
-                            to_remove.extend(policy.get_packages_to_remove(group, computer.project.id))
+                            to_remove.extend(policy.get_packages_to_remove(group, computer.project_id))
                         break
 
         return to_install, to_remove
@@ -21,11 +21,12 @@ from channels.auth import AuthMiddlewareStack  # noqa: E402
 from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
 
 from .client.routing import ws_urlpatterns as client_ws_urlpatterns  # noqa: E402
+from .core.routing import ws_urlpatterns as core_ws_urlpatterns  # noqa: E402
 from .stats.routing import ws_urlpatterns as stats_ws_urlpatterns  # noqa: E402
 
 application = ProtocolTypeRouter(
     {
         'http': django_asgi_app,
-        'websocket': AuthMiddlewareStack(URLRouter(stats_ws_urlpatterns + client_ws_urlpatterns)),
+        'websocket': AuthMiddlewareStack(URLRouter(stats_ws_urlpatterns + client_ws_urlpatterns + core_ws_urlpatterns)),
     }
 )
@@ -18,7 +18,7 @@ from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from django_filters import rest_framework as filters
 
-from ..hardware.models import Node
+from ..core.models import Package
 from .models import (
     Computer,
     Error,
@@ -56,6 +56,10 @@ class ComputerFilter(filters.FilterSet):
         ),
     )
     installed_package = filters.NumberFilter(method='filter_installed_package', label='installed_package')
+    installed_package_name = filters.CharFilter(method='filter_installed_package_name', label='installed package name')
+    installed_package_version = filters.CharFilter(
+        method='filter_installed_package_version', label='installed package version'
+    )
     serial = filters.CharFilter(method='filter_serial', label='serial')
 
     def filter_has_software_inventory(self, qs, name, value):
@@ -65,36 +69,35 @@ class ComputerFilter(filters.FilterSet):
         return qs.filter(packagehistory=None)
 
     def filter_architecture(self, qs, name, value):
-        return qs.filter(
-            Q(node__class_name='processor', node__width=value) | Q(node__class_name='system', node__width=value)
-        ).distinct()
+        return qs.filter(summary__architecture=value)
 
     def filter_product_system(self, qs, name, value):
-        if value == 'docker':
-            return qs.filter(
-                node__name='network',
-                node__class_name='network',
-                node__description='Ethernet interface',
-                node__serial__istartswith='02:42:AC',
-            )
+        return qs.filter(summary__product_system=value)
 
-        if value == 'virtual':
-            return qs.filter(node__parent_id__isnull=True, node__vendor__in=list(Node.VIRTUAL_MACHINES.keys()))
+    def filter_installed_package(self, qs, name, value):
+        return qs.filter(packagehistory__package__id=value, packagehistory__uninstall_date__isnull=True)
 
-        if value == 'laptop':
-            return qs.filter(
-                node__class_name='system', node__configuration__name='chassis', node__configuration__value='notebook'
+    @staticmethod
+    def _with_installed_packages(qs, packages):
+        return qs.filter(
+            id__in=PackageHistory.objects.filter(package__in=packages, uninstall_date__isnull=True).values(
+                'computer_id'
             )
+        )
 
-        if value == 'desktop':
-            return qs.filter(node__class_name='system', node__configuration__name='chassis').exclude(
-                node__configuration__value='notebook'
-            )
+    def filter_installed_package_name(self, qs, name, value):
+        packages = Package.objects.filter(name=value)
+        version = self.form.cleaned_data.get('installed_package_version')
+        if version:
+            packages = packages.filter(version=version)
 
-        return qs
+        return self._with_installed_packages(qs, packages)
 
-    def filter_installed_package(self, qs, name, value):
-        return qs.filter(packagehistory__package__id=value, packagehistory__uninstall_date__isnull=True)
+    def filter_installed_package_version(self, qs, name, value):
+        if self.form.cleaned_data.get('installed_package_name'):
+            return qs  # applied with the name of the package
+
+        return self._with_installed_packages(qs, Package.objects.filter(version=value))
 
     def filter_serial(self, qs, name, value):
         return qs.filter(node__serial__icontains=value)
@@ -17,13 +17,16 @@
 from django.utils import timezone
 from django_redis import get_redis_connection
 
+from ..stats.utils import MESSAGE_DATES_KEY
+
 
 def add_computer_message(computer, message):
     con = get_redis_connection()
+    date = timezone.localtime(timezone.now())
     con.hset(
         f'migasfree:msg:{computer.id}',
         mapping={
-            'date': timezone.localtime(timezone.now()).strftime('%Y-%m-%dT%H:%M:%S.%f'),
+            'date': date.strftime('%Y-%m-%dT%H:%M:%S.%f'),
             'computer_id': computer.id,
             'computer_name': str(computer),
             'computer_status': computer.status,
@@ -36,6 +39,7 @@ def add_computer_message(computer, message):
         },
     )
     con.sadd('migasfree:watch:msg', computer.id)
+    con.zadd(MESSAGE_DATES_KEY, {computer.id: date.timestamp()})
 
 
 def remove_computer_messages(computer_id):
@@ -45,3 +49,4 @@ def remove_computer_messages(computer_id):
         con.hdel(f'migasfree:msg:{computer_id}', *keys)
 
     con.srem('migasfree:watch:msg', computer_id)
+    con.zrem(MESSAGE_DATES_KEY, computer_id)
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.14 on 2026-10-19 00:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from migasfree.utils import uuid_change_format
+
+
+def populate_identities(apps, schema_editor):
+    Computer = apps.get_model('client', 'Computer')
+    ComputerIdentity = apps.get_model('client', 'ComputerIdentity')
+
+    identities = []
+    for computer in Computer.objects.values('id', 'uuid', 'mac_address', 'name').iterator(chunk_size=2000):
+        values = set()
+        if computer['uuid']:
+            values.add(('uuid', computer['uuid']))
+            swapped = uuid_change_format(computer['uuid'])
+            if swapped != computer['uuid']:
+                values.add(('swapped', swapped))
+
+        mac_address = (computer['mac_address'] or '').upper()
+        for i in range(0, len(mac_address) - 11, 12):
+            values.add(('mac', mac_address[i : i + 12]))
+
+        if computer['name']:
+            values.add(('name', computer['name']))
+
+        identities.extend(
+            ComputerIdentity(computer_id=computer['id'], kind=kind, value=value) for kind, value in values
+        )
+        if len(identities) >= 5000:
+            ComputerIdentity.objects.bulk_create(identities)
+            identities = []
+
+    ComputerIdentity.objects.bulk_create(identities)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('client', '0005_alter_computer_status_alter_statuslog_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComputerIdentity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'kind',
+                    models.CharField(
+                        choices=[
+                            ('uuid', 'UUID'),
+                            ('swapped', 'UUID (endian format changed)'),
+                            ('mac', 'MAC address'),
+                            ('name', 'Name'),
+                        ],
+                        db_comment='identity kind: uuid, swapped (uuid in the other endian format), mac or name',
+                        max_length=7,
+                        verbose_name='kind',
+                    ),
+                ),
+                (
+                    'value',
+                    models.CharField(db_comment='normalized identity value', max_length=50, verbose_name='value'),
+                ),
+                (
+                    'computer',
+                    models.ForeignKey(
+                        db_comment='related computer',
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='identities',
+                        to='client.computer',
+                        verbose_name='computer',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Computer Identity',
+                'verbose_name_plural': 'Computer Identities',
+                'db_table_comment': 'normalized identifiers (uuid forms, MAC addresses and name) used to find a computer',
+                'indexes': [models.Index(fields=['value', 'kind'], name='computer_identity_value_idx')],
+                'unique_together': {('computer', 'kind', 'value')},
+            },
+        ),
+        migrations.RunPython(populate_identities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.14 on 2026-10-19 01:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('client', '0006_computer_identity'),
+        ('core', '0011_remove_project_base_os'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackageHistoryArchive',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'install_date',
+                    models.DateTimeField(
+                        db_comment='date the package was installed on the computer',
+                        null=True,
+                        verbose_name='install date',
+                    ),
+                ),
+                (
+                    'uninstall_date',
+                    models.DateTimeField(
+                        db_comment='date of uninstallation of the package on the computer',
+                        verbose_name='uninstall date',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Package History Archive',
+                'verbose_name_plural': 'Packages History Archive',
+                'db_table_comment': 'package history closed before the retention window',
+            },
+        ),
+        migrations.AddField(
+            model_name='packagehistoryarchive',
+            name='computer',
+            field=models.ForeignKey(
+                db_comment='related computer',
+                on_delete=django.db.models.deletion.CASCADE,
+                to='client.computer',
+                verbose_name='computer',
+            ),
+        ),
+        migrations.AddField(
+            model_name='packagehistoryarchive',
+            name='package',
+            field=models.ForeignKey(
+                db_comment='related package',
+                on_delete=django.db.models.deletion.CASCADE,
+                to='core.package',
+                verbose_name='package',
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.14 on 2026-10-19 01:01
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # the indexes of the (large) history table are built without locking writes,
+    # apart from the schema changes of 0007_package_history_maintenance (atomic)
+    atomic = False
+
+    dependencies = [
+        ('client', '0007_package_history_maintenance'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='packagehistory',
+            index=models.Index(
+                condition=models.Q(('uninstall_date__isnull', True)),
+                fields=['computer', 'package'],
+                name='packagehistory_open_idx',
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='packagehistory',
+            index=models.Index(
+                condition=models.Q(('uninstall_date__isnull', True)),
+                fields=['package'],
+                name='packagehistory_open_pkg_idx',
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='packagehistory',
+            index=models.Index(
+                condition=models.Q(('uninstall_date__isnull', False)),
+                fields=['uninstall_date'],
+                name='packagehistory_closed_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,189 @@
+# Generated by Django 5.2.14 on 2026-10-19 01:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# same criteria as Node.get_product_system and Computer.get_architecture
+BACKFILL_SQL = """
+WITH hardware AS (
+    SELECT
+        computer.id AS computer_id,
+        (
+            SELECT COUNT(*) FROM hardware_node node
+            WHERE node.computer_id = computer.id AND node.name = 'network' AND node.class_name = 'network'
+            AND node.description = 'Ethernet interface'
+        ) AS interfaces,
+        (
+            SELECT COUNT(*) FROM hardware_node node
+            WHERE node.computer_id = computer.id AND node.name = 'network' AND node.class_name = 'network'
+            AND node.description = 'Ethernet interface' AND UPPER(node.serial) LIKE '02:42:AC%%'
+        ) AS docker_interfaces,
+        UPPER(computer.uuid) LIKE '00000000-0000-0000-0000-0242AC%%' AS docker_uuid,
+        (
+            SELECT COUNT(*) FROM hardware_node node
+            WHERE node.computer_id = computer.id AND node.parent_id IS NULL
+        ) AS roots,
+        (
+            SELECT COUNT(*) FROM hardware_node node
+            WHERE node.computer_id = computer.id AND node.parent_id IS NULL AND node.vendor = ANY(%s)
+        ) AS virtual_roots,
+        (
+            SELECT COUNT(*) FROM hardware_node node
+            JOIN hardware_configuration configuration ON configuration.node_id = node.id
+            WHERE node.computer_id = computer.id AND node.class_name = 'system'
+            AND configuration.name = 'chassis' AND configuration.value = ANY(%s)
+        ) AS laptops,
+        (
+            SELECT COUNT(*) FROM hardware_node node
+            JOIN hardware_configuration configuration ON configuration.node_id = node.id
+            WHERE node.computer_id = computer.id AND node.class_name = 'system'
+            AND configuration.name = 'chassis' AND configuration.value <> ALL(%s)
+        ) AS desktops,
+        COALESCE(
+            (
+                SELECT node.width FROM hardware_node node
+                WHERE node.computer_id = computer.id AND node.class_name = 'processor' AND node.width > 0
+                ORDER BY node.id LIMIT 1
+            ),
+            (
+                SELECT node.width FROM hardware_node node
+                WHERE node.computer_id = computer.id AND node.class_name = 'system' AND node.width > 0
+                ORDER BY node.id LIMIT 1
+            )
+        ) AS architecture
+    FROM client_computer computer
+),
+docker AS (
+    SELECT
+        *,
+        CASE WHEN interfaces = 0 THEN docker_uuid ELSE interfaces = 1 AND docker_interfaces = 1 END AS is_docker
+    FROM hardware
+)
+INSERT INTO client_computersummary(
+    computer_id, product_system, architecture, sync_pms_status_ok, unchecked_errors, unchecked_faults, attributes
+)
+SELECT
+    docker.computer_id,
+    CASE
+        WHEN is_docker THEN 'docker'
+        WHEN roots = 1 AND virtual_roots = 1 THEN 'virtual'
+        WHEN laptops = 1 THEN 'laptop'
+        WHEN desktops = 1 THEN 'desktop'
+        ELSE ''
+    END,
+    architecture,
+    (
+        SELECT sync.pms_status_ok FROM client_synchronization sync
+        WHERE sync.computer_id = docker.computer_id
+        ORDER BY sync.created_at DESC, sync.id DESC LIMIT 1
+    ),
+    (
+        SELECT COUNT(*) FROM client_error error
+        WHERE error.computer_id = docker.computer_id AND NOT error.checked
+    ),
+    (
+        SELECT COUNT(*) FROM client_fault fault
+        WHERE fault.computer_id = docker.computer_id AND NOT fault.checked
+    ),
+    (
+        SELECT COUNT(*) FROM client_computer_sync_attributes attribute
+        WHERE attribute.computer_id = docker.computer_id
+    )
+FROM docker
+ON CONFLICT (computer_id) DO NOTHING
+"""
+
+VIRTUAL_VENDORS = ['innotek GmbH', 'Red Hat', 'Supermicro', 'Xen', 'Bochs', 'VMware, Inc.', 'QEMU']
+LAPTOP_CHASSIS = ['portable', 'laptop', 'notebook', 'sub-notebook', 'convertible', 'detachable']
+
+
+def backfill_summaries(apps, schema_editor):
+    schema_editor.execute(BACKFILL_SQL, [VIRTUAL_VENDORS, LAPTOP_CHASSIS, LAPTOP_CHASSIS])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('client', '0008_package_history_open_indexes'),
+        ('hardware', '0004_alter_capability_table_comment_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComputerSummary',
+            fields=[
+                (
+                    'computer',
+                    models.OneToOneField(
+                        db_comment='related computer',
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name='summary',
+                        serialize=False,
+                        to='client.computer',
+                        verbose_name='computer',
+                    ),
+                ),
+                (
+                    'product_system',
+                    models.CharField(
+                        blank=True,
+                        db_comment='docker, virtual, laptop or desktop (from the hardware tree)',
+                        default='',
+                        max_length=10,
+                        verbose_name='product system',
+                    ),
+                ),
+                (
+                    'architecture',
+                    models.SmallIntegerField(
+                        blank=True,
+                        db_comment='width of the processor or the system (from the hardware tree)',
+                        null=True,
+                        verbose_name='architecture',
+                    ),
+                ),
+                (
+                    'sync_pms_status_ok',
+                    models.BooleanField(
+                        db_comment='indicates whether the package management system worked in the last synchronization',
+                        null=True,
+                        verbose_name='PMS status OK',
+                    ),
+                ),
+                (
+                    'unchecked_errors',
+                    models.PositiveIntegerField(
+                        db_comment='number of unchecked errors of the computer',
+                        default=0,
+                        verbose_name='unchecked errors',
+                    ),
+                ),
+                (
+                    'unchecked_faults',
+                    models.PositiveIntegerField(
+                        db_comment='number of unchecked faults of the computer',
+                        default=0,
+                        verbose_name='unchecked faults',
+                    ),
+                ),
+                (
+                    'attributes',
+                    models.PositiveIntegerField(
+                        db_comment='number of attributes of the computer in the last synchronization',
+                        default=0,
+                        verbose_name='attributes',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Computer Summary',
+                'verbose_name_plural': 'Computer Summaries',
+                'db_table_comment': 'denormalized summary of the computers (hardware facts, last synchronization and counters)',
+                'indexes': [
+                    models.Index(fields=['product_system'], name='computersummary_product_idx'),
+                    models.Index(fields=['architecture'], name='computersummary_arch_idx'),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
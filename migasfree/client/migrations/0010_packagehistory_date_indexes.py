@@ -0,0 +1,29 @@
+# Generated by Django 5.2.14 on 2026-10-19 02:11
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # the indexes of the (large) history table are built without locking writes
+    atomic = False
+
+    dependencies = [
+        ('client', '0009_computer_summary'),
+        ('core', '0013_package_search_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='packagehistory',
+            index=models.Index(fields=['computer', 'install_date'], name='packagehistory_install_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='packagehistory',
+            index=models.Index(
+                condition=models.Q(('uninstall_date__isnull', False)),
+                fields=['computer', 'uninstall_date'],
+                name='packagehistory_uninstall_idx',
+            ),
+        ),
+    ]
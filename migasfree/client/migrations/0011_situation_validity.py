@@ -0,0 +1,68 @@
+# Generated by Django 5.2.14 on 2026-10-19 02:17
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+import migasfree.client.models.event
+
+# the situation of a computer is valid until its next event
+BACKFILL_SQL = """
+UPDATE {table} AS event SET valid_to = following.valid_to
+FROM (
+    SELECT id, LEAD(created_at) OVER (PARTITION BY computer_id ORDER BY created_at, id) AS valid_to
+    FROM {table}
+) AS following
+WHERE event.id = following.id AND following.valid_to IS NOT NULL;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('client', '0010_packagehistory_date_indexes'),
+        ('core', '0013_package_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='migration',
+            name='valid_to',
+            field=models.DateTimeField(
+                blank=True,
+                db_comment='date on which the situation of the computer changes (null if it is the current situation)',
+                editable=False,
+                null=True,
+                verbose_name='valid to',
+            ),
+        ),
+        migrations.AddField(
+            model_name='statuslog',
+            name='valid_to',
+            field=models.DateTimeField(
+                blank=True,
+                db_comment='date on which the situation of the computer changes (null if it is the current situation)',
+                editable=False,
+                null=True,
+                verbose_name='valid to',
+            ),
+        ),
+        migrations.RunSQL(
+            sql=BACKFILL_SQL.format(table='client_migration'),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql=BACKFILL_SQL.format(table='client_statuslog'),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='migration',
+            index=django.contrib.postgres.indexes.GistIndex(
+                migasfree.client.models.event.TsTzRange('created_at', 'valid_to'), name='migration_validity_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='statuslog',
+            index=django.contrib.postgres.indexes.GistIndex(
+                migasfree.client.models.event.TsTzRange('created_at', 'valid_to'), name='statuslog_validity_idx'
+            ),
+        ),
+    ]
@@ -15,24 +15,30 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 from .computer import Computer
+from .computer_identity import ComputerIdentity
+from .computer_summary import ComputerSummary
 from .error import Error
 from .fault import Fault
 from .fault_definition import FaultDefinition
 from .migration import Migration
 from .notification import Notification
 from .package_history import PackageHistory
+from .package_history_archive import PackageHistoryArchive
 from .status_log import StatusLog
 from .synchronization import Synchronization
 from .user import User
 
 __all__ = [
     'Computer',
+    'ComputerIdentity',
+    'ComputerSummary',
     'Error',
     'Fault',
     'FaultDefinition',
     'Migration',
     'Notification',
     'PackageHistory',
+    'PackageHistoryArchive',
     'StatusLog',
     'Synchronization',
     'User',
@@ -14,15 +14,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-from collections import OrderedDict, defaultdict
-from datetime import datetime, timedelta
+from datetime import UTC, datetime, timedelta
 
 from django.conf import settings
 from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
+from django.db.models import Exists, OuterRef, Value
 from django.db.models.aggregates import Count
-from django.db.models.functions import ExtractMonth, ExtractYear
+from django.db.models.functions import ExtractMonth, ExtractYear, TruncSecond
 from django.db.models.signals import post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
@@ -35,14 +35,13 @@ from ...core.models import (
     Attribute,
     BasicProperty,
     MigasLink,
+    Package,
     Project,
     Property,
     ServerAttribute,
 )
 from ...device.models import Logical
 from ...utils import (
-    list_difference,
-    merge_dicts,
     remove_empty_elements_from_dict,
     swap_m2m,
 )
@@ -367,6 +366,22 @@ class Computer(models.Model, MigasLink):
     def get_all_attributes(self):
         return list(self.tags.values_list('id', flat=True)) + list(self.sync_attributes.values_list('id', flat=True))
 
+    def update_sync_attributes(self, attributes):
+        """
+        Sets the sync attributes applying only the differences
+        (one delete of the removed ids and one insert of the new ones)
+        """
+        target = set(attributes)
+        current = set(self.sync_attributes.values_list('id', flat=True))
+
+        removed = current - target
+        if removed:
+            self.sync_attributes.remove(*removed)
+
+        added = target - current
+        if added:
+            self.sync_attributes.add(*added)
+
     def get_attribute_sets(self):
         return self.sync_attributes.filter(property_att__prefix='SET')
 
@@ -425,15 +440,24 @@ class Computer(models.Model, MigasLink):
         from .package_history import PackageHistory
 
         if history:
+            now = timezone.localtime(timezone.now())
+            packages = Package.objects.filter(project_id=self.project_id)
+
             if 'installed' in history:
-                PackageHistory.objects.filter(computer__id=self.id, package__fullname__in=history['installed']).update(
-                    install_date=timezone.localtime(timezone.now())
-                )
+                PackageHistory.objects.filter(
+                    computer_id=self.id,
+                    uninstall_date=None,
+                    package__in=packages.filter(fullname__in=history['installed']),
+                ).update(install_date=now)
 
             if 'uninstalled' in history:
-                PackageHistory.objects.filter(
-                    computer__id=self.id, package__fullname__in=history['uninstalled']
-                ).update(uninstall_date=timezone.localtime(timezone.now()))
+                PackageHistory.objects.close(
+                    [self.id], packages.filter(fullname__in=history['uninstalled']).values('id'), date=now
+                )
+
+                from ..tasks import clear_inventory_digest
+
+                clear_inventory_digest(self.id)
 
     @extend_schema_field(serializers.BooleanField)
     def has_software_inventory(self):
@@ -449,29 +473,65 @@ class Computer(models.Model, MigasLink):
             .order_by('package__fullname')
         )
 
-    def get_software_history(self):
-        installed = defaultdict(list)
-        uninstalled = defaultdict(list)
+    def installed_packages(self, search=None):
+        """
+        Installed packages (of the current project)
+        """
+        from .package_history import PackageHistory
 
-        for key, pkg, _id in list(
-            self.packagehistory_set.filter(install_date__isnull=False)
-            .values_list('install_date', 'package__fullname', 'package__id')
-            .distinct()
-            .order_by('-install_date', 'package__fullname')
-        ):
-            installed[key.strftime('%Y-%m-%dT%H:%M:%S')].append({'id': _id, 'name': pkg, 'mode': '+'})
+        installed = PackageHistory.objects.filter(
+            computer_id=self.id, package_id=OuterRef('pk'), uninstall_date__isnull=True
+        )
+        qs = Package.objects.filter(Exists(installed), project_id=self.project_id)
+        if search:
+            qs = qs.filter(fullname__icontains=search)
 
-        for key, pkg, _id in list(
-            self.packagehistory_set.filter(uninstall_date__isnull=False)
-            .values_list('uninstall_date', 'package__fullname', 'package__id')
-            .distinct()
-            .order_by('-uninstall_date', 'package__fullname')
-        ):
-            uninstalled[key.strftime('%Y-%m-%dT%H:%M:%S')].append({'id': _id, 'name': pkg, 'mode': '-'})
+        return qs.order_by('fullname')
+
+    def software_history_events(self, search=None, date_gte=None, date_lt=None):
+        """
+        Installations (mode '+') and uninstallations (mode '-') of packages,
+        newest first: date, package__id, package__fullname, mode
+        """
+        events = []
+        for mode, field in (('+', 'install_date'), ('-', 'uninstall_date')):
+            qs = self.packagehistory_set.filter(**{f'{field}__isnull': False})
+            if search:
+                qs = qs.filter(package__fullname__icontains=search)
+            if date_gte:
+                qs = qs.filter(**{f'{field}__gte': date_gte})
+            if date_lt:
+                qs = qs.filter(**{f'{field}__lt': date_lt})
+
+            events.append(
+                qs.annotate(date=TruncSecond(field, tzinfo=UTC), mode=Value(mode)).values_list(
+                    'date', 'package__id', 'package__fullname', 'mode'
+                )
+            )
+
+        return events[0].union(events[1]).order_by('-date', 'mode', 'package__fullname')
+
+    @staticmethod
+    def group_software_history(events):
+        """
+        Software history events grouped by date (as get_software_history)
+        """
+        history = {}
+        for date, _id, name, mode in events:
+            history.setdefault(date.strftime('%Y-%m-%dT%H:%M:%S'), []).append({'id': _id, 'name': name, 'mode': mode})
+
+        return history
 
-        merged = merge_dicts(installed, uninstalled)
+    def get_software_history(self, search=None, date_gte=None, date_lt=None):
+        return self.group_software_history(self.software_history_events(search, date_gte, date_lt))
 
-        return dict(OrderedDict(sorted(merged.items(), reverse=True)))
+    def delete_software_inventory(self):
+        self.packagehistory_set.filter(uninstall_date__isnull=True, package__project=self.project).delete()
+
+        from ..tasks import clear_inventory_digest
+
+        # the next inventory sent by the computer must be processed
+        clear_inventory_digest(self.id)
 
     def delete_software_history(self, key=None):
         if key and key != 'null':
@@ -482,6 +542,10 @@ class Computer(models.Model, MigasLink):
         else:
             self.packagehistory_set.filter().delete()
 
+        from ..tasks import clear_inventory_digest
+
+        clear_inventory_digest(self.id)
+
     @staticmethod
     def group_by_project(user):
         return Computer.productive.scope(user).values('project__name', 'project__id').annotate(count=Count('id'))
@@ -545,6 +609,7 @@ class Computer(models.Model, MigasLink):
 
     def update_hardware_resume(self):
         from ...hardware.models import Node
+        from .computer_summary import ComputerSummary
 
         try:
             self.product = Node.objects.get(computer=self.id, parent=None).get_product()
@@ -558,20 +623,16 @@ class Computer(models.Model, MigasLink):
         self.mac_address = Node.get_mac_address(self.id)
 
         self.save(update_fields=['product', 'machine', 'cpu', 'ram', 'disks', 'storage', 'mac_address'])
+        ComputerSummary.objects.refresh_hardware(self)
 
     def update_logical_devices(self, devices):
         """
         :param devices: [id1, id2, id3, ...]
         :return: void
         """
-        cid_attribute = self.get_cid_attribute()
-        initial_logical_devices = list(self.assigned_logical_devices_to_cid().values_list('id', flat=True))
-
-        for pk in list_difference(devices, initial_logical_devices):
-            Logical.objects.get(pk=pk).attributes.add(cid_attribute)
+        from ...core.services.logical_devices import LogicalDeviceAssignmentService
 
-        for pk in list_difference(initial_logical_devices, devices):
-            Logical.objects.get(pk=pk).attributes.remove(cid_attribute)
+        LogicalDeviceAssignmentService.update([self], devices, replace=True)
 
     def logical_devices(self, attributes=None):
         if not attributes:
@@ -737,6 +798,7 @@ class Computer(models.Model, MigasLink):
 
 @receiver(pre_save, sender=Computer)
 def pre_save_computer(sender, instance, **kwargs):
+    instance._identity_changed = True
     if instance.id:
         old_obj = Computer.objects.get(pk=instance.id)
         if old_obj.status != instance.status:
@@ -744,6 +806,12 @@ def pre_save_computer(sender, instance, **kwargs):
 
             StatusLog.objects.create(instance)
 
+        instance._identity_changed = (old_obj.uuid, old_obj.mac_address, old_obj.name) != (
+            instance.uuid,
+            instance.mac_address,
+            instance.name,
+        )
+
 
 @receiver(post_save, sender=Computer)
 def post_save_computer(sender, instance, created, **kwargs):
@@ -752,6 +820,11 @@ def post_save_computer(sender, instance, created, **kwargs):
 
         StatusLog.objects.create(instance)
 
+    if getattr(instance, '_identity_changed', True):
+        from .computer_identity import ComputerIdentity
+
+        ComputerIdentity.objects.update_computer(instance)
+
     if instance.status in ['available', 'unsubscribed']:
         instance.tags.clear()
         cid = instance.get_cid_attribute()
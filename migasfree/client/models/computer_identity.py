@@ -0,0 +1,154 @@
+# Copyright (c) 2026 Jose Antonio Chavarría <jachavar@gmail.com>
+# Copyright (c) 2026 Alberto Gacías <alberto@migasfree.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from django.db import models
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+
+from ...utils import uuid_change_format
+from .computer import Computer
+
+MAC_LEN = 12  # hexadecimal digits without separators
+
+
+def computer_identities(computer):
+    """
+    Returns the set of (kind, value) that identify a computer
+    """
+    identities = set()
+
+    if computer.uuid:
+        identities.add((ComputerIdentity.KIND_UUID, computer.uuid))
+        swapped = uuid_change_format(computer.uuid)
+        if swapped != computer.uuid:
+            identities.add((ComputerIdentity.KIND_SWAPPED_UUID, swapped))
+
+    if computer.mac_address:
+        mac_address = computer.mac_address.upper()
+        for i in range(0, len(mac_address) - MAC_LEN + 1, MAC_LEN):
+            identities.add((ComputerIdentity.KIND_MAC, mac_address[i : i + MAC_LEN]))
+
+    if computer.name:
+        identities.add((ComputerIdentity.KIND_NAME, computer.name))
+
+    return identities
+
+
+class ComputerIdentityManager(models.Manager):
+    def update_computer(self, computer):
+        """
+        Synchronizes the identities of a computer (only the differences are written)
+        """
+        identities = computer_identities(computer)
+        current = {
+            (kind, value): pk for pk, kind, value in self.filter(computer=computer).values_list('id', 'kind', 'value')
+        }
+
+        obsolete = [pk for identity, pk in current.items() if identity not in identities]
+        if obsolete:
+            self.filter(pk__in=obsolete).delete()
+
+        self.bulk_create(
+            [
+                ComputerIdentity(computer=computer, kind=kind, value=value)
+                for kind, value in identities
+                if (kind, value) not in current
+            ]
+        )
+
+    def resolve(self, uuid, name):
+        """
+        Finds a computer with a single indexed query, in order of preference:
+          1. by uuid
+          2. by uuid in the other endian format
+          3. by MAC address (in uuid format: 00000000-0000-0000-0000-XXXXXXXXXXXX),
+             if it belongs to only one computer
+          4. by name, if it belongs to only one computer
+        """
+        query = Q()
+        if uuid:
+            query |= Q(kind__in=[ComputerIdentity.KIND_UUID, ComputerIdentity.KIND_SWAPPED_UUID], value=uuid)
+            if uuid[0:8] == '0' * 8:
+                query |= Q(kind=ComputerIdentity.KIND_MAC, value=uuid[-MAC_LEN:].upper())
+        if name:
+            query |= Q(kind=ComputerIdentity.KIND_NAME, value=name)
+
+        if not query:
+            return None
+
+        found = {}
+        for identity in self.filter(query).select_related('computer'):
+            found.setdefault(identity.kind, {})[identity.computer_id] = identity.computer
+
+        for kind in ComputerIdentity.PRIORITY:
+            computers = found.get(kind, {})
+            if len(computers) == 1 or (computers and kind in ComputerIdentity.UNIQUE_KINDS):
+                return next(iter(computers.values()))
+
+        return None
+
+
+class ComputerIdentity(models.Model):
+    KIND_UUID = 'uuid'
+    KIND_SWAPPED_UUID = 'swapped'
+    KIND_MAC = 'mac'
+    KIND_NAME = 'name'
+
+    KIND_CHOICES = (
+        (KIND_UUID, _('UUID')),
+        (KIND_SWAPPED_UUID, _('UUID (endian format changed)')),
+        (KIND_MAC, _('MAC address')),
+        (KIND_NAME, _('Name')),
+    )
+
+    PRIORITY = (KIND_UUID, KIND_SWAPPED_UUID, KIND_MAC, KIND_NAME)
+    UNIQUE_KINDS = (KIND_UUID, KIND_SWAPPED_UUID)
+
+    computer = models.ForeignKey(
+        Computer,
+        on_delete=models.CASCADE,
+        related_name='identities',
+        verbose_name=_('computer'),
+        db_comment='related computer',
+    )
+
+    kind = models.CharField(
+        verbose_name=_('kind'),
+        max_length=7,
+        choices=KIND_CHOICES,
+        db_comment='identity kind: uuid, swapped (uuid in the other endian format), mac or name',
+    )
+
+    value = models.CharField(
+        verbose_name=_('value'),
+        max_length=50,
+        db_comment='normalized identity value',
+    )
+
+    objects = ComputerIdentityManager()
+
+    def __str__(self):
+        return f'{self.computer} ({self.kind}: {self.value})'
+
+    class Meta:
+        app_label = 'client'
+        verbose_name = _('Computer Identity')
+        verbose_name_plural = _('Computer Identities')
+        db_table_comment = 'normalized identifiers (uuid forms, MAC addresses and name) used to find a computer'
+        indexes = [
+            models.Index(fields=['value', 'kind'], name='computer_identity_value_idx'),
+        ]
+        unique_together = (('computer', 'kind', 'value'),)
@@ -0,0 +1,204 @@
+# Copyright (c) 2026 Jose Antonio Chavarría <jachavar@gmail.com>
+# Copyright (c) 2026 Alberto Gacías <alberto@migasfree.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from django.db import connection, models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+
+from .computer import Computer
+from .error import Error
+from .fault import Fault
+from .synchronization import Synchronization
+
+
+def summary_counters(computer):
+    """
+    Scalar subqueries of the counters of a summary
+    (computer is the SQL expression of the computer id)
+    """
+    return f"""
+        (
+            SELECT sync.pms_status_ok FROM client_synchronization sync
+            WHERE sync.computer_id = {computer}
+            ORDER BY sync.created_at DESC, sync.id DESC LIMIT 1
+        ),
+        (
+            SELECT COUNT(*) FROM client_error error
+            WHERE error.computer_id = {computer} AND NOT error.checked
+        ),
+        (
+            SELECT COUNT(*) FROM client_fault fault
+            WHERE fault.computer_id = {computer} AND NOT fault.checked
+        ),
+        (
+            SELECT COUNT(*) FROM client_computer_sync_attributes attribute
+            WHERE attribute.computer_id = {computer}
+        )
+    """
+
+
+class ComputerSummaryManager(models.Manager):
+    def refresh(self, computers):
+        """
+        Recomputes the outcome of the last synchronization and the counters
+        (unchecked errors and faults, attributes) of several computers (ids)
+        in a single statement. Hardware facts are kept (see refresh_hardware)
+        """
+        computers = list(computers)
+        if not computers:
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO client_computersummary(
+                    computer_id, product_system, architecture, sync_pms_status_ok,
+                    unchecked_errors, unchecked_faults, attributes
+                )
+                SELECT computer.id, '', NULL, {summary_counters('computer.id')}
+                FROM client_computer computer
+                WHERE computer.id = ANY(%s)
+                ON CONFLICT (computer_id) DO UPDATE SET
+                    sync_pms_status_ok = EXCLUDED.sync_pms_status_ok,
+                    unchecked_errors = EXCLUDED.unchecked_errors,
+                    unchecked_faults = EXCLUDED.unchecked_faults,
+                    attributes = EXCLUDED.attributes
+                """,
+                [computers],
+            )
+
+    def update_counters(self, computers):
+        """
+        As refresh, but only for the existing summaries (never creates one,
+        so it is safe while the computers are being deleted)
+        """
+        computers = list(computers)
+        if not computers:
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE client_computersummary summary SET
+                    (sync_pms_status_ok, unchecked_errors, unchecked_faults, attributes) =
+                    ({summary_counters('summary.computer_id')})
+                WHERE summary.computer_id = ANY(%s)
+                """,
+                [computers],
+            )
+
+    def refresh_hardware(self, computer):
+        """
+        Recomputes the hardware facts of a computer from its hardware tree
+        (called when the hardware is saved)
+        """
+        from ...hardware.models import Node
+
+        summary, _ = self.get_or_create(computer=computer)
+        summary.architecture = computer.get_architecture()
+        summary.product_system = Node.get_product_system(computer.id)
+        summary.save(update_fields=['architecture', 'product_system'])
+
+
+class ComputerSummary(models.Model):
+    """
+    Narrow projection of a computer used by list, filter and export endpoints,
+    so they do not need to load the hardware tree
+    """
+
+    computer = models.OneToOneField(
+        Computer,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='summary',
+        verbose_name=_('computer'),
+        db_comment='related computer',
+    )
+
+    product_system = models.CharField(
+        verbose_name=_('product system'),
+        max_length=10,
+        blank=True,
+        default='',
+        db_comment='docker, virtual, laptop or desktop (from the hardware tree)',
+    )
+
+    architecture = models.SmallIntegerField(
+        verbose_name=_('architecture'),
+        null=True,
+        blank=True,
+        db_comment='width of the processor or the system (from the hardware tree)',
+    )
+
+    sync_pms_status_ok = models.BooleanField(
+        verbose_name=_('PMS status OK'),
+        null=True,
+        db_comment='indicates whether the package management system worked in the last synchronization',
+    )
+
+    unchecked_errors = models.PositiveIntegerField(
+        verbose_name=_('unchecked errors'),
+        default=0,
+        db_comment='number of unchecked errors of the computer',
+    )
+
+    unchecked_faults = models.PositiveIntegerField(
+        verbose_name=_('unchecked faults'),
+        default=0,
+        db_comment='number of unchecked faults of the computer',
+    )
+
+    attributes = models.PositiveIntegerField(
+        verbose_name=_('attributes'),
+        default=0,
+        db_comment='number of attributes of the computer in the last synchronization',
+    )
+
+    objects = ComputerSummaryManager()
+
+    def __str__(self):
+        return str(self.computer)
+
+    class Meta:
+        app_label = 'client'
+        verbose_name = _('Computer Summary')
+        verbose_name_plural = _('Computer Summaries')
+        db_table_comment = 'denormalized summary of the computers (hardware facts, last synchronization and counters)'
+        indexes = [
+            models.Index(fields=['product_system'], name='computersummary_product_idx'),
+            models.Index(fields=['architecture'], name='computersummary_arch_idx'),
+        ]
+
+
+@receiver(post_save, sender=Computer)
+def post_save_computer_summary(sender, instance, created, **kwargs):
+    if created:
+        ComputerSummary.objects.refresh([instance.id])
+
+
+@receiver(post_save, sender=Synchronization)
+@receiver(post_save, sender=Error)
+@receiver(post_save, sender=Fault)
+def refresh_computer_summary(sender, instance, **kwargs):
+    ComputerSummary.objects.refresh([instance.computer_id])
+
+
+@receiver(post_delete, sender=Error)
+@receiver(post_delete, sender=Fault)
+def update_computer_summary(sender, instance, **kwargs):
+    # the computer (and its summary) may be being deleted (cascade)
+    ComputerSummary.objects.update_counters([instance.computer_id])
@@ -14,9 +14,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+from django.contrib.postgres.fields import DateTimeRangeField
 from django.db import models
+from django.db.models import OuterRef, Subquery
 from django.db.models.aggregates import Count
-from django.db.models.functions import ExtractDay, ExtractMonth, ExtractYear, TruncDay, TruncHour
+from django.db.models.functions import ExtractDay, ExtractMonth, ExtractYear, Greatest, TruncDay, TruncHour
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
@@ -25,6 +27,11 @@ from ...core.models import MigasLink
 from .computer import Computer
 
 
+class TsTzRange(models.Func):
+    function = 'TSTZRANGE'
+    output_field = DateTimeRangeField()
+
+
 class Event(models.Model, MigasLink):
     created_at = models.DateTimeField(
         auto_now_add=True,
@@ -130,3 +137,61 @@ class Event(models.Model, MigasLink):
 
     class Meta:
         abstract = True
+
+
+class SituationEvent(Event):
+    """
+    Event that sets the situation of a computer (project, status...) from its
+    creation (valid from) until the next event of the computer (valid to)
+    """
+
+    valid_to = models.DateTimeField(
+        verbose_name=_('valid to'),
+        null=True,
+        blank=True,
+        editable=False,
+        db_comment='date on which the situation of the computer changes (null if it is the current situation)',
+    )
+
+    @staticmethod
+    def validity():
+        return TsTzRange('created_at', 'valid_to')
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+
+        if adding:
+            self.close_previous([self])
+
+    @classmethod
+    def close_previous(cls, events):
+        """
+        Ends the validity of the previous situations of the computers of the new events
+        (must be called after creating the events, also in bulk)
+        """
+        ids = [event.pk for event in events]
+        if not ids:
+            return 0
+
+        created_at = cls.objects.filter(pk__in=ids, computer_id=OuterRef('computer_id')).order_by('created_at')
+
+        return (
+            cls.objects.filter(computer_id__in={event.computer_id for event in events}, valid_to__isnull=True)
+            .exclude(pk__in=ids)
+            .update(valid_to=Greatest('created_at', Subquery(created_at.values('created_at')[:1])))
+        )
+
+    @classmethod
+    def at(cls, date, user=None):
+        """
+        Situations of the computers on a date (served by the GiST index of the validity)
+        """
+        return cls.objects.scope(user).alias(validity=cls.validity()).filter(validity__contains=date)
+
+    @classmethod
+    def situation(cls, computer_id, date, user):
+        return cls.at(date, user).filter(computer__id=computer_id).order_by('-created_at', '-id').first()
+
+    class Meta:
+        abstract = True
@@ -14,11 +14,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+from django.contrib.postgres.indexes import GistIndex
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from ...core.models import Project
-from .event import Event
+from .event import SituationEvent
 
 
 class DomainMigrationManager(models.Manager):
@@ -52,7 +53,7 @@ class MigrationManager(DomainMigrationManager):
         return obj
 
 
-class Migration(Event):
+class Migration(SituationEvent):
     project = models.ForeignKey(
         Project,
         on_delete=models.CASCADE,
@@ -69,4 +70,5 @@ class Migration(Event):
         app_label = 'client'
         verbose_name = _('Migration')
         verbose_name_plural = _('Migrations')
+        indexes = [GistIndex(SituationEvent.validity(), name='migration_validity_idx')]
         db_table_comment = 'switching computer projects'
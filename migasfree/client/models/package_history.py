@@ -14,13 +14,16 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Q
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from ...core.models import MigasLink, Package
 from .computer import Computer
 
+ARCHIVE_BATCH_SIZE = 10000  # rows moved per statement
+
 
 class PackageHistoryManager(models.Manager):
     def get_queryset(self):
@@ -43,6 +46,48 @@ class PackageHistoryManager(models.Manager):
 
         return qs
 
+    def close(self, computers, packages=None, date=None):
+        """
+        Sets the uninstall date of the open history of several computers
+        (optionally, only of some packages) in a single statement.
+        Returns the number of closed rows
+        """
+        qs = models.QuerySet(self.model, using=self._db).filter(computer_id__in=computers, uninstall_date=None)
+        if packages is not None:
+            qs = qs.filter(package_id__in=packages)
+
+        return qs.update(uninstall_date=date or timezone.localtime(timezone.now()))
+
+    def archive(self, before, batch_size=ARCHIVE_BATCH_SIZE):
+        """
+        Moves the history closed before a date to the archive
+        (PackageHistoryArchive), in batches of batch_size rows.
+        Returns the number of archived rows
+        """
+        archived = 0
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    WITH moved AS (
+                        DELETE FROM client_packagehistory
+                        WHERE id IN (
+                            SELECT id FROM client_packagehistory
+                            WHERE uninstall_date < %s
+                            LIMIT %s
+                        )
+                        RETURNING computer_id, package_id, install_date, uninstall_date
+                    )
+                    INSERT INTO client_packagehistoryarchive(computer_id, package_id, install_date, uninstall_date)
+                    SELECT computer_id, package_id, install_date, uninstall_date FROM moved
+                    """,
+                    [before, batch_size],
+                )
+                archived += cursor.rowcount
+
+            if cursor.rowcount < batch_size:
+                return archived
+
 
 class PackageHistory(models.Model, MigasLink):
     """packages installed or/and uninstalled in computers"""
@@ -84,12 +129,35 @@ class PackageHistory(models.Model, MigasLink):
         if computer_id is None:
             raise ValueError('Invalid computer_id')
 
-        PackageHistory.objects.filter(computer__id=computer_id, uninstall_date=None).update(
-            uninstall_date=timezone.localtime(timezone.now())
-        )
+        PackageHistory.objects.close([computer_id])
 
     class Meta:
         app_label = 'client'
         verbose_name = _('Package History')
         verbose_name_plural = _('Packages History')
         db_table_comment = 'history of changes to the computer packages'
+        indexes = [
+            # open rows (installed packages) are the ones maintained and queried
+            models.Index(
+                fields=['computer', 'package'],
+                condition=Q(uninstall_date__isnull=True),
+                name='packagehistory_open_idx',
+            ),
+            models.Index(
+                fields=['package'],
+                condition=Q(uninstall_date__isnull=True),
+                name='packagehistory_open_pkg_idx',
+            ),
+            models.Index(
+                fields=['uninstall_date'],
+                condition=Q(uninstall_date__isnull=False),
+                name='packagehistory_closed_idx',
+            ),
+            # software history of a computer, by date
+            models.Index(fields=['computer', 'install_date'], name='packagehistory_install_idx'),
+            models.Index(
+                fields=['computer', 'uninstall_date'],
+                condition=Q(uninstall_date__isnull=False),
+                name='packagehistory_uninstall_idx',
+            ),
+        ]
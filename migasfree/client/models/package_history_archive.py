@@ -0,0 +1,59 @@
+# Copyright (c) 2026 Jose Antonio Chavarría <jachavar@gmail.com>
+# Copyright (c) 2026 Alberto Gacías <alberto@migasfree.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from ...core.models import Package
+from .computer import Computer
+
+
+class PackageHistoryArchive(models.Model):
+    """package history closed before the retention window (see PackageHistoryManager.archive)"""
+
+    computer = models.ForeignKey(
+        Computer,
+        on_delete=models.CASCADE,
+        verbose_name=_('computer'),
+        db_comment='related computer',
+    )
+
+    package = models.ForeignKey(
+        Package,
+        on_delete=models.CASCADE,
+        verbose_name=_('package'),
+        db_comment='related package',
+    )
+
+    install_date = models.DateTimeField(
+        verbose_name=_('install date'),
+        null=True,
+        db_comment='date the package was installed on the computer',
+    )
+
+    uninstall_date = models.DateTimeField(
+        verbose_name=_('uninstall date'),
+        db_comment='date of uninstallation of the package on the computer',
+    )
+
+    def __str__(self):
+        return _('%s at computer %s') % (self.package.fullname, self.computer)
+
+    class Meta:
+        app_label = 'client'
+        verbose_name = _('Package History Archive')
+        verbose_name_plural = _('Packages History Archive')
+        db_table_comment = 'package history closed before the retention window'
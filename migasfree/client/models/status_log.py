@@ -16,12 +16,13 @@
 
 from functools import reduce
 
+from django.contrib.postgres.indexes import GistIndex
 from django.db import models
 from django.db.models.aggregates import Count
 from django.utils.translation import gettext_lazy as _
 
 from .computer import Computer
-from .event import Event
+from .event import SituationEvent
 
 
 class DomainStatusLogManager(models.Manager):
@@ -46,7 +47,7 @@ class StatusLogManager(DomainStatusLogManager):
         return obj
 
 
-class StatusLog(Event):
+class StatusLog(SituationEvent):
     status = models.CharField(
         verbose_name=_('status'),
         max_length=20,
@@ -116,4 +117,5 @@ class StatusLog(Event):
         app_label = 'client'
         verbose_name = _('Status Log')
         verbose_name_plural = _('Status Logs')
+        indexes = [GistIndex(SituationEvent.validity(), name='statuslog_validity_idx')]
         db_table_comment = 'computer status changes'
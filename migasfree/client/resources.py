@@ -14,7 +14,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-from import_export import resources
+from import_export import fields, resources
 
 from .models import (
     Computer,
@@ -31,6 +31,12 @@ from .models import (
 
 
 class ComputerResource(resources.ModelResource):
+    product_system = fields.Field(attribute='summary__product_system', column_name='product_system')
+    architecture = fields.Field(attribute='summary__architecture', column_name='architecture')
+    sync_pms_status_ok = fields.Field(attribute='summary__sync_pms_status_ok', column_name='sync_pms_status_ok')
+    unchecked_errors = fields.Field(attribute='summary__unchecked_errors', column_name='unchecked_errors')
+    unchecked_faults = fields.Field(attribute='summary__unchecked_faults', column_name='unchecked_faults')
+
     def dehydrate_project(self, computer):
         return computer.project.name
 
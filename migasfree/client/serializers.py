@@ -79,7 +79,11 @@ class ComputerWriteSerializer(serializers.ModelSerializer):
 class ComputerListSerializer(serializers.ModelSerializer):
     project = ProjectNestedInfoSerializer(many=False, read_only=True)
     sync_user = UserInfoSerializer(many=False, read_only=True)
-    product_system = serializers.CharField(read_only=True)
+    product_system = serializers.CharField(source='summary.product_system', read_only=True)
+    sync_pms_status_ok = serializers.BooleanField(source='summary.sync_pms_status_ok', read_only=True)
+    unchecked_errors = serializers.IntegerField(source='summary.unchecked_errors', read_only=True)
+    unchecked_faults = serializers.IntegerField(source='summary.unchecked_faults', read_only=True)
+    attributes_count = serializers.IntegerField(source='summary.attributes', read_only=True)
     summary = serializers.CharField(source='get_summary', read_only=True)
 
     class Meta:
@@ -96,6 +100,10 @@ class ComputerListSerializer(serializers.ModelSerializer):
             'last_hardware_capture',
             'sync_user',
             'sync_end_date',
+            'sync_pms_status_ok',
+            'unchecked_errors',
+            'unchecked_faults',
+            'attributes_count',
             '__str__',
             'summary',
         )
@@ -105,7 +113,7 @@ class ComputerSerializer(ComputerListSerializer):
     software_inventory = serializers.HyperlinkedIdentityField(view_name='computer-software_inventory')
     software_history = serializers.HyperlinkedIdentityField(view_name='computer-software_history')
     tags = AttributeInfoSerializer(many=True, read_only=True)
-    architecture = serializers.CharField(source='get_architecture', read_only=True)
+    architecture = serializers.CharField(source='summary.architecture', read_only=True)
 
     class Meta:
         model = models.Computer
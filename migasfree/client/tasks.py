@@ -14,15 +14,43 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import csv
+import hashlib
+import io
+from datetime import timedelta
 
 from celery import shared_task
 from celery.exceptions import Reject
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import connection, transaction
 from django.utils import timezone
+from django_redis import get_redis_connection
 
 from ..core.models import Package
-from .models import Computer
+from .models import Computer, PackageHistory
+
+INVENTORY_DIGEST_TTL = 60 * 60 * 24 * 7  # seconds
+
+
+def inventory_digest_key(computer_id):
+    return f'migasfree:computers:{computer_id}:inventory'
+
+
+def inventory_digest(inventory, project_id):
+    """
+    Digest of a software inventory (order and duplicates are not relevant)
+    """
+    hash_ = hashlib.sha256(f'{project_id}\n'.encode())
+    for fullname in sorted(set(inventory)):
+        hash_.update(f'{fullname}\n'.encode())
+
+    return hash_.hexdigest()
+
+
+def clear_inventory_digest(computer_id):
+    con = get_redis_connection()
+    con.delete(inventory_digest_key(computer_id))
 
 
 @shared_task(queue='default', time_limit=600, soft_time_limit=540)
@@ -33,125 +61,131 @@ def update_software_inventory(computer_id, inventory):
         raise Reject(reason='Computer does not exist') from exc
 
     if inventory and isinstance(inventory, list):
+        inventory = [fullname for fullname in inventory if fullname]
+
+        # the same inventory than the last processed one: nothing to do
+        con = get_redis_connection()
+        key = inventory_digest_key(computer.id)
+        digest = inventory_digest(inventory, computer.project_id)
+        if con.get(key) == digest.encode():
+            return
+
         pkgs = []
         for fullname in inventory:
-            if fullname:
-                name, version, architecture = Package.normalized_name(fullname)
-                if not name:
-                    continue
+            name, version, architecture = Package.normalized_name(fullname)
+            if not name:
+                continue
 
-                pkgs.append((name, version, architecture, fullname))
+            pkgs.append((name, version, architecture, fullname))
 
         if pkgs:
-            update_software_inventory_raw(pkgs, computer.id, computer.project.id)
+            update_software_inventory_raw(pkgs, computer.id, computer.project_id)
+            transaction.on_commit(lambda: con.set(key, digest, ex=INVENTORY_DIGEST_TTL))
 
 
 def update_software_inventory_raw(pkgs, computer_id, project_id):
-    now = timezone.localtime(timezone.now())
+    """
+    Reconciles the software inventory of a computer with set-based SQL.
+
+    pkgs is a list of (name, version, architecture, fullname), streamed
+    with COPY to a temporary table (one round trip whatever its length):
+      1. history entries of packages no longer present are closed
+      2. unknown packages are added to the project
+      3. history entries are opened for the newly installed packages
+    """
+    if not pkgs:
+        return
 
-    with transaction.atomic():
-        cursor = connection.cursor()
+    now = timezone.localtime(timezone.now())
 
-        if not pkgs:
-            return
+    buffer = io.StringIO()
+    csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(pkgs)
+    buffer.seek(0)
 
-        # GENERATE PLACEHOLDERS AND PARAMS
-        # pkgs is list of (name, version, architecture, fullname)
-        # VALUES (%s, %s, %s, %s), (%s, %s, %s, %s), ...
-        placeholders = ','.join(['(%s, %s, %s, %s)'] * len(pkgs))
-        params = [item for sublist in pkgs for item in sublist]
-
-        # UPDATE UNINSTALL M2M
-        sql = f"""
-        SELECT P.package_id
-        FROM (VALUES {placeholders}) tmp(name, version, architecture, fullname)
-        RIGHT JOIN (
-            SELECT core_package.id as package_id, core_package.name,
-                core_package.version, core_package.architecture, core_package.fullname
-            FROM core_package
-                LEFT JOIN client_packagehistory ON core_package.id=client_packagehistory.package_id
-            WHERE client_packagehistory.computer_id={computer_id}
-                AND core_package.project_id={project_id}
-        ) AS P ON tmp.name=P.name AND tmp.version=P.version AND tmp.architecture=P.architecture
-        WHERE tmp.name IS NULL;
-        """
-        cursor.execute(sql, params)
-        to_remove = [x[0] for x in cursor.fetchall()]
-
-        if to_remove:
-            # Secure this IN clause too
-            placeholders_remove = ','.join(['%s'] * len(to_remove))
-            sql = f"""
-            UPDATE client_packagehistory SET uninstall_date=%s
-            WHERE client_packagehistory.package_id IN ({placeholders_remove})
-                AND uninstall_date IS NULL
-                AND computer_id=%s;
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS tmp_software_inventory')
+        cursor.execute(
+            """
+            CREATE TEMPORARY TABLE tmp_software_inventory (
+                name varchar(200),
+                version varchar(60),
+                architecture varchar(10),
+                fullname varchar(270)
+            ) ON COMMIT DROP
             """
-            cursor.execute(sql, [str(now), *to_remove, computer_id])
-
-        # INSERT PKG
-        sql = f"""
-        SELECT tmp.name, tmp.version, tmp.architecture, tmp.fullname
-        FROM (VALUES {placeholders}) tmp(name, version, architecture, fullname)
-        LEFT JOIN (
-            SELECT core_package.name, core_package.version,
-                core_package.architecture, core_package.fullname
+        )
+        cursor.copy_expert(
+            'COPY tmp_software_inventory(name, version, architecture, fullname) FROM STDIN WITH (FORMAT csv)',
+            buffer,
+        )
+        cursor.execute('ANALYZE tmp_software_inventory')
+
+        # UNINSTALLED PACKAGES
+        cursor.execute(
+            """
+            UPDATE client_packagehistory SET uninstall_date=%s
             FROM core_package
-                WHERE core_package.project_id={project_id}
-        ) AS P ON tmp.name=P.name AND tmp.version=P.version
-            AND tmp.architecture=P.architecture AND tmp.fullname=P.fullname
-        WHERE P.name IS NULL;
-        """
-        cursor.execute(sql, params)
-        to_add = [
-            (
-                x[0],  # name
-                x[1],  # version
-                x[2],  # architecture
-                x[3],  # fullname
-                project_id,
+            WHERE client_packagehistory.package_id=core_package.id
+                AND client_packagehistory.computer_id=%s
+                AND client_packagehistory.uninstall_date IS NULL
+                AND core_package.project_id=%s
+                AND NOT EXISTS (
+                    SELECT 1 FROM tmp_software_inventory tmp
+                    WHERE tmp.name=core_package.name
+                        AND tmp.version=core_package.version
+                        AND tmp.architecture=core_package.architecture
+                )
+            """,
+            [now, computer_id, project_id],
+        )
+
+        # NEW PACKAGES
+        cursor.execute(
+            """
+            INSERT INTO core_package(name, version, architecture, fullname, project_id)
+            SELECT DISTINCT tmp.name, tmp.version, tmp.architecture, tmp.fullname, %s
+            FROM tmp_software_inventory tmp
+            WHERE NOT EXISTS (
+                SELECT 1 FROM core_package
+                WHERE core_package.project_id=%s AND core_package.fullname=tmp.fullname
             )
-            for x in cursor.fetchall()
-        ]
-
-        if to_add:
-            # Use executemany or bulk_create via ORM would be better, but sticking to SQL structure for now.
-            # Constructing VALUES for INSERT
-            placeholders_insert = ','.join(['(%s, %s, %s, %s, %s)'] * len(to_add))
-            params_insert = [item for sublist in to_add for item in sublist]
+            ON CONFLICT (fullname, project_id) DO NOTHING
+            """,
+            [project_id, project_id],
+        )
 
-            sql = f"""
-            INSERT INTO core_package(name, version, architecture, fullname, project_id)
-            VALUES {placeholders_insert};
+        # INSTALLED PACKAGES
+        cursor.execute(
             """
-            cursor.execute(sql, params_insert)
-
-        # INSERT M2M
-        # Need placeholders for the VALUES inside the subquery
-        sql = f"""
-        SELECT P.id
-        FROM (VALUES {placeholders}) tmp(name, version, architecture, fullname)
-        RIGHT JOIN (
-            SELECT core_package.id AS id, core_package.name, core_package.version, core_package.architecture
-            FROM core_package
-            LEFT JOIN (
-                SELECT package_id, computer_id
-                FROM client_packagehistory
-                WHERE computer_id={computer_id} AND uninstall_date IS NULL
-            ) AS C ON core_package.id=C.package_id
-            WHERE core_package.project_id={project_id} AND C.computer_id IS NULL
-        ) AS P ON tmp.name=P.name AND tmp.version=P.version AND tmp.architecture=P.architecture
-        WHERE tmp.name IS NOT NULL;
-        """
-        cursor.execute(sql, params)
-        to_m2m_history = [(computer_id, x[0], str(now)) for x in cursor.fetchall()]
-
-        if to_m2m_history:
-            placeholders_m2m = ','.join(['(%s, %s, %s)'] * len(to_m2m_history))
-            params_m2m = [item for sublist in to_m2m_history for item in sublist]
-
-            sql = f"""
             INSERT INTO client_packagehistory(computer_id, package_id, install_date)
-            VALUES {placeholders_m2m};
-            """
-            cursor.execute(sql, params_m2m)
+            SELECT %s, core_package.id, %s
+            FROM core_package
+            WHERE core_package.project_id=%s
+                AND EXISTS (
+                    SELECT 1 FROM tmp_software_inventory tmp
+                    WHERE tmp.name=core_package.name
+                        AND tmp.version=core_package.version
+                        AND tmp.architecture=core_package.architecture
+                )
+                AND NOT EXISTS (
+                    SELECT 1 FROM client_packagehistory
+                    WHERE client_packagehistory.package_id=core_package.id
+                        AND client_packagehistory.computer_id=%s
+                        AND client_packagehistory.uninstall_date IS NULL
+                )
+            """,
+            [computer_id, now, project_id, computer_id],
+        )
+
+
+@shared_task(queue='default', time_limit=3600, soft_time_limit=3540)
+def archive_package_history():
+    """
+    Moves the package history closed before the retention window
+    (MIGASFREE_PACKAGE_HISTORY_RETENTION days) to the archive
+    """
+    retention = settings.MIGASFREE_PACKAGE_HISTORY_RETENTION
+    if not retention:
+        return 0
+
+    return PackageHistory.objects.archive(timezone.now() - timedelta(days=retention))
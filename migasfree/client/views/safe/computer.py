@@ -34,7 +34,6 @@ from rest_framework.decorators import action, permission_classes, throttle_class
 from rest_framework.response import Response
 from rest_framework.throttling import UserRateThrottle
 
-from ....app_catalog.models import Policy
 from ....core.mixins import SafeConnectionMixin
 from ....core.models import (
     Attribute,
@@ -45,6 +44,8 @@ from ....core.models import (
     Property,
 )
 from ....core.serializers import AttributeSerializer
+from ....core.services.domains import DomainReadModel
+from ....core.services.sync_plan import SyncPlanService
 from ....utils import (
     get_client_ip,
     remove_duplicates_preserving_order,
@@ -298,24 +299,26 @@ class SafeComputerViewSet(SafeConnectionMixin, viewsets.ViewSet):
         user = get_user_or_create(claims.get('sync_user'), claims.get('sync_fullname'), claims.get('ip_address'))
         user.update_fullname(claims.get('sync_fullname'))
 
-        computer.sync_attributes.clear()
-
         # features
+        attributes = []
         for prefix, value in claims.get('sync_attributes').items():
             client_property = Property.objects.get(prefix=prefix)
             if client_property.sort == 'client':
-                computer.sync_attributes.add(*Attribute.process_kind_property(client_property, value))
+                attributes.extend(Attribute.process_kind_property(client_property, value))
 
         # Domain attribute
-        computer.sync_attributes.add(*Domain.process(computer.get_all_attributes()))
+        tags = list(computer.tags.select_related('property_att'))
+        tag_ids = [tag.id for tag in tags]
+        attributes.extend(Domain.process(tag_ids + attributes))
 
         # tags
-        for tag in computer.tags.filter(property_att__enabled=True):
-            computer.sync_attributes.add(*Attribute.process_kind_property(tag.property_att, tag.value))
+        for tag in tags:
+            if tag.property_att.enabled:
+                attributes.extend(Attribute.process_kind_property(tag.property_att, tag.value))
 
         # basic attributes
-        computer.sync_attributes.add(
-            *BasicAttribute.process(
+        attributes.extend(
+            BasicAttribute.process(
                 id=computer.id,
                 ip_address=claims.get('ip_address'),
                 project=computer.project.name,
@@ -326,8 +329,12 @@ class SafeComputerViewSet(SafeConnectionMixin, viewsets.ViewSet):
         )
 
         # attribute sets
-        computer.sync_attributes.add(*AttributeSet.process(computer.get_all_attributes()))
+        attributes.extend(AttributeSet.process(tag_ids + attributes))
+
+        computer.update_sync_attributes(attributes)
+        SyncPlanService.invalidate(computer.id)  # a new synchronization starts
 
+        identity_changed = (computer.uuid, computer.name) != (claims.get('uuid'), claims.get('name'))
         models.Computer.objects.filter(pk=computer.pk).update(
             uuid=claims.get('uuid'),
             name=claims.get('name'),
@@ -338,6 +345,8 @@ class SafeComputerViewSet(SafeConnectionMixin, viewsets.ViewSet):
             sync_start_date=timezone.localtime(timezone.now()),
         )
         computer.refresh_from_db()
+        if identity_changed:
+            models.ComputerIdentity.objects.update_computer(computer)
 
         serializer = serializers.ComputerSerializer(computer, context={'request': request})
 
@@ -377,8 +386,8 @@ class SafeComputerViewSet(SafeConnectionMixin, viewsets.ViewSet):
         add_computer_message(computer, gettext('Getting repositories...'))
 
         ret = [
-            {'name': repo.slug, 'source_template': repo.source_template()}
-            for repo in Deployment.available_deployments(computer, computer.get_all_attributes())
+            {'name': repo['slug'], 'source_template': repo['source_template']}
+            for repo in SyncPlanService.get(computer).deployments
         ]
 
         add_computer_message(computer, gettext('Sending repositories...'))
@@ -434,8 +443,10 @@ class SafeComputerViewSet(SafeConnectionMixin, viewsets.ViewSet):
 
         add_computer_message(computer, gettext('Getting fault definitions...'))
 
-        results = models.FaultDefinition.enabled_for_attributes(computer.get_all_attributes())
-        ret = [serializers.FaultDefinitionForAttributesSerializer(item).data for item in results]
+        ret = [
+            {'language': item['language'], 'name': item['name'], 'code': item['code']}
+            for item in SyncPlanService.get(computer).fault_definitions
+        ]
 
         add_computer_message(computer, gettext('Sending fault definitions...'))
 
@@ -614,35 +625,11 @@ class SafeComputerViewSet(SafeConnectionMixin, viewsets.ViewSet):
 
         add_computer_message(computer, gettext('Getting mandatory packages...'))
 
-        pkgs = Deployment.available_deployments(computer, computer.get_all_attributes()).values_list(
-            'packages_to_install', 'packages_to_remove'
-        )
+        response = SyncPlanService.get(computer).mandatory_packages()
 
         add_computer_message(computer, gettext('Sending mandatory packages...'))
 
-        if pkgs:
-            install = []
-            remove = []
-            for install_item, remove_item in pkgs:
-                if install_item:
-                    install.extend([x for x in install_item.split('\n') if x])
-
-                if remove_item:
-                    remove.extend([x for x in remove_item.split('\n') if x])
-
-            # policies
-            policy_pkg_to_install, policy_pkg_to_remove = Policy.get_packages(computer)
-            install.extend([x['package'] for x in policy_pkg_to_install])
-            remove.extend([x['package'] for x in policy_pkg_to_remove])
-
-            response = {
-                'install': remove_duplicates_preserving_order(install),
-                'remove': remove_duplicates_preserving_order(remove),
-            }
-
-            return Response(self.create_response(response), status=status.HTTP_200_OK)
-
-        return Response(self.create_response({'install': [], 'remove': []}), status.HTTP_200_OK)
+        return Response(self.create_response(response), status=status.HTTP_200_OK)
 
     @extend_schema(
         description='Returns the list of tags assigned to a computer (requires JWT auth).',
@@ -729,14 +716,22 @@ class SafeComputerViewSet(SafeConnectionMixin, viewsets.ViewSet):
         available = {}
 
         # Computer tags
-        for tag in computer.tags.all():
+        computer_tags = list(computer.tags.select_related('property_att'))
+        domains = list(
+            Domain.objects.filter(
+                name__in={tag.value.split('.')[0] for tag in computer_tags if tag.property_att.prefix == 'DMN'}
+            )
+        )
+        domain_tags = DomainReadModel.tags(domains)
+        domain_tags = {domain.name: domain_tags[domain.id] for domain in domains}
+        for tag in computer_tags:
             """ TODO think about this!
             available.setdefault(tag.property_att.name, []).append(str(tag))
             """
 
             # if tag is a domain, includes all domain's tags
             if tag.property_att.prefix == 'DMN':
-                for tag_dmn in Domain.objects.get(name=tag.value.split('.')[0]).get_tags():
+                for tag_dmn in domain_tags.get(tag.value.split('.')[0], []):
                     available.setdefault(tag_dmn.property_att.name, []).append(str(tag_dmn))
 
         # Deployment tags
@@ -1348,11 +1343,9 @@ class SafeComputerViewSet(SafeConnectionMixin, viewsets.ViewSet):
         claims = self.get_claims(request.data)
         computer = get_object_or_404(models.Computer, id=claims.get('id'))
 
-        logical_devices = [device.as_dict(computer.project) for device in computer.logical_devices()]
-
-        default_logical_device = 0
-        if computer.default_logical_device:
-            default_logical_device = computer.default_logical_device.id
+        plan = SyncPlanService.get(computer)
+        logical_devices = list(plan.logical_devices)
+        default_logical_device = plan.default_logical_device
 
         logger.debug('logical devices: %s', logical_devices)
         logger.debug('default logical device: %d', default_logical_device)
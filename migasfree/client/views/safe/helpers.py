@@ -23,7 +23,6 @@ import logging
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
-from ....utils import uuid_change_format
 from ... import models
 
 logger = logging.getLogger('migasfree')
@@ -79,32 +78,7 @@ def is_computer_changed(computer, name, project, ip_address, uuid):
 def get_computer(uuid, name):
     logger.debug('uuid: %s, name: %s', uuid, name)
 
-    try:
-        computer = models.Computer.objects.get(uuid=uuid)
-        logger.debug('computer found by uuid')
+    computer = models.ComputerIdentity.objects.resolve(uuid, name)
+    logger.debug('computer found: %s', computer)
 
-        return computer
-    except models.Computer.DoesNotExist:
-        pass
-
-    try:
-        computer = models.Computer.objects.get(uuid=uuid_change_format(uuid))
-        logger.debug('computer found by uuid (endian format changed)')
-
-        return computer
-    except models.Computer.DoesNotExist:
-        pass
-
-    computer = models.Computer.objects.filter(mac_address__icontains=uuid[-12:])
-    if computer.count() == 1 and uuid[0:8] == '0' * 8:
-        logger.debug('computer found by mac_address (in uuid format)')
-
-        return computer.first()
-
-    try:
-        computer = models.Computer.objects.get(name=name)
-        logger.debug('computer found by name')
-
-        return computer
-    except (models.Computer.DoesNotExist, models.Computer.MultipleObjectsReturned):
-        return None
+    return computer
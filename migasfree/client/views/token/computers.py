@@ -14,12 +14,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-import json
-from datetime import datetime
+from functools import partial
 from operator import gt, le
 
 import requests
+from django import forms
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Case, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
 from django.http import QueryDict
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
@@ -29,18 +32,21 @@ from drf_spectacular.utils import extend_schema
 from rest_framework import exceptions, permissions, status, viewsets
 from rest_framework.decorators import action, permission_classes
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-from ....app_catalog.models import Policy
-from ....core.models import Deployment
+from ....core.models import Project
 from ....core.serializers import PlatformSerializer
+from ....core.services.computer_lifecycle import ComputerLifecycleService
+from ....core.services.logical_devices import LogicalDeviceAssignmentService
+from ....core.services.sync_plan import SyncPlanService
 from ....core.views import ExportViewSet, MigasViewSet
-from ....device.models import Driver, Logical, Model
+from ....device.models import Logical
 from ....device.serializers import LogicalInfoSerializer
 from ....hardware.models import Node
 from ....hardware.serializers import NodeOnlySerializer
 from ....mixins import DatabaseCheckMixin
-from ....stats.utils import filter_computers_by_date
-from ....utils import replace_keys
+from ....paginations import DefaultCursorPagination, DefaultPagination, RankedCursorPagination
+from ....stats.utils import computers_by_date
 from ... import models, serializers
 from ...filters import ComputerFilter
 
@@ -84,12 +90,9 @@ class ComputerViewSet(DatabaseCheckMixin, viewsets.ModelViewSet, MigasViewSet, E
                 'project',
                 'project__platform',
                 'sync_user',
+                'summary',
             )
-            .prefetch_related(
-                'tags',
-                'node_set',
-                'node_set__configuration_set',
-            )
+            .prefetch_related('tags')
         )
 
     def partial_update(self, request, *args, **kwargs):
@@ -104,22 +107,9 @@ class ComputerViewSet(DatabaseCheckMixin, viewsets.ModelViewSet, MigasViewSet, E
             except ValueError:
                 assigned_logical_devices_to_cid = []
 
-            for item in assigned_logical_devices_to_cid:
-                logical_device = Logical.objects.get(pk=item)
-                model = Model.objects.get(device=logical_device.device)
-                if not Driver.objects.filter(
-                    capability=logical_device.capability, model=model, project=computer.project
-                ).exists():
-                    return Response(
-                        {
-                            'error': _(
-                                'Error in capability %s for assign computer %s.'
-                                ' There is no driver defined for project %s in model %s.'
-                            )
-                            % (logical_device.capability, computer, computer.project, model),
-                        },
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
+            errors = LogicalDeviceAssignmentService.missing_drivers([computer], assigned_logical_devices_to_cid)
+            if errors:
+                return Response({'error': ' '.join(errors)}, status=status.HTTP_400_BAD_REQUEST)
 
             computer.update_logical_devices(assigned_logical_devices_to_cid)
 
@@ -145,48 +135,88 @@ class ComputerViewSet(DatabaseCheckMixin, viewsets.ModelViewSet, MigasViewSet, E
 
         return Response(response, status=status.HTTP_200_OK)
 
+    @staticmethod
+    def _software_paginator(request):
+        """
+        Software lists are paginated only if requested (page or page_size)
+        """
+        if 'page' in request.query_params or 'page_size' in request.query_params:
+            return DefaultPagination()
+
+        return None
+
+    @staticmethod
+    def _date_param(request, name):
+        value = request.query_params.get(name)
+        if not value:
+            return None
+
+        try:
+            return forms.DateTimeField().clean(value)
+        except ValidationError as e:
+            raise exceptions.ParseError(_('Invalid date: %s') % value) from e
+
     @action(methods=['get', 'delete'], detail=True, url_path='software/inventory', url_name='software_inventory')
     def software_inventory(self, request, pk=None):
         """
         Returns installed packages in a computer
+
+        Params (optional):
+            package: text in the name of the packages
+            page, page_size: paginated response
         """
         computer = self.get_object()
 
         if request.method == 'DELETE' and request.user.is_superuser:
-            computer.packagehistory_set.filter(uninstall_date__isnull=True, package__project=computer.project).delete()
+            computer.delete_software_inventory()
 
-        data = list(
-            computer.packagehistory_set.filter(uninstall_date__isnull=True, package__project=computer.project)
-            .values(
-                'package__id',
-                'package__fullname',
-            )
-            .distinct()
-            .order_by('package__fullname')
-        )
+        packages = computer.installed_packages(search=request.query_params.get('package')).values_list('id', 'fullname')
 
-        return Response(
-            replace_keys(
-                data,
-                {
-                    'package__id': 'id',
-                    'package__fullname': 'name',
-                },
-            ),
-            status=status.HTTP_200_OK,
-        )
+        paginator = self._software_paginator(request)
+        if paginator is not None:
+            packages = paginator.paginate_queryset(packages, request, view=self)
+
+        data = [{'id': _id, 'name': name} for _id, name in packages]
+
+        if paginator is None:
+            return Response(data, status=status.HTTP_200_OK)
+
+        return paginator.get_paginated_response(data)
 
     @action(methods=['get', 'delete'], detail=True, url_path='software/history', url_name='software_history')
     def software_history(self, request, pk=None):
         """
         Returns software history of a computer
+
+        Params (optional):
+            package: text in the name of the packages
+            date__gte, date__lt: date range of the events
+            page, page_size: paginated response of events {date, id, name, mode}
+                (history grouped by date otherwise)
         """
         computer = self.get_object()
 
         if request.method == 'DELETE' and request.user.is_superuser:
             computer.delete_software_history(request.GET.get('key', None))
 
-        return Response(computer.get_software_history(), status=status.HTTP_200_OK)
+        events = computer.software_history_events(
+            search=request.query_params.get('package'),
+            date_gte=self._date_param(request, 'date__gte'),
+            date_lt=self._date_param(request, 'date__lt'),
+        )
+
+        paginator = self._software_paginator(request)
+        if paginator is None:
+            return Response(computer.group_software_history(events), status=status.HTTP_200_OK)
+
+        page = paginator.paginate_queryset(events, request, view=self)
+
+        return paginator.get_paginated_response(
+            [
+                {'date': date.strftime('%Y-%m-%dT%H:%M:%S'), 'id': _id, 'name': name, 'mode': mode}
+                for date, _id, name, mode in page
+            ]
+        )
 
     @action(methods=['post'], detail=True)
     def status(self, request, pk=None):
@@ -260,21 +290,121 @@ class ComputerViewSet(DatabaseCheckMixin, viewsets.ModelViewSet, MigasViewSet, E
 
         return Response(status=status.HTTP_200_OK)
 
+    @action(methods=['post'], detail=False, url_path='logical-devices', url_name='logical_devices')
+    def logical_devices(self, request):
+        """
+        Input: {
+            'computers': [id1, id2, ...],
+            'assign': [logical_id1, logical_id2, ...],
+            'unassign': [logical_id1, logical_id2, ...]
+        }
+        Assigns and unassigns logical devices to several computers at once
+        """
+        try:
+            ids = set(map(int, request.data.get('computers', [])))
+            assign = set(map(int, request.data.get('assign', [])))
+            unassign = set(map(int, request.data.get('unassign', [])))
+        except (TypeError, ValueError) as e:
+            raise exceptions.ParseError(_('Computers and logical devices must be lists of ids')) from e
+
+        computers = list(self.get_queryset().filter(pk__in=ids))
+        missing = ids - {computer.id for computer in computers}
+        if missing:
+            raise exceptions.NotFound(_('Computers not found: %s') % sorted(missing))
+
+        errors = LogicalDeviceAssignmentService.missing_drivers(computers, assign)
+        if errors:
+            return Response({'error': ' '.join(errors)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            LogicalDeviceAssignmentService.update(computers, assign, unassign),
+            status=status.HTTP_200_OK,
+        )
+
+    @action(methods=['post'], detail=False)
+    def lifecycle(self, request):
+        """
+        Input: {
+            'computers': [id1, id2, ...],  # optional, else the computers of the filter (query params),
+                                           # that must filter by some field or search
+            'status': 'available' | 'reserved' | 'unsubscribed'
+                | 'unknown' | 'assigned',
+            'project': id,
+            'reset_software_inventory': true | false
+        }
+        Changes status and project or resets the software inventory
+        of several computers at once
+        """
+        computers = self.filter_queryset(self.get_queryset())
+        if 'computers' in request.data:
+            try:
+                computers = computers.filter(pk__in=set(map(int, request.data['computers'])))
+            except (TypeError, ValueError) as e:
+                raise exceptions.ParseError(_('Computers must be a list of ids')) from e
+        elif not self._is_filtered(request):
+            # other query params (format, page_size, ordering...) would select the whole scope
+            raise exceptions.ParseError(_('Computers or a filter are required'))
+
+        new_status = request.data.get('status')
+        if new_status is not None and new_status not in dict(models.Computer.STATUS_CHOICES):
+            raise exceptions.ParseError(
+                _('Status must have one of the values: %s') % (dict(models.Computer.STATUS_CHOICES).keys())
+            )
+
+        project = None
+        if request.data.get('project') is not None:
+            project = get_object_or_404(Project, pk=request.data['project'])
+
+        reset_software_inventory = bool(request.data.get('reset_software_inventory'))
+        if reset_software_inventory and not request.user.is_superuser:
+            raise exceptions.PermissionDenied
+
+        response = {'computers': computers.count()}
+        if project:
+            response['project'] = ComputerLifecycleService.change_project(computers, project)
+
+        if new_status is not None:
+            response['status'] = ComputerLifecycleService.change_status(computers, new_status)
+
+        if reset_software_inventory:
+            response['software_inventory'] = ComputerLifecycleService.reset_software_inventory(computers)
+
+        return Response(response, status=status.HTTP_200_OK)
+
+    def _is_filtered(self, request):
+        """
+        Whether the query params filter the computers (by a field of the filterset or a search)
+        """
+        if request.query_params.get(api_settings.SEARCH_PARAM):
+            return True
+
+        filterset = self.filterset_class(request.query_params, queryset=self.get_queryset(), request=request)
+
+        return bool(filterset.form.changed_data)
+
+    def _paginated_computers(self, request, comparison_operator):
+        """
+        Computers in the scope of the user ordered by the date of their last
+        message, with cursor pagination over the sorted set of those dates
+        """
+        paginator = RankedCursorPagination()
+        page = paginator.paginate_ranking(
+            partial(computers_by_date, comparison_operator, chunk_size=paginator.chunk_size),
+            self.get_queryset(),
+            request,
+            view=self,
+        )
+        serializer = serializers.ComputerSerializer(page, many=True, context={'request': request})
+
+        return paginator.get_paginated_response(serializer.data)
+
     @action(methods=['get'], detail=False)
     def synchronizing(self, request):
-        result, _ = filter_computers_by_date(gt)
-        sync_computers = models.Computer.objects.filter(pk__in=result)
-
-        serializer = serializers.ComputerSerializer(sync_computers, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self._paginated_computers(request, gt)
 
     @action(methods=['get'], detail=False)
     def delayed(self, request):
-        result, _ = filter_computers_by_date(le)
-        delayed_computers = models.Computer.objects.filter(pk__in=result)
-
-        serializer = serializers.ComputerSerializer(delayed_computers, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self._paginated_computers(request, le)
 
     @action(methods=['get'], detail=True)
     def sync(self, request, pk=None):
@@ -328,7 +458,7 @@ class ComputerViewSet(DatabaseCheckMixin, viewsets.ModelViewSet, MigasViewSet, E
         """
         user = request.user.userprofile
         computer = self.get_object()
-        date = request.GET.get('date', timezone.localtime(timezone.now()))
+        date = self._date_param(request, 'date') or timezone.now()
 
         migration = models.Migration.situation(computer.id, date, user)
         status_log = models.StatusLog.situation(computer.id, date, user)
@@ -343,61 +473,72 @@ class ComputerViewSet(DatabaseCheckMixin, viewsets.ModelViewSet, MigasViewSet, E
 
         if status_log:
             response['status'] = status_log.status
-        else:
-            if isinstance(date, str):
-                date = datetime.strptime(date, '%Y-%m-%d')
-                if date >= computer.created_at:
-                    response['status'] = settings.MIGASFREE_DEFAULT_COMPUTER_STATUS
+        elif date >= computer.created_at:
+            response['status'] = settings.MIGASFREE_DEFAULT_COMPUTER_STATUS
 
         return Response(response, status=status.HTTP_200_OK)
 
-    @action(methods=['get'], detail=True, url_path='sync/simulation')
-    def simulate_sync(self, request, pk=None):
-        computer = self.get_object()
-        user = request.user
-        user.userprofile.check_scope(pk)
-
-        repos = Deployment.available_deployments(computer, computer.get_all_attributes()).values('id', 'name', 'source')
-        definitions = models.FaultDefinition.enabled_for_attributes(computer.get_all_attributes()).values('id', 'name')
+    @action(methods=['get'], detail=False, url_path='situation', url_name='fleet_situation')
+    def fleet_situation(self, request):
+        """
+        Project and status of the computers (filtered) on a date (cursor pagination)
 
-        pkgs = Deployment.available_deployments(computer, computer.get_all_attributes()).values_list(
-            'packages_to_install', 'packages_to_remove', 'name', 'id'
+        :param request
+            date
+        :return: [{"id": x, "project": x, "status": "xxx"}, ...]
+        """
+        user = request.user.userprofile
+        date = self._date_param(request, 'date') or timezone.now()
+
+        computers = self.filter_queryset(self.get_queryset()).annotate(
+            project_at=Subquery(
+                models.Migration.at(date, user)
+                .filter(computer_id=OuterRef('pk'))
+                .order_by('-created_at', '-id')
+                .values('project_id')[:1]
+            ),
+            status_at=Coalesce(
+                Subquery(
+                    models.StatusLog.at(date, user)
+                    .filter(computer_id=OuterRef('pk'))
+                    .order_by('-created_at', '-id')
+                    .values('status')[:1]
+                ),
+                # same fallback as the situation of a computer
+                Case(When(created_at__lte=date, then=Value(settings.MIGASFREE_DEFAULT_COMPUTER_STATUS))),
+            ),
         )
 
-        install = set()
-        remove = set()
-        for install_item, remove_item, deploy_name, deploy_id in pkgs:
-            if install_item:
-                for pkg in install_item.split('\n'):
-                    if pkg:
-                        install.add(json.dumps({'package': pkg, 'name': deploy_name, 'id': deploy_id}, sort_keys=True))
-
-            if remove_item:
-                for pkg in remove_item.split('\n'):
-                    if pkg:
-                        remove.add(json.dumps({'package': pkg, 'name': deploy_name, 'id': deploy_id}, sort_keys=True))
-
-        packages = {'install': [json.loads(x) for x in install], 'remove': [json.loads(x) for x in remove]}
+        paginator = DefaultCursorPagination()
+        page = paginator.paginate_queryset(computers, request, view=self)
 
-        policy_pkg_to_install, policy_pkg_to_remove = Policy.get_packages(computer)
-        policies = {'install': policy_pkg_to_install, 'remove': policy_pkg_to_remove}
-
-        capture = computer.hardware_capture_is_required()
+        return paginator.get_paginated_response(
+            [{'id': computer.id, 'project': computer.project_at, 'status': computer.status_at} for computer in page]
+        )
 
-        logical_devices = []
-        for device in computer.logical_devices():
-            logical_devices.append(LogicalInfoSerializer(device).data)
+    @action(methods=['get'], detail=True, url_path='sync/simulation')
+    def simulate_sync(self, request, pk=None):
+        computer = self.get_object()
+        user = request.user
+        user.userprofile.check_scope(pk)
 
-        default_logical_device = computer.default_logical_device.id if computer.default_logical_device else 0
+        plan = SyncPlanService.build(computer)
 
         response = {
-            'deployments': repos,
-            'fault_definitions': definitions,
-            'packages': packages,
-            'policies': policies,
-            'capture_hardware': capture,
-            'logical_devices': logical_devices,
-            'default_logical_device': default_logical_device,
+            'deployments': [
+                {'id': item['id'], 'name': item['name'], 'source': item['source']} for item in plan.deployments
+            ],
+            'fault_definitions': [{'id': item['id'], 'name': item['name']} for item in plan.fault_definitions],
+            'packages': {'install': list(plan.packages_to_install), 'remove': list(plan.packages_to_remove)},
+            'policies': {
+                'install': list(plan.policy_packages_to_install),
+                'remove': list(plan.policy_packages_to_remove),
+            },
+            'capture_hardware': plan.capture_hardware,
+            'logical_devices': LogicalInfoSerializer(
+                Logical.objects.filter(id__in=plan.logical_device_ids), many=True
+            ).data,
+            'default_logical_device': plan.default_logical_device,
         }
 
         return Response(response, status=status.HTTP_200_OK)
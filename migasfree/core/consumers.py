@@ -0,0 +1,55 @@
+# Copyright (c) 2026 Jose Antonio Chavarría <jachavar@gmail.com>
+# Copyright (c) 2026 Alberto Gacías <alberto@migasfree.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .services.package_ingestion import PackageIngestionService, ingestion_group
+
+
+@database_sync_to_async
+def can_follow_ingestion(user, ingestion_id):
+    """
+    Only authenticated users with the project of the ingestion in their scope
+    """
+    profile = getattr(user, 'userprofile', None) if user and user.is_authenticated else None
+    if profile is None:
+        return False
+
+    return PackageIngestionService.user_state(ingestion_id, profile) is not None
+
+
+class PackageIngestionConsumer(AsyncJsonWebsocketConsumer):
+    group_name = None
+
+    async def connect(self):
+        ingestion_id = self.scope['url_route']['kwargs']['ingestion_id'].hex
+        if not await can_follow_ingestion(self.scope.get('user'), ingestion_id):
+            await self.close()
+            return
+
+        self.group_name = ingestion_group(ingestion_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if self.group_name is None:
+            return
+
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def send_ingestion(self, event):
+        await self.send_json(event['text'])
@@ -77,22 +77,10 @@ class DeploymentFilter(filters.FilterSet):
     percent__lt = filters.NumberFilter(method='filter_percent_lt', label='percent__lt')
 
     def filter_percent_gte(self, qs, name, value):
-        ret = Deployment.objects.none()
-        for item in qs:
-            percent = item.schedule_timeline().get('percent', 100)
-            if percent >= value:
-                ret |= Deployment.objects.filter(pk=item.pk)
-
-        return ret
+        return qs.with_schedule_percent().filter(schedule_percent__gte=value)
 
     def filter_percent_lt(self, qs, name, value):
-        ret = Deployment.objects.none()
-        for item in qs:
-            percent = item.schedule_timeline().get('percent', 100)
-            if percent < value:
-                ret |= Deployment.objects.filter(pk=item.pk)
-
-        return ret
+        return qs.with_schedule_percent().filter(schedule_percent__lt=value)
 
     class Meta:
         model = Deployment
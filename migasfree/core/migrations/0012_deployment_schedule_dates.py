@@ -0,0 +1,71 @@
+# Generated by Django 5.2.14 on 2026-10-19 02:03
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def time_horizon(date, delay):
+    """
+    No weekends (frozen copy of migasfree.utils.time_horizon)
+    """
+    weekday = date.weekday()  # [0 (Monday), 6 (Sunday)]
+    delta = delay + ((delay + weekday) // 5 * 2)
+
+    return date + timedelta(days=delta)
+
+
+def backfill_schedule_dates(apps, schema_editor):
+    Deployment = apps.get_model('core', 'Deployment')
+    ScheduleDelay = apps.get_model('core', 'ScheduleDelay')
+
+    delays = {}
+    for delay in ScheduleDelay.objects.all():
+        delays.setdefault(delay.schedule_id, []).append(delay)
+
+    deployments = list(Deployment.objects.filter(schedule__isnull=False).only('id', 'start_date', 'schedule_id'))
+    for deployment in deployments:
+        schedule_delays = sorted(delays.get(deployment.schedule_id, []), key=lambda x: x.delay)
+        if schedule_delays:
+            deployment.schedule_begin_date = time_horizon(deployment.start_date, schedule_delays[0].delay)
+            deployment.schedule_end_date = time_horizon(
+                deployment.start_date, schedule_delays[-1].delay + schedule_delays[-1].duration
+            )
+
+    Deployment.objects.bulk_update(deployments, ['schedule_begin_date', 'schedule_end_date'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('core', '0011_remove_project_base_os'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deployment',
+            name='schedule_begin_date',
+            field=models.DateField(
+                blank=True,
+                db_comment='date on which the schedule begins (computed from start date and schedule delays)',
+                editable=False,
+                null=True,
+                verbose_name='schedule begin date',
+            ),
+        ),
+        migrations.AddField(
+            model_name='deployment',
+            name='schedule_end_date',
+            field=models.DateField(
+                blank=True,
+                db_comment='date on which the schedule ends (computed from start date and schedule delays)',
+                editable=False,
+                null=True,
+                verbose_name='schedule end date',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='deployment',
+            index=models.Index(fields=['schedule_end_date'], name='deployment_schedule_end_idx'),
+        ),
+        migrations.RunPython(backfill_schedule_dates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.14 on 2026-10-19 02:11
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('core', '0012_deployment_schedule_dates'),
+        ('device', '0004_install_trigram_extension'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='package',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper('fullname'), name='gin_trgm_ops'
+                ),
+                name='package_fullname_trgm_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(fields=['name', 'version'], name='package_name_version_idx'),
+        ),
+    ]
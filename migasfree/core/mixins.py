@@ -29,6 +29,8 @@ from .models import Project
 
 logger = logging.getLogger('migasfree')
 
+COMPRESSION_CLAIM = 'accept_zip'  # the client can decompress JWE payloads (value: 'DEF')
+
 
 class SafeConnectionMixin:
     project = None
@@ -37,6 +39,7 @@ class SafeConnectionMixin:
 
     verify_key = None
     encrypt_key = None
+    compress_response = False
 
     def verify_mtls_identity(self, request, computer_uuid):
         """
@@ -94,6 +97,8 @@ class SafeConnectionMixin:
             'msg': jwt,
             'project': project_name
         }
+        The claim COMPRESSION_CLAIM (removed from the result) negotiates
+        the compression of the responses
         """
         msg = data.get('msg')
         if not self.verify_key:
@@ -103,6 +108,11 @@ class SafeConnectionMixin:
         claims = secure.unwrap(msg, decrypt_key=self.decrypt_key, verify_key=self.verify_key)
         logger.debug('get_claims: %s', claims)
 
+        if isinstance(claims, dict) and COMPRESSION_CLAIM in claims:
+            accepted = claims.pop(COMPRESSION_CLAIM)
+            accepted = accepted if isinstance(accepted, list) else [accepted]
+            self.compress_response = secure.ZIP_DEFLATE in accepted
+
         return claims
 
     def create_response(self, data):
@@ -123,6 +133,15 @@ class SafeConnectionMixin:
         # before passing them to the JWE wrapping library which uses the standard JSON encoder.
         clean_data = json.loads(json.dumps(data, cls=JSONEncoder))
 
-        msg = secure.wrap(clean_data, sign_key=self.sign_key, encrypt_key=self.encrypt_key)
+        msg = secure.wrap(
+            clean_data, sign_key=self.sign_key, encrypt_key=self.encrypt_key, compress=self.compress_response
+        )
 
         return {'msg': msg}
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # payloads are encrypted (and compressed before encryption, if negotiated)
+        response.skip_compression = True
+
+        return response
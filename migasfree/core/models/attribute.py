@@ -19,7 +19,7 @@ import json
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
@@ -182,6 +182,33 @@ class Attribute(models.Model, MigasLink):
     total_computers.admin_order_field = 'total_computers'
     total_computers.short_description = _('Total computers')
 
+    @staticmethod
+    def total_computers_by_attribute(attribute_ids, user=None):
+        """
+        Productive computers of several attributes in one grouped query
+        (in the scope of the user): {attribute_id: total}
+        """
+        from ...client.models import Computer
+
+        attribute_ids = set(attribute_ids)
+        if not attribute_ids:
+            return {}
+
+        if user and not user.userprofile.is_view_all():
+            queryset = Computer.productive.scope(user.userprofile)
+        else:
+            queryset = Computer.productive.all()
+
+        totals = dict.fromkeys(attribute_ids, 0)
+        totals.update(
+            queryset.filter(sync_attributes__id__in=attribute_ids)
+            .values_list('sync_attributes__id')
+            .annotate(total=Count('id', distinct=True))
+            .order_by()
+        )
+
+        return totals
+
     def update_value(self, new_value):
         if self.value != new_value:
             self.value = new_value
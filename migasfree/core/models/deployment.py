@@ -20,10 +20,10 @@ import shutil
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.db.models import F, Q
 from django.db.models.functions import Mod
-from django.db.models.signals import pre_delete, pre_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.template.defaultfilters import slugify
 from django.utils import timezone
@@ -40,6 +40,7 @@ from .package import Package
 from .package_set import PackageSet
 from .project import Project
 from .schedule import Schedule
+from .schedule_delay import ScheduleDelay
 
 logger = logging.getLogger('migasfree')
 
@@ -55,6 +56,13 @@ class DeploymentQuerySet(models.QuerySet):
 
         return self
 
+    def with_schedule_percent(self, date=None):
+        """
+        Annotates schedule_percent (see DeploymentTimelineService.get_percent),
+        so deployments can be filtered and sorted by rollout phase
+        """
+        return self.annotate(schedule_percent=DeploymentTimelineService.percent_expression(date))
+
     def available(self, computer, attributes):
         """
         Consolidates common filtering logic for available deployments.
@@ -79,6 +87,9 @@ class DeploymentManager(models.Manager):
     def scope(self, user):
         return self.get_queryset().scope(user)
 
+    def with_schedule_percent(self, date=None):
+        return self.get_queryset().with_schedule_percent(date)
+
     def available_deployments(self, computer, attributes):
         """
         Return available deployments for a computer and attributes list
@@ -211,6 +222,22 @@ class Deployment(models.Model, MigasLink):
         db_comment='initial date from which the deployment will be accessible',
     )
 
+    schedule_begin_date = models.DateField(
+        verbose_name=_('schedule begin date'),
+        null=True,
+        blank=True,
+        editable=False,
+        db_comment='date on which the schedule begins (computed from start date and schedule delays)',
+    )
+
+    schedule_end_date = models.DateField(
+        verbose_name=_('schedule end date'),
+        null=True,
+        blank=True,
+        editable=False,
+        db_comment='date on which the schedule ends (computed from start date and schedule delays)',
+    )
+
     auto_restart = models.BooleanField(
         verbose_name=_('auto restart'),
         default=False,
@@ -338,14 +365,41 @@ class Deployment(models.Model, MigasLink):
         for property_name in properties_to_normalize:
             setattr(self, property_name, normalize_line_breaks(getattr(self, property_name)))
 
+        self.schedule_begin_date, self.schedule_end_date = DeploymentTimelineService.schedule_dates(
+            self.start_date, ScheduleDelay.objects.filter(schedule_id=self.schedule_id) if self.schedule_id else []
+        )
+        if update_fields is not None:
+            update_fields = {*update_fields, 'schedule_begin_date', 'schedule_end_date'}
+
         super().save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
 
-        try:
-            from ...stats import tasks
+        self.update_assigned_computers()
+
+    def update_assigned_computers(self):
+        """
+        Requests (once the transaction is committed) the incremental update
+        of the computers assigned to this deployment
+        """
+        from ...stats import tasks
+
+        deployment_id = self.id
+
+        def enqueue():
+            try:
+                if tasks.is_assignment_pending(tasks.get_assignment_progress(deployment_id)):
+                    return  # the queued task has not started yet, it will see this change
+
+                tasks.set_assignment_progress(deployment_id, status=tasks.ASSIGNMENT_PENDING)
+                try:
+                    tasks.update_deployment_computers.apply_async(args=(deployment_id,), queue='default')
+                except Exception as e:
+                    # not queued: the next change has to enqueue it again
+                    tasks.set_assignment_progress(deployment_id, status=tasks.ASSIGNMENT_FAILED, error=str(e))
+                    raise
+            except Exception as e:
+                logger.warning('Failed to enqueue update_deployment_computers task: %s', e)
 
-            tasks.assigned_computers_to_deployment(self.id)
-        except Exception as e:
-            logger.warning('Failed to run assigned_computers_to_deployment task: %s', e)
+        transaction.on_commit(enqueue)
 
     @staticmethod
     def available_deployments(computer, attributes):
@@ -466,6 +520,9 @@ class Deployment(models.Model, MigasLink):
         verbose_name_plural = _('Deployments')
         unique_together = (('name', 'project'), ('project', 'slug'))
         ordering = ['project__name', 'name']
+        indexes = [
+            models.Index(fields=['schedule_end_date'], name='deployment_schedule_end_idx'),
+        ]
         db_table_comment = (
             'repositories of packages and associated actions to be executed on computers'
             ' that meet the required attributes'
@@ -498,6 +555,37 @@ def pre_save_deployment(sender, instance, **kwargs):
             instance.clear_cache()
 
 
+@receiver(m2m_changed, sender=Deployment.included_attributes.through)
+@receiver(m2m_changed, sender=Deployment.excluded_attributes.through)
+def deployment_attributes_changed(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        instance.update_assigned_computers()
+        return
+
+    deployments = Deployment.objects.filter(pk__in=kwargs['pk_set']) if kwargs.get('pk_set') else []
+    for deploy in deployments:
+        deploy.update_assigned_computers()
+
+
+@receiver(post_save, sender=ScheduleDelay)
+@receiver(post_delete, sender=ScheduleDelay)
+def schedule_delays_changed(sender, instance, **kwargs):
+    delays = list(ScheduleDelay.objects.filter(schedule_id=instance.schedule_id))
+
+    deployments = list(
+        Deployment.objects.filter(schedule_id=instance.schedule_id).select_related(None).only('id', 'start_date')
+    )
+    for deployment in deployments:
+        deployment.schedule_begin_date, deployment.schedule_end_date = DeploymentTimelineService.schedule_dates(
+            deployment.start_date, delays
+        )
+
+    Deployment.objects.bulk_update(deployments, ['schedule_begin_date', 'schedule_end_date'])
+
+
 @receiver(pre_delete, sender=Deployment)
 def pre_delete_deployment(sender, instance, **kwargs):
     path = instance.path()
@@ -506,6 +594,9 @@ def pre_delete_deployment(sender, instance, **kwargs):
 
     instance.clear_cache()
 
+    con = get_redis_connection()
+    con.delete(f'migasfree:deployments:{instance.id}:assignment')
+
 
 class InternalSourceManager(DeploymentManager):
     def scope(self, user):
@@ -84,17 +84,14 @@ class Domain(models.Model, MigasLink):
         return att_id
 
     def get_tags(self):
-        tags = [Attribute.objects.get(property_att__prefix='DMN', value=self.name)]
-        for tag in Attribute.objects.filter(property_att__prefix='DMN', value__startswith=f'{self.name}.'):
-            tags.append(tag)
+        from ..services.domains import DomainReadModel
 
-        for tag in self.tags.all():
-            tags.append(tag)
-
-        return tags
+        return DomainReadModel.tags([self])[self.id]
 
     def get_domain_admins(self):
-        return list(self.domains.values('id', 'username'))
+        from ..services.domains import DomainReadModel
+
+        return DomainReadModel.domain_admins(self)
 
     def update_domain_admins(self, users):
         """
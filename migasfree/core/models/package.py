@@ -20,9 +20,11 @@ import shutil
 from importlib import import_module
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.db.models.aggregates import Count
+from django.db.models.functions import Upper
 from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
@@ -159,10 +161,17 @@ class Package(models.Model, MigasLink):
 
     @staticmethod
     def handle_uploaded_file(f, target):
+        from ..services.package_ingestion import forget_package_file
+
         path = os.path.dirname(target)
         if not os.path.isdir(path):
             os.makedirs(path)
 
+        # target may be a hard link shared with other stores (see package ingestion)
+        forget_package_file(target)
+        if os.path.lexists(target):
+            os.remove(target)
+
         with open(target, 'wb+') as destination:
             for chunk in f.chunks():
                 destination.write(chunk)
@@ -198,6 +207,10 @@ class Package(models.Model, MigasLink):
 
     @staticmethod
     def delete_from_store(path):
+        from ..services.package_ingestion import forget_package_file
+
+        forget_package_file(path)
+
         if os.path.exists(path):
             try:
                 if os.path.isfile(path):
@@ -299,20 +312,27 @@ class Package(models.Model, MigasLink):
         db_table_comment = (
             'software package details: contains the name, version, architecture, related project and store'
         )
+        indexes = [
+            # fullname__icontains compiles to UPPER(fullname) LIKE UPPER(...)
+            GinIndex(OpClass(Upper('fullname'), name='gin_trgm_ops'), name='package_fullname_trgm_idx'),
+            models.Index(fields=['name', 'version'], name='package_name_version_idx'),
+        ]
 
 
 def _update_deployments(instance, delete=False):
-    from ..pms import tasks
+    from ..services.repository_rebuilds import RepositoryRebuildService
     from .deployment import Deployment
 
-    queryset = Deployment.objects.filter(available_packages__in=[instance])
-    for deploy in queryset:
-        if delete:
-            deploy.available_packages.remove(instance)
+    deployment_ids = list(Deployment.objects.filter(available_packages__in=[instance]).values_list('id', flat=True))
+    if delete:
+        Deployment.available_packages.through.objects.filter(
+            deployment_id__in=deployment_ids, package_id=instance.id
+        ).delete()
 
-        tasks.create_repository_metadata.apply_async(
-            queue=f'pms-{deploy.pms().name}', kwargs={'payload': deploy.get_repository_metadata_payload()}
-        )
+    # changed packages allow an incremental rebuild of the repository
+    changes = {'added': [], 'removed': [instance.fullname]} if delete else {'added': [instance.fullname], 'removed': []}
+
+    RepositoryRebuildService.schedule(deployment_ids, changes)
 
 
 @receiver(post_save, sender=Package)
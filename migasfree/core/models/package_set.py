@@ -115,9 +115,7 @@ class PackageSet(models.Model, MigasLink):
         if not user:
             return PackageSet.objects.filter(deployment__isnull=True, packages__isnull=False).distinct().count()
 
-        return (
-            PackageSet.objects.scope(user).filter(deployment__isnull=True, packageset__isnull=False).distinct().count()
-        )
+        return PackageSet.objects.scope(user).filter(deployment__isnull=True, packages__isnull=False).distinct().count()
 
     def __str__(self):
         return str(self.name)
@@ -130,14 +128,12 @@ class PackageSet(models.Model, MigasLink):
 
 
 def _update_repository_metadata(instance):
-    from ..pms import tasks
+    from ..services.repository_rebuilds import RepositoryRebuildService
     from .deployment import Deployment
 
-    queryset = Deployment.objects.filter(available_package_sets__in=[instance])
-    for deploy in queryset:
-        tasks.create_repository_metadata.apply_async(
-            queue=f'pms-{deploy.pms().name}', kwargs={'payload': deploy.get_repository_metadata_payload()}
-        )
+    RepositoryRebuildService.schedule(
+        Deployment.objects.filter(available_package_sets__in=[instance]).values_list('id', flat=True)
+    )
 
 
 @receiver(m2m_changed, sender=PackageSet.packages.through)
@@ -16,8 +16,9 @@
 
 import os
 
-from ...utils import execute, get_setting
+from ...utils import get_setting
 from .pms import Pms
+from .runner import execute
 
 
 class Apk(Pms):
@@ -69,14 +70,15 @@ class Apk(Pms):
 
             output_index = f'dists/{repo_name}/{self.components}/{arch_name}/APKINDEX.tar.gz'
             cmd_index = ['apk', 'index', '-o', output_index, *apk_files_rel]
-            ret_idx, out_idx, err_idx = execute(cmd_index, shell=False, cwd=cwd)
+            ret_idx, out_idx, err_idx = execute(cmd_index, shell=False, cwd=cwd, timeout=None)
             if ret_idx != 0:
                 return ret_idx, out_idx, err_idx
 
             rsa_key = os.path.join(self.keys_path, 'migasfree.rsa')
             if os.path.isfile(rsa_key):
                 cmd_sign = ['abuild-sign', '-k', rsa_key, output_index]
-                ret_sign, out_sign, err_sign = execute(cmd_sign, shell=False, cwd=cwd)
+                with self.timing('sign'):
+                    ret_sign, out_sign, err_sign = execute(cmd_sign, shell=False, cwd=cwd)
                 if ret_sign != 0:
                     return ret_sign, out_sign, err_sign
 
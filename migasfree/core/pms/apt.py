@@ -21,8 +21,9 @@ import re
 import subprocess
 from datetime import UTC, datetime
 
-from ...utils import execute, get_setting
+from ...utils import get_setting
 from .pms import Pms
+from .runner import execute
 
 
 class Apt(Pms):
@@ -40,6 +41,7 @@ class Apt(Pms):
             'application/vnd.debian.binary-package',
         ]
         self.extensions = ['deb']
+        self.indexes = ['Release', 'InRelease']
         self.architectures = [
             'alpha',
             'all',
@@ -123,7 +125,7 @@ class Apt(Pms):
                 'packages',
                 f'dists/{repo_name}/{self.components}',
             ]
-            ret, out, err = execute(cmd, shell=False, cwd=cwd)
+            ret, out, err = execute(cmd, shell=False, cwd=cwd, timeout=None)
             if ret != 0:
                 return ret, out, err
 
@@ -177,45 +179,46 @@ class Apt(Pms):
         os.chmod(release_path, 0o644)
 
         gpg_homedir = os.path.join(self.keys_path, '.gnupg')
-        ret_in, out_in, err_in = execute(
-            [
-                'gpg',
-                '--batch',
-                '--no-tty',
-                '--local-user',
-                'migasfree-repository',
-                '--homedir',
-                gpg_homedir,
-                '--clear-sign',
-                '--output',
-                'InRelease',
-                'Release',
-            ],
-            shell=False,
-            cwd=path,
-        )
-        if ret_in != 0:
-            return ret_in, out_in, err_in
-
-        ret_gpg, out_gpg, err_gpg = execute(
-            [
-                'gpg',
-                '--batch',
-                '--no-tty',
-                '--local-user',
-                'migasfree-repository',
-                '--homedir',
-                gpg_homedir,
-                '-abs',
-                '--output',
-                'Release.gpg',
-                'Release',
-            ],
-            shell=False,
-            cwd=path,
-        )
-        if ret_gpg != 0:
-            return ret_gpg, out_gpg, err_gpg
+        with self.timing('sign'):
+            ret_in, out_in, err_in = execute(
+                [
+                    'gpg',
+                    '--batch',
+                    '--no-tty',
+                    '--local-user',
+                    'migasfree-repository',
+                    '--homedir',
+                    gpg_homedir,
+                    '--clear-sign',
+                    '--output',
+                    'InRelease',
+                    'Release',
+                ],
+                shell=False,
+                cwd=path,
+            )
+            if ret_in != 0:
+                return ret_in, out_in, err_in
+
+            ret_gpg, out_gpg, err_gpg = execute(
+                [
+                    'gpg',
+                    '--batch',
+                    '--no-tty',
+                    '--local-user',
+                    'migasfree-repository',
+                    '--homedir',
+                    gpg_homedir,
+                    '-abs',
+                    '--output',
+                    'Release.gpg',
+                    'Release',
+                ],
+                shell=False,
+                cwd=path,
+            )
+            if ret_gpg != 0:
+                return ret_gpg, out_gpg, err_gpg
 
         return 0, '', ''
 
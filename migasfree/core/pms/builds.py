@@ -0,0 +1,193 @@
+# Copyright (c) 2026 Jose Antonio Chavarría <jachavar@gmail.com>
+# Copyright (c) 2026 Alberto Gacías <alberto@migasfree.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Registry of repository builds (create_repository_metadata tasks).
+
+Builds are kept in Redis (the broker, so pms workers stay decoupled from
+the database) as a capped list, newest first (migasfree:builds:recent).
+Each build records:
+  * its queue latency (from publication to start),
+  * the duration of its phases: symlink (packages), index (metadata),
+    sign and publish (move to the public repository),
+  * its outcome and the size of the generated metadata.
+"""
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+import redis
+
+from ...utils import get_setting
+
+logger = logging.getLogger('celery')
+
+RECENT_KEY = 'migasfree:builds:recent'
+MAX_BUILDS = 1000
+
+PHASES = ('symlink', 'index', 'sign', 'publish')
+
+OUTCOME_SUCCESS = 'success'
+OUTCOME_ERROR = 'error'  # the pms tool failed
+OUTCOME_FAILED = 'failed'  # the task raised an exception
+
+PERCENTILES = (50, 90, 99)
+
+
+def metadata_size(path):
+    """
+    Bytes of the regular files under path (package symlinks are not counted)
+    """
+    size = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            file_ = os.path.join(root, name)
+            if not os.path.islink(file_):
+                size += os.path.getsize(file_)
+
+    return size
+
+
+def percentile(values, percent):
+    """
+    Percentile of values (linear interpolation between closest ranks)
+    """
+    if not values:
+        return None
+
+    values = sorted(values)
+    rank = (len(values) - 1) * percent / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def summary(values):
+    return {
+        **{f'p{percent}': percentile(values, percent) for percent in PERCENTILES},
+        'max': max(values) if values else None,
+    }
+
+
+def connection():
+    return redis.from_url(get_setting('CELERY_BROKER_URL'))
+
+
+class BuildJob:
+    def __init__(self, deployment, task_id=None, queued_at=None, con=None):
+        self._con = con
+        self.start = time.time()
+        self.record = {
+            'id': task_id,
+            'deployment': deployment['id'],
+            'name': deployment['name'],
+            'project': deployment['project']['name'],
+            'pms': deployment['project']['pms'],
+            'queued_at': queued_at,
+            'started_at': self.start,
+            'queue_latency': max(self.start - queued_at, 0) if queued_at else None,
+            'phases': dict.fromkeys(PHASES, 0),
+        }
+
+    @property
+    def con(self):
+        if self._con is None:
+            self._con = connection()
+
+        return self._con
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record['phases'][name] += time.perf_counter() - start
+
+    def split(self, phase, name, seconds):
+        """
+        Accounts seconds of phase as another phase (e.g. signing inside indexing)
+        """
+        seconds = min(seconds, self.record['phases'][phase])
+        self.record['phases'][phase] -= seconds
+        self.record['phases'][name] += seconds
+
+    def finish(self, outcome, size=None, error=''):
+        finished_at = time.time()
+        self.record.update(
+            {
+                'finished_at': finished_at,
+                'duration': finished_at - self.start,
+                'outcome': outcome,
+                'size': size,
+                'error': error[-1000:] if error else '',
+            }
+        )
+
+        try:
+            pipe = self.con.pipeline()
+            pipe.lpush(RECENT_KEY, json.dumps(self.record))
+            pipe.ltrim(RECENT_KEY, 0, MAX_BUILDS - 1)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning('Build of deployment %s not registered: %s', self.record['deployment'], e)
+
+        return self.record
+
+
+def recent_builds(con, deployments=None, pms=None, limit=50):
+    """
+    Latest builds (newest first), optionally only of some deployments or of a pms
+    """
+    builds = []
+    for item in con.lrange(RECENT_KEY, 0, -1):
+        build = json.loads(item)
+        if (deployments is None or build['deployment'] in deployments) and (pms is None or build['pms'] == pms):
+            builds.append(build)
+            if len(builds) == limit:
+                break
+
+    return builds
+
+
+def build_stats(con):
+    """
+    Percentiles of duration, queue latency and phases of the recent builds, per pms
+    """
+    by_pms = {}
+    for item in con.lrange(RECENT_KEY, 0, -1):
+        build = json.loads(item)
+        by_pms.setdefault(build['pms'], []).append(build)
+
+    stats = {}
+    for pms, builds in sorted(by_pms.items()):
+        completed = [build for build in builds if build['outcome'] == OUTCOME_SUCCESS]
+        stats[pms] = {
+            'count': len(builds),
+            'errors': len([build for build in builds if build['outcome'] == OUTCOME_ERROR]),
+            'failures': len([build for build in builds if build['outcome'] == OUTCOME_FAILED]),
+            'duration': summary([build['duration'] for build in completed]),
+            'queue_latency': summary(
+                [build['queue_latency'] for build in builds if build['queue_latency'] is not None]
+            ),
+            'phases': {phase: summary([build['phases'][phase] for build in completed]) for phase in PHASES},
+        }
+
+    return stats
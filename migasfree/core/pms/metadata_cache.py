@@ -0,0 +1,143 @@
+# Copyright (c) 2026 Jose Antonio Chavarría <jachavar@gmail.com>
+# Copyright (c) 2026 Alberto Gacías <alberto@migasfree.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Content-addressed cache of package metadata, shared by all pms backends.
+
+Two levels are kept in Redis (the broker, so pms workers stay decoupled
+from the database):
+  * migasfree:pms:files:<real path> -> size, mtime and sha256 of the file,
+    so an unchanged file is not hashed again.
+  * migasfree:pms:metadata:<pms>:<sha256> -> metadata extracted from that
+    content, so the same package is inspected only once whatever its path
+    (stores, deployments, uploads).
+
+If Redis is not available, the cache simply misses.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+import redis
+
+from ...utils import get_setting
+
+logger = logging.getLogger('celery')
+
+CACHE_TTL = 60 * 60 * 24 * 30  # seconds
+CHUNK_SIZE = 1024 * 1024  # bytes
+
+
+def file_digest(path, chunk_size=CHUNK_SIZE):
+    """
+    sha256 of a file, read in chunks (constant memory)
+    """
+    hash_ = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hash_.update(chunk)
+
+    return hash_.hexdigest()
+
+
+class PackageMetadataCache:
+    def __init__(self, con=None):
+        self._con = con
+
+    @property
+    def con(self):
+        if self._con is None:
+            self._con = redis.from_url(get_setting('CELERY_BROKER_URL'))
+
+        return self._con
+
+    @staticmethod
+    def file_key(path):
+        return f'migasfree:pms:files:{path}'
+
+    @staticmethod
+    def metadata_key(pms_name, digest):
+        return f'migasfree:pms:metadata:{pms_name}:{digest}'
+
+    def _get(self, key):
+        try:
+            value = self.con.get(key)
+            if value is not None:
+                self.con.expire(key, CACHE_TTL)
+        except redis.RedisError as e:
+            logger.debug('Package metadata cache not available: %s', e)
+            return None
+
+        return json.loads(value) if value is not None else None
+
+    def _set(self, key, value):
+        try:
+            self.con.set(key, json.dumps(value), ex=CACHE_TTL)
+        except redis.RedisError as e:
+            logger.debug('Package metadata cache not available: %s', e)
+
+    def digest(self, path):
+        """
+        sha256 of a package (symlinks are resolved), only computed
+        if its size or modification time have changed
+        """
+        real_path = os.path.realpath(path)
+        stat = os.stat(real_path)
+        key = self.file_key(real_path)
+
+        cached = self._get(key)
+        if cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime_ns:
+            return cached['digest']
+
+        digest = file_digest(real_path)
+        self._set(key, {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'digest': digest})
+
+        return digest
+
+    def metadata(self, pms, path):
+        """
+        Package metadata of path, extracted by pms only if its content is unknown
+        """
+        return self.metadata_many(pms, [path])[0]
+
+    def metadata_many(self, pms, paths):
+        """
+        Package metadata of several paths (in the same order). Unknown
+        contents are extracted together (pms.packages_metadata), so tools
+        that accept several packages are invoked once per batch
+        """
+        results = [None] * len(paths)
+        missing = []
+        for i, path in enumerate(paths):
+            try:
+                key = self.metadata_key(pms.name, self.digest(path))
+            except OSError:
+                key = None
+
+            results[i] = self._get(key) if key else None
+            if results[i] is None:
+                missing.append((i, path, key))
+
+        if missing:
+            extracted = pms.packages_metadata([path for _i, path, _key in missing])
+            for (i, _path, key), metadata in zip(missing, extracted, strict=True):
+                results[i] = metadata
+                if key and metadata and metadata.get('name'):
+                    self._set(key, metadata)
+
+        return results
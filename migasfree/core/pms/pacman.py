@@ -16,8 +16,9 @@
 
 import os
 
-from ...utils import execute, get_setting
+from ...utils import get_setting
 from .pms import Pms
+from .runner import batched, execute
 
 
 class Pacman(Pms):
@@ -66,7 +67,7 @@ class Pacman(Pms):
 
         cmd = ['repo-add', '--sign', '--key', 'migasfree-repository', f'./{db_name}.db.tar.gz', *files]
 
-        return execute(cmd, shell=False, cwd=component_dir, env=env)
+        return execute(cmd, shell=False, cwd=component_dir, env=env, timeout=None)
 
     def package_info(self, package):
         """
@@ -85,6 +86,32 @@ class Pacman(Pms):
         output = f'## Info\n~~~\n{out1}~~~\n\n## Changelog\n~~~\n{out2}~~~\n\n## Files\n~~~\n{out3}~~~\n'
         return output
 
+    @staticmethod
+    def _parse_info(output):
+        """
+        list _parse_info(string output)
+        metadata of each package in the output of pacman --query --info
+        """
+
+        result = []
+        for block in output.split('\n\n'):
+            pkg_info = {}
+            for item in block.splitlines():
+                if item.startswith(('Name', 'Version', 'Architecture')):
+                    key, value = item.strip().split(':', 1)
+                    pkg_info[key.strip()] = value.strip()
+
+            if pkg_info:
+                result.append(
+                    {
+                        'name': pkg_info['Name'],
+                        'version': pkg_info['Version'],
+                        'architecture': pkg_info['Architecture'],
+                    }
+                )
+
+        return result
+
     def package_metadata(self, package):
         """
         dict package_metadata(string package)
@@ -93,20 +120,26 @@ class Pacman(Pms):
         cmd = [self.name, '--query', '--info', '--file', package]
         ret, output, _error = execute(cmd, shell=False)
         if ret == 0:
-            output = output.splitlines()
-            pkg_info = {}
-            for item in output:
-                if item.startswith(('Name', 'Version', 'Architecture')):
-                    key, value = item.strip().split(':', 1)
-                    pkg_info[key.strip()] = value.strip()
+            return self._parse_info(output)[0]
+
+        return {'name': None, 'version': None, 'architecture': None}
+
+    def packages_metadata(self, packages):
+        """
+        list packages_metadata(list packages)
+        A single pacman query per batch (package by package if any of them fails)
+        """
+
+        result = []
+        for batch in batched(packages):
+            ret, output, _error = execute([self.name, '--query', '--info', '--file', *batch], shell=False)
+            metadata = self._parse_info(output) if ret == 0 else []
+            if len(metadata) != len(batch):
+                metadata = [self.package_metadata(package) for package in batch]
 
-            name = pkg_info['Name']
-            version = pkg_info['Version']
-            architecture = pkg_info['Architecture']
-        else:
-            name, version, architecture = [None, None, None]
+            result.extend(metadata)
 
-        return {'name': name, 'version': version, 'architecture': architecture}
+        return result
 
     def source_template(self, deploy):
         """
@@ -14,6 +14,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import time
+from contextlib import contextmanager
+
 from ...utils import get_setting
 
 
@@ -30,10 +33,13 @@ class Pms:
     components = 'PKGS'
     extensions = []
     architectures = []
+    incremental = False  # create_repository can reuse the previous repository
+    indexes = ()  # repository metadata files also published gzipped
 
     def __init__(self):
         self.keys_path = get_setting('MIGASFREE_KEYS_DIR')
         self.media_url = get_setting('MEDIA_URL')
+        self.timings = {}  # seconds per phase of create_repository (e.g. sign)
 
     def __str__(self):
         """
@@ -42,6 +48,17 @@ class Pms:
 
         return self.name
 
+    @contextmanager
+    def timing(self, phase):
+        """
+        Accounts the time spent in a phase of create_repository
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[phase] = self.timings.get(phase, 0) + time.perf_counter() - start
+
     def create_repository(self, path, arch):
         """
         (int, string, string) create_repository(
@@ -65,6 +82,32 @@ class Pms:
 
         raise NotImplementedError
 
+    def packages_metadata(self, packages):
+        """
+        list packages_metadata(list packages)
+        package_metadata of several packages (in the same order), overridden
+        by the pms whose tool can query several packages per invocation
+        """
+
+        return [self.package_metadata(package) for package in packages]
+
+    def cached_package_metadata(self, package, cache=None):
+        """
+        dict cached_package_metadata(string package)
+        package_metadata, reused while the package content does not change
+        """
+        from .metadata_cache import PackageMetadataCache
+
+        return (cache or PackageMetadataCache()).metadata(self, package)
+
+    def cached_packages_metadata(self, packages, cache=None):
+        """
+        list cached_packages_metadata(list packages)
+        """
+        from .metadata_cache import PackageMetadataCache
+
+        return (cache or PackageMetadataCache()).metadata_many(self, packages)
+
     def source_template(self, deploy):
         """
         string source_template(Deployment deploy)
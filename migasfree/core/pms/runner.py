@@ -0,0 +1,206 @@
+# Copyright (c) 2026 Jose Antonio Chavarría <jachavar@gmail.com>
+# Copyright (c) 2026 Alberto Gacías <alberto@migasfree.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Runner of the external tools used by the pms backends (rpm, dpkg-deb,
+pacman, tar, createrepo, ...).
+
+  * Commands are started with posix_spawn, so a worker with a large
+    resident memory does not copy its address space for each of them
+    (commands that need another working directory use subprocess).
+  * Every command has a timeout: it is killed when exceeded.
+  * The latency of the commands is accumulated per tool in Redis
+    (migasfree:pms:commands, see command_metrics).
+
+Tools that accept several packages per invocation are queried in batches
+(see Pms.packages_metadata).
+"""
+
+import logging
+import os
+import selectors
+import signal
+import subprocess
+import time
+from itertools import islice
+
+import redis
+
+from ...utils import execute as shell_execute
+from ...utils import get_setting
+
+logger = logging.getLogger('celery')
+
+COMMAND_TIMEOUT = 120  # seconds
+BATCH_SIZE = 50  # packages per invocation
+METRICS_KEY = 'migasfree:pms:commands'
+READ_SIZE = 64 * 1024  # bytes
+
+
+def batched(items, size=BATCH_SIZE):
+    """
+    Splits items in lists of (at most) size elements
+    """
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class CommandRunner:
+    def __init__(self, con=None):
+        self._con = con
+
+    @property
+    def con(self):
+        if self._con is None:
+            self._con = redis.from_url(get_setting('CELERY_BROKER_URL'))
+
+        return self._con
+
+    def run(self, cmd, cwd=None, env=None, timeout=COMMAND_TIMEOUT):
+        """
+        (int, string, string) run(list cmd, string cwd=None, dict env=None, int timeout)
+        A timed out command is killed and returns -SIGKILL
+        """
+        start = time.perf_counter()
+        if cwd is None:
+            ret, out, err, timed_out = self._spawn(cmd, env, timeout)
+        else:
+            ret, out, err, timed_out = self._popen(cmd, cwd, env, timeout)
+        elapsed = time.perf_counter() - start
+
+        self.record(cmd[0], elapsed, ret, timed_out)
+
+        out = out.decode('utf-8', errors='replace')
+        err = err.decode('utf-8', errors='replace')
+        if timed_out:
+            logger.warning('Command %s killed after %s seconds', cmd[0], timeout)
+            err = f'{err}\nCommand killed after {timeout} seconds'.lstrip()
+
+        return ret, out, err
+
+    @staticmethod
+    def _spawn(cmd, env, timeout):
+        out_read, out_write = os.pipe()
+        err_read, err_write = os.pipe()
+        try:
+            pid = os.posix_spawnp(
+                cmd[0],
+                cmd,
+                os.environ if env is None else env,
+                file_actions=[
+                    (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0),
+                    (os.POSIX_SPAWN_DUP2, out_write, 1),
+                    (os.POSIX_SPAWN_DUP2, err_write, 2),
+                ],
+            )
+        except OSError:
+            os.close(out_read)
+            os.close(err_read)
+            raise
+        finally:
+            os.close(out_write)
+            os.close(err_write)
+
+        output = {out_read: bytearray(), err_read: bytearray()}
+        deadline = None if timeout is None else time.monotonic() + timeout
+        timed_out = False
+
+        with selectors.DefaultSelector() as selector:
+            for fd in output:
+                selector.register(fd, selectors.EVENT_READ)
+
+            while selector.get_map():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    os.kill(pid, signal.SIGKILL)
+                    timed_out = True
+                    break
+
+                for key, _events in selector.select(remaining):
+                    chunk = os.read(key.fd, READ_SIZE)
+                    if chunk:
+                        output[key.fd] += chunk
+                    else:
+                        selector.unregister(key.fd)
+
+        os.close(out_read)
+        os.close(err_read)
+        _pid, status = os.waitpid(pid, 0)
+
+        return os.waitstatus_to_exitcode(status), bytes(output[out_read]), bytes(output[err_read]), timed_out
+
+    @staticmethod
+    def _popen(cmd, cwd, env, timeout):
+        process = subprocess.Popen(
+            cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd, env=env
+        )
+        try:
+            out, err = process.communicate(timeout=timeout)
+            timed_out = False
+        except subprocess.TimeoutExpired:
+            process.kill()
+            out, err = process.communicate()
+            timed_out = True
+
+        return process.returncode, out, err, timed_out
+
+    def record(self, command, elapsed, ret, timed_out=False):
+        tool = os.path.basename(command)
+        try:
+            pipe = self.con.pipeline(transaction=False)
+            pipe.hincrby(METRICS_KEY, f'{tool}:count', 1)
+            pipe.hincrbyfloat(METRICS_KEY, f'{tool}:seconds', elapsed)
+            if ret != 0:
+                pipe.hincrby(METRICS_KEY, f'{tool}:errors', 1)
+            if timed_out:
+                pipe.hincrby(METRICS_KEY, f'{tool}:timeouts', 1)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.debug('Command metrics not available: %s', e)
+
+    def metrics(self):
+        """
+        Accumulated count, seconds, average, errors and timeouts per tool
+        """
+        metrics = {}
+        for field, value in self.con.hgetall(METRICS_KEY).items():
+            tool, name = field.decode().rsplit(':', 1)
+            metrics.setdefault(tool, {'count': 0, 'seconds': 0.0, 'errors': 0, 'timeouts': 0})
+            metrics[tool][name] = float(value) if name == 'seconds' else int(value)
+
+        for item in metrics.values():
+            item['average'] = item['seconds'] / item['count'] if item['count'] else 0
+
+        return metrics
+
+
+runner = CommandRunner()
+
+
+def execute(cmd, shell=False, cwd=None, env=None, timeout=COMMAND_TIMEOUT):
+    """
+    (int, string, string) execute(list cmd, bool shell=False, string cwd=None, dict env=None, int timeout)
+    Same contract as migasfree.utils.execute (shell commands are delegated to it)
+    """
+    if shell:
+        return shell_execute(cmd, shell=True, cwd=cwd, env=env)
+
+    return runner.run(cmd, cwd=cwd, env=env, timeout=timeout)
+
+
+def command_metrics():
+    return runner.metrics()
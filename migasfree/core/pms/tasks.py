@@ -14,20 +14,25 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import contextlib
+import gzip
 import logging
 import os
 import shutil
+import time
 
 import redis
 from celery import Celery
-from celery.signals import task_postrun
+from celery.signals import before_task_publish, task_postrun
 
 from ...utils import get_setting
 from ..decorators import unique_task
 from . import get_pms
+from .builds import OUTCOME_ERROR, OUTCOME_FAILED, OUTCOME_SUCCESS, BuildJob, metadata_size
 
 logger = logging.getLogger('celery')
 
+MIGASFREE_CACHE_DIR = get_setting('MIGASFREE_CACHE_DIR')
 MIGASFREE_FQDN = get_setting('MIGASFREE_FQDN')
 MIGASFREE_PUBLIC_DIR = get_setting('MIGASFREE_PUBLIC_DIR')
 MIGASFREE_STORE_TRAILING_PATH = get_setting('MIGASFREE_STORE_TRAILING_PATH')
@@ -35,10 +40,16 @@ MIGASFREE_TMP_TRAILING_PATH = get_setting('MIGASFREE_TMP_TRAILING_PATH')
 
 CELERY_BROKER_URL = get_setting('CELERY_BROKER_URL')
 
+REPOSITORY_LOCK_TIMEOUT = 7200  # seconds, the time limit of a build
+
 
 app = Celery('migasfree', broker=CELERY_BROKER_URL, backend=CELERY_BROKER_URL, fixups=[])
 
 
+def repository_lock_key(deployment_id):
+    return f'migasfree:repos:{deployment_id}:lock'
+
+
 def symlink(source_path, target_path, name):
     """
     SAMPLE:
@@ -52,9 +63,28 @@ def symlink(source_path, target_path, name):
         os.symlink(os.path.join(target_path, name), target)
 
 
+def precompress_indexes(path, names):
+    """
+    Writes a gzipped variant next to each repository metadata index,
+    so the web server sends it as is (gzip_static) instead of
+    compressing it on every request
+    """
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            if name in names:
+                index = os.path.join(root, name)
+                with open(index, 'rb') as f_in, gzip.open(f'{index}.gz', 'wb', compresslevel=9) as f_out:
+                    shutil.copyfileobj(f_in, f_out)
+
+
 @app.task(time_limit=120, soft_time_limit=90)
 def package_metadata(pms_name, package):
-    return get_pms(pms_name).package_metadata(package)
+    return get_pms(pms_name).cached_package_metadata(package)
+
+
+@app.task(time_limit=600, soft_time_limit=570)
+def packages_metadata(pms_name, packages):
+    return get_pms(pms_name).cached_packages_metadata(packages)
 
 
 @app.task(time_limit=120, soft_time_limit=90)
@@ -70,6 +100,7 @@ def create_repository_metadata(self, payload):
     deployment_id = deployment['id']
 
     pms = get_pms(project['pms'])
+    build = BuildJob(deployment, task_id=self.request.id, queued_at=self.request.get('queued_at'))
 
     # ADD INFO IN REDIS
     con = redis.from_url(CELERY_BROKER_URL)
@@ -88,32 +119,70 @@ def create_repository_metadata(self, payload):
 
     repository_path = os.path.join(MIGASFREE_PUBLIC_DIR, project['slug'], pms.relative_path, deployment['slug'])
 
-    pkg_tmp_path = os.path.join(tmp_path, pms.components)
-    if not os.path.exists(pkg_tmp_path):
-        os.makedirs(pkg_tmp_path)
-
-    # Symlinks for packages
-    for package in deployment['available_packages']:
-        symlink(pkg_tmp_path, os.path.join(stores_path, package['store']['name']), package['fullname'])
-
-    # Metadata in TMP
-    logger.info(
-        "Creating repository metadata for deployment: '%s' in project: '%s'", deployment['name'], project['name']
-    )
+    # builds of a deployment are serialized: they share the temporary path, and
+    # an incremental build relies on the previous repository being the last one
+    # published (a concurrent build could have replaced packages not in its changes)
+    lock = con.lock(repository_lock_key(deployment_id), timeout=REPOSITORY_LOCK_TIMEOUT)
+    try:
+        lock.acquire()
+
+        with build.phase('symlink'):
+            pkg_tmp_path = os.path.join(tmp_path, pms.components)
+            if not os.path.exists(pkg_tmp_path):
+                os.makedirs(pkg_tmp_path)
+
+            # Symlinks for packages
+            for package in deployment['available_packages']:
+                symlink(pkg_tmp_path, os.path.join(stores_path, package['store']['name']), package['fullname'])
+
+        # Metadata in TMP
+        logger.info(
+            "Creating repository metadata for deployment: '%s' in project: '%s'", deployment['name'], project['name']
+        )
+
+        options = {}
+        if pms.incremental:
+            # previous repository and changes (if known) avoid reading every package again
+            options = {'previous_path': repository_path, 'changes': deployment.get('changes')}
+            if MIGASFREE_CACHE_DIR:
+                options['cache_path'] = os.path.join(MIGASFREE_CACHE_DIR, project['slug'], pms.name)
+                os.makedirs(options['cache_path'], exist_ok=True)
+
+        with build.phase('index'):
+            ret, output, error = pms.create_repository(path=tmp_path, arch=project['architecture'], **options)
+            if ret == 0 and pms.indexes:
+                precompress_indexes(tmp_path, pms.indexes)
+        build.split('index', 'sign', pms.timings.get('sign', 0))
+
+        size = metadata_size(tmp_path)
+
+        # Move from TMP to REPOSITORY
+        with build.phase('publish'):
+            shutil.rmtree(repository_path, ignore_errors=True)
+            shutil.copytree(tmp_path, repository_path, symlinks=True)
+            shutil.rmtree(tmp_path)
+    except Exception as e:
+        build.finish(OUTCOME_FAILED, error=str(e))
+        raise
+    finally:
+        with contextlib.suppress(redis.exceptions.LockError):
+            lock.release()
+
+        # REMOVE INFO IN REDIS
+        con.hdel(f'migasfree:repos:{deployment_id}', '*')
+        con.srem('migasfree:watch:repos', deployment_id)
+        con.close()
+
+    build.finish(OUTCOME_SUCCESS if ret == 0 else OUTCOME_ERROR, size=size, error='' if ret == 0 else error)
 
-    ret, output, error = pms.create_repository(path=tmp_path, arch=project['architecture'])
-
-    # Move from TMP to REPOSITORY
-    shutil.rmtree(repository_path, ignore_errors=True)
-    shutil.copytree(tmp_path, repository_path, symlinks=True)
-    shutil.rmtree(tmp_path)
+    return ret, output if ret == 0 else error, deployment['name'], project['name']
 
-    # REMOVE INFO IN REDIS
-    con.hdel(f'migasfree:repos:{deployment_id}', '*')
-    con.srem('migasfree:watch:repos', deployment_id)
-    con.close()
 
-    return ret, output if ret == 0 else error, deployment['name'], project['name']
+@before_task_publish.connect(sender=create_repository_metadata.name)
+def stamp_queued_at(headers=None, **kwargs):
+    # the queue latency of a build is measured from its publication
+    if headers is not None:
+        headers['queued_at'] = time.time()
 
 
 @app.task(time_limit=300, soft_time_limit=270)
@@ -14,12 +14,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-import hashlib
 import json
 import os
 import tarfile
 
 from ...utils import get_setting
+from .metadata_cache import PackageMetadataCache
 from .pms import Pms
 
 
@@ -37,6 +37,7 @@ class Wpt(Pms):
         self.mimetype = ['application/gzip', 'application/x-gzip']
         self.extensions = ['tar.gz']
         self.architectures = ['x64']
+        self.indexes = ['packages.json']
 
     def create_repository(self, path, arch):
         """
@@ -46,15 +47,14 @@ class Wpt(Pms):
         """
 
         repository_info = {}
+        cache = PackageMetadataCache()
 
         for package_file in os.listdir(os.path.join(path, self.components)):
             package_path = os.path.join(path, self.components, package_file)
 
             if os.path.isfile(package_path) and tarfile.is_tarfile(package_path):
-                with open(package_path, 'rb') as f:
-                    hash_ = hashlib.sha256(f.read()).hexdigest()
-
-                metadata = self.package_metadata(package_path)
+                hash_ = cache.digest(package_path)
+                metadata = self.cached_package_metadata(package_path, cache)
 
                 if metadata['name'] not in repository_info:
                     repository_info[metadata['name']] = {}
@@ -76,23 +76,24 @@ class Wpt(Pms):
         try:
             import subprocess
 
-            subprocess.run(
-                [
-                    'gpg',
-                    '--no-tty',
-                    '--local-user',
-                    'migasfree-repository',
-                    '--homedir',
-                    gpg_home,
-                    '--detach-sign',
-                    '--armor',
-                    '--output',
-                    sig_file,
-                    packages_file,
-                ],
-                check=True,
-                capture_output=True,
-            )
+            with self.timing('sign'):
+                subprocess.run(
+                    [
+                        'gpg',
+                        '--no-tty',
+                        '--local-user',
+                        'migasfree-repository',
+                        '--homedir',
+                        gpg_home,
+                        '--detach-sign',
+                        '--armor',
+                        '--output',
+                        sig_file,
+                        packages_file,
+                    ],
+                    check=True,
+                    capture_output=True,
+                )
         except subprocess.CalledProcessError as e:
             return 1, repository_info, f'Failed to sign repository: {e.stderr.decode()}'
         except FileNotFoundError:
@@ -15,8 +15,9 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 
-from ...utils import execute, get_setting
+from ...utils import get_setting
 from .pms import Pms
+from .runner import batched, execute
 
 
 class Yum(Pms):
@@ -32,12 +33,22 @@ class Yum(Pms):
         self.mimetype = ['application/x-rpm', 'application/x-redhat-package-manager']
         self.extensions = ['rpm']
         self.architectures = ['aarch64', 'i386', 'i686', 'noarch', 'x86_64', '(none)']
+        self.incremental = True
+        self.indexes = ['repomd.xml']
 
-    def create_repository(self, path, arch):
+    def create_repository(self, path, arch, previous_path=None, cache_path=None, changes=None):
         """
         (int, string, string) create_repository(
-            string path, string arch
+            string path, string arch,
+            string previous_path, string cache_path, dict changes
         )
+
+        If previous_path contains repodata, it is reused (createrepo --update)
+        and only new or modified packages are read.
+        When changes ({'added': [...], 'removed': [...]}) are known and no added
+        package replaces a previous one, unchanged packages are not even stat'ed
+        (builds of a deployment are serialized, so previous_path is the result
+        of the last build).
         """
         import os
         import shutil
@@ -48,17 +59,44 @@ class Yum(Pms):
         shutil.rmtree(repodata_dir, ignore_errors=True)
         shutil.rmtree(checksum_dir, ignore_errors=True)
 
-        ret_create, out_create, err_create = execute(['createrepo', '--cachedir', 'checksum', path], shell=False)
+        # a persistent cache survives the rebuilt tree
+        cmd = ['createrepo', '--cachedir', os.path.join(cache_path, 'checksum') if cache_path else 'checksum']
+        if previous_path and os.path.exists(os.path.join(previous_path, 'repodata', 'repomd.xml')):
+            cmd += ['--update', '--update-md-path', previous_path]
+            if changes is not None and not self._replaced_packages(previous_path, changes):
+                cmd.append('--skip-stat')
+
+        ret_create, out_create, err_create = execute([*cmd, path], shell=False, timeout=None)
         if ret_create != 0:
             return ret_create, out_create, err_create
 
         gpg_homedir = os.path.join(self.keys_path, '.gnupg')
         repomd_xml = os.path.join(repodata_dir, 'repomd.xml')
 
-        return execute(
-            ['gpg', '-u', 'migasfree-repository', '--homedir', gpg_homedir, '--detach-sign', '--armor', repomd_xml],
-            shell=False,
-        )
+        with self.timing('sign'):
+            return execute(
+                ['gpg', '-u', 'migasfree-repository', '--homedir', gpg_homedir, '--detach-sign', '--armor', repomd_xml],
+                shell=False,
+            )
+
+    def _replaced_packages(self, previous_path, changes):
+        """
+        set _replaced_packages(string previous_path, dict changes)
+        added packages that were already in the previous repository
+        (their content may have changed under the same name)
+        """
+        import os
+
+        added = set(changes.get('added', []))
+        if not added:
+            return set()
+
+        try:
+            previous = set(os.listdir(os.path.join(previous_path, self.components)))
+        except OSError:
+            previous = set()
+
+        return added & previous
 
     def package_info(self, package):
         """
@@ -100,6 +138,27 @@ class Yum(Pms):
 
         return {'name': name, 'version': version, 'architecture': architecture}
 
+    def packages_metadata(self, packages):
+        """
+        list packages_metadata(list packages)
+        A single rpm query per batch (package by package if any of them fails)
+        """
+
+        result = []
+        for batch in batched(packages):
+            cmd = ['rpm', '-qp', '--queryformat', '%{NAME}___%{VERSION}-%{RELEASE}___%{ARCH}\\n', *batch]
+            ret, output, _error = execute(cmd, shell=False)
+            lines = output.splitlines()
+            if ret != 0 or len(lines) != len(batch):
+                result.extend(self.package_metadata(package) for package in batch)
+                continue
+
+            for line in lines:
+                name, version, architecture = line.split('___', 2)
+                result.append({'name': name, 'version': version, 'architecture': architecture})
+
+        return result
+
     def source_template(self, deploy):
         """
         string source_template(Deployment deploy)
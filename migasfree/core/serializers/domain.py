@@ -18,10 +18,12 @@
 Domain and Scope serializers.
 """
 
+from django.db import models
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from ..models import Domain, Scope
+from ..services.domains import DomainReadModel
 from .base import AttributeRepresentationMixin
 from .property import AttributeInfoSerializer
 
@@ -38,6 +40,18 @@ class DomainListSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'comment')
 
 
+class DomainReadListSerializer(serializers.ListSerializer):
+    """
+    Loads admins, attribute sets and tags of all the domains of the page at once
+    (see DomainReadModel)
+    """
+
+    def to_representation(self, data):
+        items = DomainReadModel.load(data.all() if isinstance(data, models.manager.BaseManager) else data)
+
+        return super().to_representation(items)
+
+
 class DomainSerializer(serializers.ModelSerializer):
     included_attributes = AttributeInfoSerializer(many=True, read_only=True)
     excluded_attributes = AttributeInfoSerializer(many=True, read_only=True)
@@ -51,6 +65,7 @@ class DomainSerializer(serializers.ModelSerializer):
     class Meta:
         model = Domain
         fields = '__all__'
+        list_serializer_class = DomainReadListSerializer
 
 
 class DomainWriteSerializer(serializers.ModelSerializer):
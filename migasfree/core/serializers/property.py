@@ -18,6 +18,8 @@
 Property and Attribute serializers.
 """
 
+from django.db import models
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from ..models import (
@@ -53,10 +55,33 @@ class PropertySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class TotalComputersListSerializer(serializers.ListSerializer):
+    """
+    Counts the computers of all the attributes of the page at once
+    (see Attribute.total_computers_by_attribute)
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+
+        request = self.context.get('request')
+        totals = Attribute.total_computers_by_attribute(
+            [item.id for item in items], user=request.user if request else None
+        )
+        self.context.setdefault('total_computers', {}).update(totals)
+
+        return super().to_representation(items)
+
+
 class AttributeSerializer(serializers.ModelSerializer):
     property_att = PropertyInfoSerializer(many=False, read_only=True)
 
+    @extend_schema_field(serializers.IntegerField)
     def get_total_computers(self, obj):
+        totals = self.context.get('total_computers', {})
+        if obj.id in totals:
+            return totals[obj.id]
+
         if self.context.get('request'):
             return obj.total_computers(user=self.context['request'].user)
 
@@ -147,9 +172,11 @@ class SingularityWriteSerializer(AttributeRepresentationMixin, serializers.Model
 
 class ServerAttributeSerializer(AttributeSerializer):
     property_att = ServerPropertyInfoSerializer(many=False, read_only=True)
+    total_computers = serializers.SerializerMethodField()
 
     class Meta:
         model = ServerAttribute
+        list_serializer_class = TotalComputersListSerializer
         fields = (
             'id',
             'property_att',
@@ -176,9 +203,11 @@ class ServerAttributeWriteSerializer(serializers.ModelSerializer):
 
 class ClientAttributeSerializer(AttributeSerializer):
     property_att = ServerPropertyInfoSerializer(many=False, read_only=True)
+    total_computers = serializers.SerializerMethodField()
 
     class Meta:
         model = ClientAttribute
+        list_serializer_class = TotalComputersListSerializer
         fields = (
             'id',
             'property_att',
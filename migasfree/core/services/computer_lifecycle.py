@@ -0,0 +1,167 @@
+# Copyright (c) 2026 Jose Antonio Chavarría <jachavar@gmail.com>
+# Copyright (c) 2026 Alberto Gacías <alberto@migasfree.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Lifecycle operations (status, project and software inventory) over many
+computers at once.
+
+Changes are applied with set-based UPDATEs and DELETEs in one transaction,
+instead of saving each computer, and reproduce what the Computer signals
+do per computer: a StatusLog for every status change, a Migration for every
+project change and, for the statuses that release a computer (available,
+unsubscribed), the removal of its tags and of the assignments of its CID
+attribute.
+"""
+
+from django.db import transaction
+from django.db.models import F
+from django_redis import get_redis_connection
+
+from .sync_plan import plan_key
+
+RELEASE_STATUS = ('available', 'unsubscribed')
+
+# assignments of the CID attribute removed when a computer is released
+CID_RELATIONS = (
+    'logical_set',
+    'faultdefinition_included',
+    'faultdefinition_excluded',
+    'deployment_included',
+    'deployment_excluded',
+    'attributeset_included',
+    'attributeset_excluded',
+    'scheduledelay_set',
+)
+
+
+class ComputerLifecycleService:
+    @staticmethod
+    def change_status(computers, status):
+        """
+        Changes the status of the computers (queryset)
+        :returns: number of computers whose status has changed
+        """
+        from ...client.models import Computer, StatusLog
+
+        if status not in dict(Computer.STATUS_CHOICES):
+            raise ValueError(status)
+
+        ids = list(computers.order_by().values_list('id', flat=True))
+
+        with transaction.atomic():
+            changed = list(
+                Computer.objects.select_for_update()
+                .filter(id__in=ids)
+                .exclude(status=status)
+                .values_list('id', flat=True)
+            )
+
+            Computer.objects.filter(id__in=changed).update(status=status)
+            StatusLog.close_previous(
+                StatusLog.objects.bulk_create(
+                    StatusLog(computer_id=computer_id, status=status) for computer_id in changed
+                )
+            )
+
+            if status in RELEASE_STATUS:
+                ComputerLifecycleService.release(ids)
+
+        return len(changed)
+
+    @staticmethod
+    def release(computer_ids):
+        """
+        Removes the tags and the assignments (logical devices, fault
+        definitions, deployments, attribute sets and schedule delays) of
+        the CID attributes of the computers
+        """
+        from ...client.models import Computer
+        from ..models import Attribute, Deployment
+
+        if not computer_ids:
+            return
+
+        Computer.tags.through.objects.filter(computer_id__in=computer_ids).delete()
+
+        cid_attributes = Attribute.objects.filter(
+            property_att__prefix='CID', value__in=[str(computer_id) for computer_id in computer_ids]
+        ).values_list('id', flat=True)
+
+        deployments = set()
+        for accessor in CID_RELATIONS:
+            relation = getattr(Attribute, accessor)
+            rows = relation.through.objects.filter(**{f'{relation.field.m2m_reverse_field_name()}__in': cid_attributes})
+            if relation.field.model is Deployment:
+                deployments.update(rows.values_list(relation.field.m2m_field_name(), flat=True))
+
+            rows.delete()
+
+        for deployment in Deployment.objects.filter(id__in=deployments):
+            deployment.update_assigned_computers()
+
+        con = get_redis_connection()
+        con.delete(*[plan_key(computer_id) for computer_id in computer_ids])
+
+    @staticmethod
+    def change_project(computers, project):
+        """
+        Moves the computers (queryset) to project: their installed packages
+        are closed in the package history
+        :returns: number of computers whose project has changed
+        """
+        from ...client.models import Computer, Migration, PackageHistory
+
+        ids = list(computers.order_by().values_list('id', flat=True))
+
+        with transaction.atomic():
+            changed = list(
+                Computer.objects.select_for_update()
+                .filter(id__in=ids)
+                .exclude(project=project)
+                .values_list('id', flat=True)
+            )
+
+            PackageHistory.objects.close(changed)
+            Computer.objects.filter(id__in=changed).update(project=project)
+            Migration.close_previous(
+                Migration.objects.bulk_create(
+                    Migration(computer_id=computer_id, project=project) for computer_id in changed
+                )
+            )
+
+        return len(changed)
+
+    @staticmethod
+    def reset_software_inventory(computers):
+        """
+        Deletes the installed packages (of their current project) of the
+        computers (queryset)
+        :returns: number of deleted packages
+        """
+        from ...client.models import PackageHistory
+        from ...client.tasks import inventory_digest_key
+
+        ids = list(computers.order_by().values_list('id', flat=True))
+        deleted, _ = PackageHistory.objects.filter(
+            computer_id__in=ids, uninstall_date__isnull=True, package__project=F('computer__project')
+        ).delete()
+
+        # the next inventory sent by the computers must be processed
+        if ids:
+            con = get_redis_connection()
+            con.delete(*[inventory_digest_key(computer_id) for computer_id in ids])
+
+        return deleted
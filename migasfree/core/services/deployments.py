@@ -16,11 +16,23 @@
 
 import datetime
 
+from django.db.models import Case, DateField, F, Func, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest, Least
 from django.utils import timezone
 
 from ...utils import time_horizon
 
 
+class DaysBetween(Func):
+    """
+    Days from the second date to the first one
+    """
+
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = IntegerField()
+
+
 class DeploymentTimelineService:
     @staticmethod
     def get_percent(begin_date, end_date):
@@ -41,25 +53,63 @@ class DeploymentTimelineService:
 
         return int(percent)
 
+    @staticmethod
+    def schedule_dates(start_date, delays):
+        """
+        Begin and end dates of a schedule (delays) for a deployment
+        starting on start_date: (None, None) without delays
+        """
+        delays = sorted(delays, key=lambda x: x.delay)
+        if not delays:
+            return None, None
+
+        return (
+            time_horizon(start_date, delays[0].delay),
+            time_horizon(start_date, delays[-1].delay + delays[-1].duration),
+        )
+
     @staticmethod
     def schedule_timeline(deployment):
-        if deployment.schedule is None:
+        if deployment.schedule_id is None:
             return None
 
-        delays = sorted(deployment.schedule.delays.all(), key=lambda x: x.delay)
+        begin_date, end_date = deployment.schedule_begin_date, deployment.schedule_end_date
+        if begin_date is None:
+            # not stored yet (delays added after this instance was loaded)
+            begin_date, end_date = DeploymentTimelineService.schedule_dates(
+                deployment.start_date, deployment.schedule.delays.all()
+            )
 
-        if not delays:
+        if begin_date is None:
             return None
 
-        begin_date = time_horizon(deployment.start_date, delays[0].delay)
-        end_date = time_horizon(deployment.start_date, delays[-1].delay + delays[-1].duration)
-
         return {
             'begin_date': str(begin_date),
             'end_date': str(end_date),
             'percent': DeploymentTimelineService.get_percent(begin_date, end_date),
         }
 
+    @staticmethod
+    def percent_expression(date=None):
+        """
+        SQL expression of the percent of the schedule timeline (as
+        get_percent) at date (today by default), from the stored dates.
+        Deployments without schedule timeline are at 100%
+        """
+        date = date or timezone.localdate()
+
+        total = DaysBetween(F('schedule_end_date'), F('schedule_begin_date'))
+        progress = DaysBetween(Value(date, output_field=DateField()), F('schedule_begin_date'))
+
+        return Case(
+            When(
+                Q(schedule_begin_date__isnull=True) | Q(schedule_end_date__lte=F('schedule_begin_date')),
+                then=Value(100),
+            ),
+            default=Least(Greatest(progress * 100 / total, Value(0)), Value(100)),
+            output_field=IntegerField(),
+        )
+
     @staticmethod
     def timeline(deployment):
         from django.utils.translation import gettext as _
@@ -0,0 +1,114 @@
+# Copyright (c) 2026 Jose Antonio Chavarría <jachavar@gmail.com>
+# Copyright (c) 2026 Alberto Gacías <alberto@migasfree.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compiled manifest of logical devices by project.
+
+The payload of a logical device for the computers of a project
+(Logical.as_dict: device, model, manufacturer, connection and driver of
+the project) is compiled once and kept in Redis, in a hash by project
+(logical id -> payload). Logical devices missing from the manifest are
+compiled in batch (two queries for any number of them), and the manifests
+of all projects are discarded when a device, its model, its driver... change.
+
+Manifests are discarded by increasing a generation counter, which is part
+of their keys (an INCR instead of scanning the keyspace): the manifests of
+previous generations are no longer read and expire by themselves.
+"""
+
+import json
+
+from django_redis import get_redis_connection
+
+MANIFEST_TTL = 60 * 60 * 24  # seconds
+MANIFEST_GENERATION_KEY = 'migasfree:devices:manifest:generation'
+
+
+def manifest_key(project_id, generation):
+    return f'migasfree:devices:manifest:{generation}:{project_id}'
+
+
+def manifest_generation(con):
+    return int(con.get(MANIFEST_GENERATION_KEY) or 0)
+
+
+class DeviceManifestService:
+    @staticmethod
+    def compile(project_id, logical_ids):
+        """
+        :return: {logical id: Logical.as_dict} of the existing logical devices
+        """
+        from ...device.models import Driver, Logical
+
+        logical_devices = list(
+            Logical.objects.filter(id__in=logical_ids).select_related(
+                'capability',
+                'device__connection__device_type',
+                'device__model__manufacturer',
+            )
+        )
+        if not logical_devices:
+            return {}
+
+        drivers = {}
+        for driver in Driver.objects.filter(
+            project_id=project_id,
+            model_id__in={logical.device.model_id for logical in logical_devices},
+            capability_id__in={logical.capability_id for logical in logical_devices},
+        ).order_by('-name'):  # the first one by name, as Logical.as_dict
+            drivers[(driver.model_id, driver.capability_id)] = driver
+
+        return {
+            logical.id: logical.as_dict_with_driver(drivers.get((logical.device.model_id, logical.capability_id)))
+            for logical in logical_devices
+        }
+
+    @staticmethod
+    def get(project_id, logical_ids, con=None):
+        """
+        Payloads of the logical devices (in the same order) for a project,
+        compiling only those missing from the manifest
+        """
+        logical_ids = list(logical_ids)
+        if not logical_ids:
+            return []
+
+        con = con or get_redis_connection()
+        key = manifest_key(project_id, manifest_generation(con))
+
+        manifest = {
+            logical_id: json.loads(value)
+            for logical_id, value in zip(logical_ids, con.hmget(key, logical_ids), strict=True)
+            if value is not None
+        }
+
+        missing = [logical_id for logical_id in logical_ids if logical_id not in manifest]
+        if missing:
+            compiled = DeviceManifestService.compile(project_id, missing)
+            if compiled:
+                pipe = con.pipeline()
+                pipe.hset(key, mapping={logical_id: json.dumps(value) for logical_id, value in compiled.items()})
+                pipe.expire(key, MANIFEST_TTL)
+                pipe.execute()
+
+            manifest.update(compiled)
+
+        return [manifest[logical_id] for logical_id in logical_ids if logical_id in manifest]
+
+    @staticmethod
+    def invalidate(con=None):
+        con = con or get_redis_connection()
+        con.incr(MANIFEST_GENERATION_KEY)
@@ -0,0 +1,88 @@
+# Copyright (c) 2026 Jose Antonio Chavarría <jachavar@gmail.com>
+# Copyright (c) 2026 Alberto Gacías <alberto@migasfree.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Read model of domains.
+
+The admins, attribute sets and tags of any number of domains (a page of
+the API or the domains of the tags of a computer) are loaded in a fixed
+number of queries, instead of several queries per domain.
+"""
+
+from django.db.models import Prefetch, Q, prefetch_related_objects
+
+
+class DomainReadModel:
+    @staticmethod
+    def prefetches():
+        from ..models import Attribute, ServerAttribute, UserProfile
+
+        return [
+            Prefetch('included_attributes', queryset=Attribute.objects.select_related('property_att')),
+            Prefetch('excluded_attributes', queryset=Attribute.objects.select_related('property_att')),
+            Prefetch('tags', queryset=ServerAttribute.objects.select_related('property_att')),
+            Prefetch('domains', queryset=UserProfile.objects.only('id', 'username').order_by('id')),
+        ]
+
+    @staticmethod
+    def load(domains):
+        """
+        Loads admins (domains), attribute sets and tags of the domains
+        (already loaded relations are not queried again)
+        """
+        domains = list(domains)
+        prefetch_related_objects(domains, *DomainReadModel.prefetches())
+
+        return domains
+
+    @staticmethod
+    def domain_admins(domain):
+        return [{'id': user.id, 'username': user.username} for user in domain.domains.all()]
+
+    @staticmethod
+    def tags(domains):
+        """
+        :return: {domain id: [DMN attributes of the domain and its subdomains, tags of the domain]}
+        """
+        from ..models import Attribute, ServerAttribute
+
+        domains = list(domains)
+        if not domains:
+            return {}
+
+        prefetch_related_objects(
+            domains, Prefetch('tags', queryset=ServerAttribute.objects.select_related('property_att'))
+        )
+
+        condition = Q()
+        for domain in domains:
+            condition |= Q(value=domain.name) | Q(value__startswith=f'{domain.name}.')
+
+        attributes = list(
+            Attribute.objects.filter(condition, property_att__prefix='DMN')
+            .select_related('property_att')
+            .order_by('value')
+        )
+
+        ret = {}
+        for domain in domains:
+            ret[domain.id] = [
+                *(attribute for attribute in attributes if attribute.value == domain.name),
+                *(attribute for attribute in attributes if attribute.value.startswith(f'{domain.name}.')),
+                *domain.tags.all(),
+            ]
+
+        return ret
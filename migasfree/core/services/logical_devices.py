@@ -0,0 +1,171 @@
+# Copyright (c) 2026 Jose Antonio Chavarría <jachavar@gmail.com>
+# Copyright (c) 2026 Alberto Gacías <alberto@migasfree.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Assignment of logical devices to computers (through their CID attribute).
+
+A list of logical devices is validated for any number of computers with
+one query (every missing driver is reported at once) and the assignments
+are applied as the difference between the assigned and the requested
+logical devices of each computer.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils.translation import gettext as _
+from django_redis import get_redis_connection
+
+from .sync_plan import plan_key
+
+
+class LogicalDeviceAssignmentService:
+    @staticmethod
+    def missing_drivers(computers, logical_devices):
+        """
+        Errors of the logical devices (ids) that do not exist or have no
+        driver for the project of some of the computers
+        """
+        from ...device.models import Driver, Logical
+
+        logical_devices = set(logical_devices)
+        if not logical_devices:
+            return []
+
+        by_project = defaultdict(list)
+        for computer in computers:
+            by_project[computer.project].append(computer)
+
+        drivers = {
+            f'driver_{project.id}': Exists(
+                Driver.objects.filter(
+                    project_id=project.id,
+                    model_id=OuterRef('device__model_id'),
+                    capability_id=OuterRef('capability_id'),
+                )
+            )
+            for project in by_project
+        }
+        found = (
+            Logical.objects.filter(id__in=logical_devices)
+            .select_related('capability', 'device__model')
+            .annotate(**drivers)
+            .order_by('id')
+        )
+
+        errors = []
+        for logical in found:
+            logical_devices.discard(logical.id)
+            for project, project_computers in by_project.items():
+                if not getattr(logical, f'driver_{project.id}'):
+                    errors.append(
+                        _(
+                            'Error in capability %s for assign computer %s.'
+                            ' There is no driver defined for project %s in model %s.'
+                        )
+                        % (
+                            logical.capability,
+                            ', '.join(str(computer) for computer in project_computers),
+                            project,
+                            logical.device.model,
+                        )
+                    )
+
+        errors.extend(_('Logical device %s does not exist.') % pk for pk in sorted(logical_devices))
+
+        return errors
+
+    @staticmethod
+    def cid_attributes(computers):
+        """
+        CID attributes (ids) of the computers, creating the missing ones
+        (the same attributes as Computer.get_cid_attribute)
+        :returns: {computer_id: attribute_id}
+        """
+        from ..models import Attribute, BasicProperty
+
+        computers = {str(computer.id): computer for computer in computers}
+        if not computers:
+            return {}
+
+        def existing():
+            return dict(
+                Attribute.objects.filter(property_att__prefix='CID', value__in=computers).values_list('value', 'id')
+            )
+
+        found = existing()
+        missing = [computer for value, computer in computers.items() if value not in found]
+        if missing:
+            cid = BasicProperty.objects.get(prefix='CID')
+            Attribute.objects.bulk_create(
+                [
+                    Attribute(property_att=cid, value=str(computer.id), description=computer.get_cid_description())
+                    for computer in missing
+                ],
+                ignore_conflicts=True,  # created meanwhile by other requests
+            )
+            found = existing()
+
+        return {computers[value].id: attribute_id for value, attribute_id in found.items()}
+
+    @staticmethod
+    def update(computers, assign=(), unassign=(), replace=False):
+        """
+        Assigns and unassigns logical devices (ids) to the computers.
+        With replace, assign is the whole set of logical devices of each
+        computer. Only the differences are written (one insert and one
+        delete for all the computers).
+        :returns: {'assigned': x, 'unassigned': y}
+        """
+        from ...device.models import Logical
+
+        through = Logical.attributes.through
+        cid_attributes = LogicalDeviceAssignmentService.cid_attributes(computers)
+
+        current = defaultdict(set)
+        for attribute_id, logical_id in through.objects.filter(attribute_id__in=cid_attributes.values()).values_list(
+            'attribute_id', 'logical_id'
+        ):
+            current[attribute_id].add(logical_id)
+
+        assign, unassign = set(assign), set(unassign)
+        to_add = []
+        to_remove = Q()
+        unassigned = 0
+        for attribute_id in cid_attributes.values():
+            target = assign if replace else (current[attribute_id] | assign) - unassign
+
+            to_add.extend(
+                through(attribute_id=attribute_id, logical_id=pk) for pk in sorted(target - current[attribute_id])
+            )
+
+            removed = current[attribute_id] - target
+            if removed:
+                to_remove |= Q(attribute_id=attribute_id, logical_id__in=removed)
+                unassigned += len(removed)
+
+        with transaction.atomic():
+            through.objects.bulk_create(to_add)
+            if unassigned:
+                through.objects.filter(to_remove).delete()
+
+        if to_add or unassigned:
+            # logical devices are part of the synchronization plan
+            con = get_redis_connection()
+            con.delete(*[plan_key(computer_id) for computer_id in cid_attributes])
+
+        return {'assigned': len(to_add), 'unassigned': unassigned}
@@ -0,0 +1,594 @@
+# Copyright (c) 2026 Jose Antonio Chavarría <jachavar@gmail.com>
+# Copyright (c) 2026 Alberto Gacías <alberto@migasfree.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Asynchronous package ingestion pipeline.
+
+An ingestion accepts a batch of uploaded files and returns at once:
+  1. Each file is streamed to a staging file in its store while its sha256
+     is computed (the published files are not touched yet).
+  2. Files whose name cannot be parsed are inspected in parallel by the
+     pms workers (one packages_metadata task per batch of files, joined
+     by a chord).
+  3. A single callback on the default queue creates or updates the Package
+     records, places the staging files of the valid packages at their
+     store paths and requests one repository rebuild per affected deployment.
+     Identical contents already present in any store are hard linked
+     instead of being stored twice (content-hash dedup). A known digest is
+     only reused while its file keeps the same inode, size and mtime, and
+     it is forgotten as soon as its file is overwritten or deleted.
+
+Progress is kept in Redis (migasfree:ingestions:<id>) so it can be polled,
+and the final state is also published to the ``ingestions.<id>`` channel group.
+
+PackageIngestionService.upload runs the same pipeline synchronously (the
+metadata tasks are joined by a group), validating the whole batch before
+registering it, for clients that need per-file results in the response.
+
+In both cases, packages already in the project are rejected unless
+overwriting them is requested, and placed files are rolled back if the
+registration fails.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import uuid
+from functools import partial
+
+from asgiref.sync import async_to_sync
+from celery import chord, group
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext
+from django_redis import get_redis_connection
+
+from ..models import Deployment, Package, Project, Store
+from ..pms.runner import batched
+from .repository_rebuilds import RepositoryRebuildService
+
+logger = logging.getLogger('migasfree')
+
+DIGESTS_KEY = 'migasfree:packages:digests'  # digest -> stored file (path and signature)
+DIGEST_PATHS_KEY = 'migasfree:packages:digest-paths'  # path -> digest
+INGESTION_TTL = 60 * 60 * 24  # seconds
+
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_FINISHED = 'finished'
+STATUS_FAILED = 'failed'
+STATUS_SKIPPED = 'skipped'  # valid, but not registered because other files of the batch failed
+
+
+def ingestion_key(ingestion_id):
+    return f'migasfree:ingestions:{ingestion_id}'
+
+
+def ingestion_group(ingestion_id):
+    return f'ingestions.{ingestion_id}'
+
+
+def stage_package_file(file_, target):
+    """
+    Streams an uploaded file to a staging file next to target (same
+    filesystem, so placing it later is a rename) computing its sha256 on the fly.
+
+    Returns a tuple (staging file, digest, size)
+    """
+    path = os.path.dirname(target)
+    os.makedirs(path, exist_ok=True)
+
+    hash_ = hashlib.sha256()
+    size = 0
+    # keeps the package name (and extension) for the pms tools
+    fd, tmp_file = tempfile.mkstemp(dir=path, prefix='.ingest-', suffix=f'-{os.path.basename(target)}')
+    with os.fdopen(fd, 'wb') as destination:
+        for chunk in file_.chunks():
+            hash_.update(chunk)
+            destination.write(chunk)
+            size += len(chunk)
+
+    return tmp_file, hash_.hexdigest(), size
+
+
+def file_signature(path):
+    stat = os.stat(path)
+
+    return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+
+def stored_package_file(con, digest):
+    """
+    Returns the path of the stored file with this digest, if it has not
+    changed since it was stored (otherwise the digest is forgotten)
+    """
+    value = con.hget(DIGESTS_KEY, digest)
+    if not value:
+        return None
+
+    with contextlib.suppress(ValueError, KeyError, TypeError, OSError):
+        stored = json.loads(value)
+        if file_signature(stored['path']) == stored['signature']:
+            return stored['path']
+
+    con.hdel(DIGESTS_KEY, digest)
+
+    return None
+
+
+def forget_package_file(path, con=None):
+    """
+    Forgets the digests of the files stored at path (a file or a directory),
+    before they are overwritten or deleted
+    """
+    con = con or get_redis_connection()
+
+    paths = [path]
+    if os.path.isdir(path):
+        pattern = re.sub(r'([*?\[\]\\])', r'\\\1', os.path.join(path, '')) + '*'
+        paths += [item.decode() for item, _ in con.hscan_iter(DIGEST_PATHS_KEY, match=pattern)]
+
+    digests = [digest for digest in con.hmget(DIGEST_PATHS_KEY, paths) if digest]
+    pipe = con.pipeline()
+    for digest, value in zip(digests, con.hmget(DIGESTS_KEY, digests) if digests else [], strict=True):
+        with contextlib.suppress(ValueError, KeyError, TypeError):
+            if value and json.loads(value)['path'] in paths:
+                pipe.hdel(DIGESTS_KEY, digest)
+    pipe.hdel(DIGEST_PATHS_KEY, *paths)
+    pipe.execute()
+
+
+def place_package_file(tmp_file, target, digest):
+    """
+    Moves a staging file to target.
+
+    If the same content is already stored anywhere (known by its digest),
+    target becomes a hard link to it instead of a second copy.
+
+    Returns True if the content has been deduplicated
+    """
+    con = get_redis_connection()
+    existing = stored_package_file(con, digest)
+
+    forget_package_file(target, con)
+
+    if existing and existing != target:
+        link = f'{tmp_file}.link'
+        try:
+            os.link(existing, link)
+            os.replace(link, target)
+            os.remove(tmp_file)
+            return True
+        except OSError as e:
+            logger.debug('Could not hard link %s to %s: %s', existing, target, e)
+            with contextlib.suppress(OSError):
+                os.remove(link)
+
+    os.replace(tmp_file, target)
+
+    pipe = con.pipeline()
+    pipe.hset(DIGESTS_KEY, digest, json.dumps({'path': target, 'signature': file_signature(target)}))
+    pipe.hset(DIGEST_PATHS_KEY, target, digest)
+    pipe.execute()
+
+    return False
+
+
+def store_package_file(file_, target):
+    """
+    Streams an uploaded file to target computing its sha256 on the fly
+    (see stage_package_file and place_package_file).
+
+    Returns a tuple (digest, size, deduplicated)
+    """
+    tmp_file, digest, size = stage_package_file(file_, target)
+
+    return digest, size, place_package_file(tmp_file, target, digest)
+
+
+def backup_package_file(target):
+    """
+    Keeps the file at target (if any) until the placement is confirmed or undone.
+
+    Returns the backup path or None
+    """
+    if not os.path.isfile(target):
+        return None
+
+    backup = f'{os.path.join(os.path.dirname(target), ".ingest-backup-")}{uuid.uuid4().hex}'
+    os.link(target, backup)
+
+    return backup
+
+
+def restore_package_file(target, backup):
+    """
+    Undoes the placement of a file at target
+    """
+    if backup:
+        forget_package_file(target)
+        os.replace(backup, target)
+    else:
+        Package.delete_from_store(target)
+
+
+def discard_staged_files(items):
+    """
+    Removes the staging files of the items (not placed)
+    """
+    for item in items:
+        with contextlib.suppress(OSError):
+            os.remove(item.pop('staged'))
+
+
+def apply_package_metadata(items, metadata):
+    """
+    Completes the items to inspect with the pms results (in the same order)
+    and marks the items without a valid name as failed.
+
+    Returns the valid items by fullname
+    """
+    metadata = iter(metadata or [])
+    valid = {}
+    for item in items:
+        if item['inspect']:
+            response = next(metadata, None) or {}
+            item['name'] = response.get('name', '')
+            item['version'] = response.get('version', '')
+            item['architecture'] = response.get('architecture', '')
+
+        if item['status'] == STATUS_FAILED:
+            continue
+
+        if item['name'] and item['version'] and item['architecture']:
+            valid[item['fullname']] = item
+        else:
+            item['status'] = STATUS_FAILED
+            item['error'] = gettext('Package %s has an incorrect name format') % item['fullname']
+
+    return valid
+
+
+def register_packages(project, store, valid):
+    """
+    Creates or updates the packages of the valid items in a single transaction.
+
+    Returns the affected deployments
+    """
+    with transaction.atomic(savepoint=False):
+        existing = {
+            pkg.fullname: pkg
+            for pkg in Package.objects.select_related('store').filter(project=project, fullname__in=valid.keys())
+        }
+
+        new_packages = [
+            Package(
+                fullname=fullname,
+                name=item['name'],
+                version=item['version'],
+                architecture=item['architecture'],
+                project=project,
+                store=store,
+            )
+            for fullname, item in valid.items()
+            if fullname not in existing
+        ]
+        Package.objects.bulk_create(new_packages)
+
+        for package in new_packages:
+            valid[package.fullname].update({'id': package.id, 'status': 'created'})
+
+        for fullname, package in existing.items():
+            item = valid[fullname]
+            if package.store and package.store_id != store.id:
+                transaction.on_commit(
+                    partial(Package.delete_from_store, Package.path(project.slug, package.store.slug, fullname))
+                )
+
+            package.store = store
+            package.name = item['name']
+            package.version = item['version']
+            package.architecture = item['architecture']
+            item.update({'id': package.id, 'status': 'updated'})
+
+        Package.objects.bulk_update(existing.values(), ['store', 'name', 'version', 'architecture'])
+
+        package_ids = [item['id'] for item in valid.values()]
+        return list(Deployment.objects.filter(available_packages__id__in=package_ids).distinct())
+
+
+def ingest_packages(project, store, valid):
+    """
+    Registers the packages of the valid items and places their staging files
+    in a single transaction, requesting one repository rebuild per affected
+    deployment. If anything fails, the previous files are restored and the
+    staging files removed.
+
+    Returns the affected deployments
+    """
+    placed = []  # (target, backup of its previous file)
+    try:
+        with transaction.atomic():
+            deployments = register_packages(project, store, valid)
+            for item in valid.values():
+                placed.append((item['path'], backup_package_file(item['path'])))
+                item['deduplicated'] = place_package_file(item.pop('staged'), item['path'], item['digest'])
+
+            RepositoryRebuildService.schedule(
+                [deploy.id for deploy in deployments], {'added': list(valid.keys()), 'removed': []}
+            )
+    except Exception:
+        discard_staged_files(item for item in valid.values() if 'staged' in item)
+
+        for target, backup in reversed(placed):
+            restore_package_file(target, backup)
+
+        raise
+
+    for _target, backup in placed:
+        if backup:
+            with contextlib.suppress(OSError):
+                os.remove(backup)
+
+    return deployments
+
+
+class PackageIngestionService:
+    """
+    Ingests a batch of package files into a store without blocking the request.
+
+    Usage::
+
+        ingestion_id = PackageIngestionService(project, store).start(files)
+        ...
+        state = PackageIngestionService.state(ingestion_id)
+    """
+
+    def __init__(self, project, store):
+        self.project = project
+        self.store = store
+
+    def start(self, files, overwrite=False):
+        """
+        Stages the files and dispatches metadata extraction.
+        Packages already in the project are failures unless overwrite is True.
+        Returns the ingestion id.
+        """
+        from .. import tasks as core_tasks
+        from ..pms import tasks as pms_tasks
+
+        ingestion_id = uuid.uuid4().hex
+        items = self.stage(files, overwrite)
+
+        self.save_state(
+            ingestion_id,
+            {
+                'id': ingestion_id,
+                'status': STATUS_RUNNING,
+                'project': self.project.id,
+                'store': self.store.id,
+                'overwrite': overwrite,
+                'created_at': timezone.now().isoformat(),
+                'files': items,
+            },
+        )
+
+        callback = core_tasks.finish_package_ingestion.s(ingestion_id).set(queue='default')
+        header = [
+            pms_tasks.packages_metadata.s(pms_name=self.project.pms, packages=batch).set(
+                queue=f'pms-{self.project.pms}'
+            )
+            for batch in batched(item['staged'] for item in items if item['inspect'])
+        ]
+
+        if header:
+            chord(header)(callback.on_error(core_tasks.fail_package_ingestion.si(ingestion_id)))
+        else:
+            callback.apply_async(args=([],))
+
+        return ingestion_id
+
+    def upload(self, files, overwrite=False):
+        """
+        Synchronous variant of an ingestion, for requests that need the packages at once:
+          * every file is streamed once to a staging file in its store while hashing it,
+          * files without a parseable name are inspected by the pms workers (in concurrent batches),
+          * the whole batch is validated before registering anything,
+          * packages are created (or updated, if overwrite) and their files placed
+            in a single transaction.
+
+        Returns the list of per-file results. If any file fails, no package is
+        registered and no file is kept. Packages already in the project are
+        failures unless overwrite is True.
+        """
+        from ..pms import tasks as pms_tasks
+
+        items = self.stage(files, overwrite)
+
+        to_inspect = [item for item in items if item['inspect']]
+        metadata = []
+        if to_inspect:
+            batches = (
+                group(
+                    [
+                        pms_tasks.packages_metadata.s(pms_name=self.project.pms, packages=batch).set(
+                            queue=f'pms-{self.project.pms}'
+                        )
+                        for batch in batched(item['staged'] for item in to_inspect)
+                    ]
+                )
+                .apply_async()
+                .get()
+            )
+            metadata = [response for batch in batches for response in batch]
+
+        valid = apply_package_metadata(items, metadata)
+        if len(valid) < len(items):
+            discard_staged_files(item for item in items if 'staged' in item)
+
+            for item in items:
+                if item['status'] != STATUS_FAILED:
+                    item['status'] = STATUS_SKIPPED
+
+            return items
+
+        ingest_packages(self.project, self.store, valid)
+
+        return items
+
+    def stage(self, files, overwrite=False):
+        """
+        Streams the files to staging files in the store (see stage_package_file).
+        Files repeated in the batch, and packages already in the project unless
+        overwrite is True, are failures (not staged).
+
+        Returns the items of the files
+        """
+        fullnames = [os.path.basename(file_.name) for file_ in files]
+        duplicated = {fullname for fullname in fullnames if fullnames.count(fullname) > 1}
+        if not overwrite:
+            duplicated.update(self.existing(fullnames))
+
+        items = []
+        for file_, fullname in zip(files, fullnames, strict=True):
+            target = Package.path(self.project.slug, self.store.slug, fullname)
+            name, version, architecture = Package.normalized_name(fullname)
+            item = {
+                'fullname': fullname,
+                'path': target,
+                'name': name,
+                'version': version,
+                'architecture': architecture,
+                'inspect': False,
+                'status': STATUS_PENDING,
+            }
+            items.append(item)
+
+            if fullname in duplicated:
+                self.reject(item)
+                continue
+
+            item['staged'], item['digest'], item['size'] = stage_package_file(file_, target)
+            item['inspect'] = not (name and version and architecture)
+
+        return items
+
+    def existing(self, fullnames):
+        """
+        Fullnames of the packages already in the project
+        """
+        return set(
+            Package.objects.filter(project=self.project, fullname__in=fullnames).values_list('fullname', flat=True)
+        )
+
+    def reject(self, item):
+        item['status'] = STATUS_FAILED
+        item['error'] = gettext('Package %s is duplicated in store %s') % (item['fullname'], self.store.name)
+
+    @staticmethod
+    def save_state(ingestion_id, state):
+        con = get_redis_connection()
+        key = ingestion_key(ingestion_id)
+        con.set(key, json.dumps(state), ex=INGESTION_TTL)
+
+    @staticmethod
+    def state(ingestion_id):
+        con = get_redis_connection()
+        state = con.get(ingestion_key(ingestion_id))
+
+        return json.loads(state) if state else None
+
+    @staticmethod
+    def user_state(ingestion_id, user):
+        """
+        State of an ingestion if its project is in the scope of the user (profile)
+        """
+        state = PackageIngestionService.state(ingestion_id)
+        if not state or (not user.is_view_all() and state['project'] not in user.get_projects()):
+            return None
+
+        return state
+
+    @staticmethod
+    def publish(state):
+        try:
+            channel_layer = get_channel_layer()
+            async_to_sync(channel_layer.group_send)(
+                ingestion_group(state['id']), {'type': 'send_ingestion', 'text': state}
+            )
+        except Exception as e:
+            logger.warning('Failed to publish ingestion %s: %s', state['id'], e)
+
+    @staticmethod
+    def fail(ingestion_id, error=''):
+        state = PackageIngestionService.state(ingestion_id)
+        if not state:
+            return
+
+        discard_staged_files(item for item in state['files'] if 'staged' in item)
+
+        state['status'] = STATUS_FAILED
+        state['error'] = error or gettext('Package metadata could not be extracted')
+        state['finished_at'] = timezone.now().isoformat()
+
+        PackageIngestionService.save_state(ingestion_id, state)
+        PackageIngestionService.publish(state)
+
+    @staticmethod
+    def finish(ingestion_id, metadata):
+        """
+        Registers the ingested packages (metadata contains the pms results
+        for the files without a parseable name, in the same order), places
+        the files of the valid ones and requests one repository rebuild per
+        affected deployment. Files that fail are discarded.
+        """
+        state = PackageIngestionService.state(ingestion_id)
+        if not state:
+            logger.warning('Ingestion %s not found (expired?)', ingestion_id)
+            return None
+
+        project = Project.objects.get(pk=state['project'])
+        store = Store.objects.get(pk=state['store'])
+
+        service = PackageIngestionService(project, store)
+
+        valid = apply_package_metadata(state['files'], metadata)
+        if not state.get('overwrite'):
+            # registered meanwhile
+            for fullname in service.existing(valid.keys()):
+                service.reject(valid.pop(fullname))
+
+        discard_staged_files(item for item in state['files'] if item['status'] == STATUS_FAILED and 'staged' in item)
+
+        try:
+            deployments = ingest_packages(project, store, valid)
+        except Exception as e:
+            PackageIngestionService.fail(ingestion_id, str(e))
+            raise
+
+        state['status'] = STATUS_FINISHED
+        state['deployments'] = [deploy.id for deploy in deployments]
+        state['finished_at'] = timezone.now().isoformat()
+
+        PackageIngestionService.save_state(ingestion_id, state)
+        PackageIngestionService.publish(state)
+
+        return state
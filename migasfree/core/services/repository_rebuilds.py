@@ -0,0 +1,118 @@
+# Copyright (c) 2026 Jose Antonio Chavarría <jachavar@gmail.com>
+# Copyright (c) 2026 Alberto Gacías <alberto@migasfree.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Transaction-scoped collector of repository rebuilds.
+
+Package and package set signals only record the affected deployments (and
+the changed packages). When the transaction commits, a single
+create_repository_metadata task is sent per deployment, so bulk operations
+(uploads, copies) cost one rebuild per deployment instead of one per package.
+
+Outside a transaction (autocommit), rebuilds are sent immediately.
+"""
+
+import threading
+
+from django.db import transaction
+
+_local = threading.local()
+
+
+def merge_changes(current, changes):
+    """
+    Merges changed packages ({'added': [...], 'removed': [...]}).
+    None means unknown changes (the whole repository must be checked)
+    """
+    if current is None or changes is None:
+        return None
+
+    return {
+        'added': current['added'] + [name for name in changes.get('added', []) if name not in current['added']],
+        'removed': current['removed'] + [name for name in changes.get('removed', []) if name not in current['removed']],
+    }
+
+
+class _PendingRebuilds:
+    """
+    Deployments (id -> changes) to rebuild when a transaction commits.
+
+    Every schedule registers the batch again with on_commit, and it is sent
+    only once: Django discards the registrations of a rolled back savepoint
+    or transaction, so the batch always keeps one in the current transaction.
+    Deployments recorded by a rolled back transaction are rebuilt with the
+    next batch of the thread, an unnecessary but harmless rebuild (their
+    changes are checked against the packages actually available).
+    """
+
+    def __init__(self):
+        self.deployments = {}
+        self.sent = False
+
+    def __call__(self):
+        from ..models import Deployment
+        from ..pms import tasks
+
+        if self.sent:
+            return  # already sent by an earlier registration
+
+        self.sent = True
+
+        for deploy in Deployment.objects.filter(id__in=self.deployments.keys()).select_related('project'):
+            payload = deploy.get_repository_metadata_payload()
+            changes = self.deployments[deploy.id]
+            if changes is not None:
+                available = {package['fullname'] for package in payload['available_packages']}
+                payload['changes'] = {
+                    'added': [name for name in changes['added'] if name in available],
+                    'removed': [name for name in changes['removed'] if name not in available],
+                }
+
+            tasks.create_repository_metadata.apply_async(queue=f'pms-{deploy.pms().name}', kwargs={'payload': payload})
+
+
+def _current():
+    """
+    Pending rebuilds not sent yet, if any
+    """
+    pending = getattr(_local, 'pending', None)
+    if pending is None or pending.sent:
+        return None
+
+    return pending
+
+
+class RepositoryRebuildService:
+    @staticmethod
+    def schedule(deployment_ids, changes=None):
+        """
+        Rebuilds the repositories of deployments when the current transaction commits
+        changes: {'added': [fullname, ...], 'removed': [fullname, ...]} or None (unknown)
+        """
+        deployment_ids = list(deployment_ids)
+        if not deployment_ids:
+            return
+
+        pending = _current()
+        if pending is None:
+            pending = _local.pending = _PendingRebuilds()
+
+        for deployment_id in deployment_ids:
+            pending.deployments[deployment_id] = merge_changes(
+                pending.deployments.get(deployment_id, {'added': [], 'removed': []}), changes
+            )
+
+        transaction.on_commit(pending)
@@ -0,0 +1,196 @@
+# Copyright (c) 2026 Jose Antonio Chavarría <jachavar@gmail.com>
+# Copyright (c) 2026 Alberto Gacías <alberto@migasfree.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Synchronization plan of a computer: what a client must apply in a
+synchronization (deployments, packages, fault definitions, policies and
+devices).
+
+Attributes, deployments, fault definitions, policies and devices are
+evaluated once per computer into an immutable SyncPlan, shared by the
+client API (safe endpoints), the legacy v4 API and the simulation view.
+
+The safe API spreads a synchronization over several requests, so the plan
+is cached in Redis by computer and digest of its attributes (a new set of
+attributes builds a new plan) and discarded when the next synchronization
+starts.
+"""
+
+import dataclasses
+import hashlib
+import json
+
+from django_redis import get_redis_connection
+
+from ...utils import remove_duplicates_preserving_order, to_list
+from .device_manifest import DeviceManifestService
+
+PLAN_TTL = 60 * 15  # seconds
+
+
+def plan_key(computer_id):
+    return f'migasfree:sync:plans:{computer_id}'
+
+
+def attributes_digest(computer, attributes):
+    """
+    Digest of the inputs of a plan (project and attributes of the computer)
+    """
+    value = f'{computer.project_id}:{",".join(str(x) for x in sorted(set(attributes)))}'
+
+    return hashlib.sha1(value.encode(), usedforsecurity=False).hexdigest()
+
+
+@dataclasses.dataclass(frozen=True)
+class SyncPlan:
+    computer_id: int
+    digest: str
+    attributes: tuple = ()
+    deployments: tuple = ()  # {'id', 'name', 'slug', 'source', 'source_template'}
+    packages_to_install: tuple = ()  # {'package', 'name', 'id'} (by deployment)
+    packages_to_remove: tuple = ()
+    policy_packages_to_install: tuple = ()  # {'package', 'name', 'id'} (by policy)
+    policy_packages_to_remove: tuple = ()
+    fault_definitions: tuple = ()  # {'id', 'name', 'language', 'code'}
+    logical_devices: tuple = ()  # Logical.as_dict (see DeviceManifestService)
+    logical_device_ids: tuple = ()
+    default_logical_device: int = 0
+    capture_hardware: bool = True
+
+    def mandatory_packages(self):
+        """
+        Package names to install and to remove (deployments, then policies)
+        """
+        return {
+            'install': remove_duplicates_preserving_order(
+                [item['package'] for item in self.packages_to_install + self.policy_packages_to_install]
+            ),
+            'remove': remove_duplicates_preserving_order(
+                [item['package'] for item in self.packages_to_remove + self.policy_packages_to_remove]
+            ),
+        }
+
+    def to_json(self):
+        return json.dumps(dataclasses.asdict(self))
+
+    @classmethod
+    def from_json(cls, value):
+        data = json.loads(value)
+
+        return cls(**{key: tuple(item) if isinstance(item, list) else item for key, item in data.items()})
+
+
+def _deployment_packages(deployments, field):
+    """
+    Packages of a field (packages_to_install, packages_to_remove) of several
+    deployments, without repeating a package of the same deployment
+    """
+    seen = set()
+    packages = []
+    for deploy in deployments:
+        for package in to_list(getattr(deploy, field)):
+            if (package, deploy.id) not in seen:
+                seen.add((package, deploy.id))
+                packages.append({'package': package, 'name': deploy.name, 'id': deploy.id})
+
+    return packages
+
+
+class SyncPlanService:
+    @staticmethod
+    def build(computer, attributes=None):
+        """
+        Evaluates the synchronization plan of a computer
+        (attributes: ids of all its attributes, evaluated if not provided)
+        """
+        from ...app_catalog.models import Policy
+        from ...client.models import FaultDefinition
+        from ..models import Deployment
+
+        if attributes is None:
+            attributes = computer.get_all_attributes()
+        sync_attributes = set(computer.sync_attributes.values_list('id', flat=True))
+
+        deployments = list(Deployment.available_deployments(computer, attributes))
+
+        policy_to_install, policy_to_remove = Policy.get_packages(computer, sync_attributes)
+
+        logical_device_ids = list(computer.logical_devices(attributes).values_list('id', flat=True))
+
+        return SyncPlan(
+            computer_id=computer.id,
+            digest=attributes_digest(computer, attributes),
+            attributes=tuple(attributes),
+            deployments=tuple(
+                {
+                    'id': deploy.id,
+                    'name': deploy.name,
+                    'slug': deploy.slug,
+                    'source': deploy.source,
+                    'source_template': deploy.source_template(),
+                }
+                for deploy in deployments
+            ),
+            packages_to_install=tuple(_deployment_packages(deployments, 'packages_to_install')),
+            packages_to_remove=tuple(_deployment_packages(deployments, 'packages_to_remove')),
+            policy_packages_to_install=tuple(policy_to_install),
+            policy_packages_to_remove=tuple(policy_to_remove),
+            fault_definitions=tuple(
+                {
+                    'id': item.id,
+                    'name': item.name,
+                    'language': item.get_language_display(),
+                    'code': item.code,
+                }
+                for item in FaultDefinition.enabled_for_attributes(attributes)
+            ),
+            logical_devices=tuple(DeviceManifestService.get(computer.project_id, logical_device_ids)),
+            logical_device_ids=tuple(logical_device_ids),
+            default_logical_device=computer.default_logical_device_id or 0,
+            capture_hardware=computer.hardware_capture_is_required(),
+        )
+
+    @staticmethod
+    def get(computer, con=None):
+        """
+        Plan of a computer, reused while its attributes do not change
+        (those data that depend on the computer itself are always current)
+        """
+        con = con or get_redis_connection()
+        attributes = computer.get_all_attributes()
+        digest = attributes_digest(computer, attributes)
+
+        cached = con.hget(plan_key(computer.id), digest)
+        if cached is None:
+            plan = SyncPlanService.build(computer, attributes)
+            pipe = con.pipeline()
+            pipe.delete(plan_key(computer.id))
+            pipe.hset(plan_key(computer.id), digest, plan.to_json())
+            pipe.expire(plan_key(computer.id), PLAN_TTL)
+            pipe.execute()
+
+            return plan
+
+        return dataclasses.replace(
+            SyncPlan.from_json(cached),
+            default_logical_device=computer.default_logical_device_id or 0,
+            capture_hardware=computer.hardware_capture_is_required(),
+        )
+
+    @staticmethod
+    def invalidate(computer_id, con=None):
+        con = con or get_redis_connection()
+        con.delete(plan_key(computer_id))
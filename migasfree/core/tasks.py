@@ -154,3 +154,22 @@ def process_notification_queue():
 
         Notification.objects.bulk_create([Notification(message=normalize_line_breaks(msg)) for msg in messages])
         logger.info('Processed %d notifications from Redis queue', len(messages))
+
+
+@shared_task(queue='default', time_limit=600, soft_time_limit=570)
+def finish_package_ingestion(batches, ingestion_id):
+    from .services.package_ingestion import PackageIngestionService
+
+    # one list of metadata per batch of inspected files
+    metadata = [response for batch in batches for response in batch]
+    state = PackageIngestionService.finish(ingestion_id, metadata)
+    if state:
+        logger.info('Package ingestion %s finished (%d files)', ingestion_id, len(state['files']))
+
+
+@shared_task(queue='default', time_limit=60)
+def fail_package_ingestion(ingestion_id):
+    from .services.package_ingestion import PackageIngestionService
+
+    PackageIngestionService.fail(ingestion_id)
+    logger.error('Package ingestion %s failed', ingestion_id)
@@ -30,6 +30,7 @@ from ...utils import save_tempfile
 from ..mixins import SafeConnectionMixin
 from ..models import Deployment, Package, PackageSet, Project, Store
 from ..pms import tasks
+from ..services.package_ingestion import PackageIngestionService
 
 
 class SafePackagerConnectionMixin(SafeConnectionMixin):
@@ -251,3 +252,78 @@ class SafePackageViewSet(SafePackagerConnectionMixin, viewsets.ViewSet):
         check_repository_metadata(package.id)
 
         return Response(self.create_response(gettext('Data received')), status=status.HTTP_200_OK)
+
+    @extend_schema(
+        description=(
+            'Stores several uploaded package files and returns an ingestion id at once. '
+            'Package metadata is extracted in background and repositories are rebuilt '
+            'once per batch (requires JWT auth).'
+        ),
+        request={
+            'multipart/form-data': {
+                'type': 'object',
+                'properties': {
+                    'files': {
+                        'type': 'array',
+                        'items': {'type': 'string', 'format': 'binary'},
+                        'description': 'The package files to upload',
+                    },
+                    'project': {'type': 'string', 'description': 'Name of the project'},
+                    'store': {'type': 'string', 'description': 'Name of the store'},
+                },
+                'required': ['files', 'project', 'store'],
+            }
+        },
+        responses={
+            status.HTTP_202_ACCEPTED: {'description': 'Ingestion id'},
+            status.HTTP_404_NOT_FOUND: {'description': 'Project not found'},
+        },
+    )
+    @action(methods=['post'], detail=False)
+    def ingest(self, request):
+        """
+        claims = {
+            'project': project_name,
+            'store': store_name
+        }
+        """
+
+        claims = self.get_claims(request.data)
+        project = get_object_or_404(Project, name=claims.get('project'))
+
+        store, _ = Store.objects.get_or_create(name=claims.get('store'), project=project)
+
+        ingestion_id = PackageIngestionService(project, store).start(request.FILES.getlist('files'))
+
+        return Response(self.create_response({'id': ingestion_id}), status=status.HTTP_202_ACCEPTED)
+
+    @extend_schema(
+        description='Returns the state of a package ingestion (requires JWT auth).',
+        request={
+            'application/json': {
+                'type': 'object',
+                'properties': {
+                    'id': {'type': 'string', 'description': 'Ingestion id'},
+                },
+                'required': ['id'],
+            }
+        },
+        responses={
+            status.HTTP_200_OK: {'description': 'Ingestion state'},
+            status.HTTP_404_NOT_FOUND: {'description': 'Ingestion not found'},
+        },
+    )
+    @action(methods=['post'], detail=False, url_path='ingest/status')
+    def ingestion(self, request):
+        """
+        claims = {
+            'id': ingestion_id
+        }
+        """
+
+        claims = self.get_claims(request.data)
+        state = PackageIngestionService.state(claims.get('id')) if isinstance(claims, dict) else None
+        if not state:
+            return Response(self.create_response(gettext('Ingestion not found')), status=status.HTTP_404_NOT_FOUND)
+
+        return Response(self.create_response(state), status=status.HTTP_200_OK)
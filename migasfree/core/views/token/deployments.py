@@ -18,7 +18,7 @@ from django.utils.translation import gettext
 from django_redis import get_redis_connection
 from drf_spectacular.openapi import OpenApiParameter
 from drf_spectacular.utils import extend_schema
-from rest_framework import permissions, status, viewsets
+from rest_framework import exceptions, permissions, status, viewsets
 from rest_framework.decorators import action, permission_classes
 from rest_framework.response import Response
 
@@ -26,6 +26,7 @@ from ....mixins import DatabaseCheckMixin
 from ...filters import DeploymentFilter
 from ...models import Deployment, ExternalSource, InternalSource, Project
 from ...pms import tasks
+from ...pms.builds import MAX_BUILDS, build_stats, recent_builds
 from ...serializers import (
     DeploymentListSerializer,
     DeploymentSerializer,
@@ -60,8 +61,6 @@ class DeploymentViewSet(DatabaseCheckMixin, viewsets.ModelViewSet, MigasViewSet,
         'schedule',
         'domain',
     ).prefetch_related(
-        'schedule__delays',
-        'schedule__delays__attributes',
         'included_attributes',
         'included_attributes__property_att',
         'excluded_attributes',
@@ -109,8 +108,6 @@ class InternalSourceViewSet(DatabaseCheckMixin, viewsets.ModelViewSet, MigasView
         'schedule',
         'domain',
     ).prefetch_related(
-        'schedule__delays',
-        'schedule__delays__attributes',
         'included_attributes',
         'included_attributes__property_att',
         'excluded_attributes',
@@ -162,6 +159,48 @@ class InternalSourceViewSet(DatabaseCheckMixin, viewsets.ModelViewSet, MigasView
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @extend_schema(
+        description='Latest repository builds (newest first) of the deployments in the user scope, '
+        'with their queue latency, phase durations (symlink, index, sign, publish), outcome and size.',
+        parameters=[
+            OpenApiParameter(name='deployment', location=OpenApiParameter.QUERY, type=int),
+            OpenApiParameter(name='pms', location=OpenApiParameter.QUERY, type=str),
+            OpenApiParameter(
+                name='limit', location=OpenApiParameter.QUERY, type=int, description=f'1 to {MAX_BUILDS}, 50 by default'
+            ),
+        ],
+    )
+    @action(methods=['get'], detail=False)
+    def builds(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', 50)), MAX_BUILDS)
+            deployment = request.query_params.get('deployment')
+            deployment = int(deployment) if deployment else None
+        except ValueError as e:
+            raise exceptions.ParseError(gettext('Invalid parameters')) from e
+
+        if limit < 1:
+            raise exceptions.ParseError(gettext('Invalid parameters'))
+
+        deployments = set(self.get_queryset().values_list('id', flat=True))
+        if deployment is not None:
+            deployments &= {deployment}
+
+        return Response(
+            recent_builds(
+                get_redis_connection(), deployments=deployments, pms=request.query_params.get('pms'), limit=limit
+            ),
+            status=status.HTTP_200_OK,
+        )
+
+    @extend_schema(
+        description='Percentiles (p50, p90, p99 and max) of the duration, queue latency and phases '
+        'of the recent repository builds, and their errors and failures, per pms.'
+    )
+    @action(methods=['get'], detail=False, url_path='builds/stats', url_name='builds-stats')
+    def builds_stats(self, request):
+        return Response(build_stats(get_redis_connection()), status=status.HTTP_200_OK)
+
     @action(methods=['post'], detail=True, url_path='copy')
     def copy(self, request, pk=None):
         """
@@ -225,8 +264,6 @@ class ExternalSourceViewSet(DatabaseCheckMixin, viewsets.ModelViewSet, MigasView
         'schedule',
         'domain',
     ).prefetch_related(
-        'schedule__delays',
-        'schedule__delays__attributes',
         'included_attributes',
         'included_attributes__property_att',
         'excluded_attributes',
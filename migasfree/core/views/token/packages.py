@@ -21,7 +21,7 @@ from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext
 from drf_spectacular.openapi import OpenApiParameter
 from drf_spectacular.utils import extend_schema
-from rest_framework import mixins, parsers, permissions, status, viewsets
+from rest_framework import mixins, parsers, permissions, serializers, status, viewsets
 from rest_framework.decorators import action, permission_classes
 from rest_framework.response import Response
 
@@ -35,6 +35,7 @@ from ...serializers import (
     PackageSetSerializer,
     PackageSetWriteSerializer,
 )
+from ...services.package_ingestion import STATUS_FAILED, PackageIngestionService
 from ...services.package_set_copy import PackageSetCopyService
 from .base import ExportViewSet, MigasViewSet
 
@@ -168,6 +169,91 @@ class PackageViewSet(
 
         return Response({'data': response}, status=status.HTTP_200_OK)
 
+    @extend_schema(
+        description=(
+            'Uploads several package files to a store without waiting for their metadata. '
+            'Packages already in the project fail unless overwrite is true. '
+            'Returns an ingestion id to poll (or to follow at ws/ingestions/{id}/).'
+        ),
+        request={
+            'multipart/form-data': {
+                'type': 'object',
+                'properties': {
+                    'store': {'type': 'integer'},
+                    'files': {'type': 'array', 'items': {'type': 'string', 'format': 'binary'}},
+                    'overwrite': {'type': 'boolean', 'default': False},
+                },
+                'required': ['store', 'files'],
+            }
+        },
+        responses={status.HTTP_202_ACCEPTED: {'description': 'Ingestion id'}},
+    )
+    @action(methods=['post'], detail=False)
+    def ingest(self, request):
+        files = request.data.getlist('files') if hasattr(request.data, 'getlist') else []
+        if not files:
+            return Response(
+                {'detail': gettext('"files" field is required.')},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        store = get_object_or_404(Store.objects.scope(request.user.userprofile), pk=request.data.get('store'))
+        overwrite = serializers.BooleanField().to_internal_value(request.data.get('overwrite', False))
+        ingestion_id = PackageIngestionService(store.project, store).start(files, overwrite=overwrite)
+
+        return Response({'id': ingestion_id}, status=status.HTTP_202_ACCEPTED)
+
+    @extend_schema(
+        description=(
+            'Uploads several package files to a store and registers them in the same request. '
+            'The whole batch is validated first: if any file fails, nothing is registered. '
+            'Packages already in the project fail unless overwrite is true. '
+            'Returns the result of each file.'
+        ),
+        request={
+            'multipart/form-data': {
+                'type': 'object',
+                'properties': {
+                    'store': {'type': 'integer'},
+                    'files': {'type': 'array', 'items': {'type': 'string', 'format': 'binary'}},
+                    'overwrite': {'type': 'boolean', 'default': False},
+                },
+                'required': ['store', 'files'],
+            }
+        },
+        responses={
+            status.HTTP_201_CREATED: {'description': 'Per-file results'},
+            status.HTTP_400_BAD_REQUEST: {'description': 'Per-file results (nothing registered)'},
+        },
+    )
+    @action(methods=['post'], detail=False)
+    def upload(self, request):
+        files = request.data.getlist('files') if hasattr(request.data, 'getlist') else []
+        if not files:
+            return Response(
+                {'detail': gettext('"files" field is required.')},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        store = get_object_or_404(Store.objects.scope(request.user.userprofile), pk=request.data.get('store'))
+        overwrite = serializers.BooleanField().to_internal_value(request.data.get('overwrite', False))
+        items = PackageIngestionService(store.project, store).upload(files, overwrite=overwrite)
+        failed = any(item['status'] == STATUS_FAILED for item in items)
+
+        return Response(
+            {'files': items},
+            status=status.HTTP_400_BAD_REQUEST if failed else status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(description='Returns the state of a package ingestion.')
+    @action(methods=['get'], detail=False, url_path='ingestions/(?P<ingestion_id>[0-9a-f]{32})')
+    def ingestion(self, request, ingestion_id=None):
+        state = PackageIngestionService.user_state(ingestion_id, request.user.userprofile)
+        if not state:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        return Response(state, status=status.HTTP_200_OK)
+
 
 @extend_schema(tags=['package-sets'])
 @extend_schema(
@@ -213,40 +299,12 @@ class PackageSetViewSet(DatabaseCheckMixin, viewsets.ModelViewSet, MigasViewSet,
         return PackageSet.objects.scope(self.request.user.userprofile).distinct()
 
     def _upload_packages(self, project, store, files):
-        new_pkgs = []
-        for file_ in files:
-            name, version, architecture = Package.normalized_name(file_.name)
-            if not name:
-                package_path = save_tempfile(file_)
-                response = tasks.package_metadata.apply_async(
-                    kwargs={'pms_name': project.pms, 'package': package_path},
-                    queue=f'pms-{project.pms}',
-                ).get()
-                os.remove(package_path)
-                if response['name']:
-                    name = response['name']
-                    version = response['version']
-                    architecture = response['architecture']
-
-            if not name or not version or not architecture:
-                return {'error': gettext('Package %s has an incorrect name format') % file_.name}
-
-            try:
-                pkg = Package.objects.create(
-                    fullname=file_.name,
-                    name=name,
-                    version=version,
-                    architecture=architecture,
-                    project=project,
-                    store=store,
-                    file_=file_,
-                )
-            except IntegrityError:
-                return {'error': gettext('Package %s is duplicated in store %s') % (file_.name, store.name)}
-
-            new_pkgs.append(str(pkg.id))
-
-        return new_pkgs
+        items = PackageIngestionService(project, store).upload(files)
+        for item in items:
+            if item['status'] == STATUS_FAILED:
+                return {'error': item['error']}
+
+        return [str(item['id']) for item in items]
 
     def create(self, request, *args, **kwargs):
         files = request.data.getlist('files')
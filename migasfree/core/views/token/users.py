@@ -47,6 +47,7 @@ from ...serializers import (
     UserProfileSerializer,
     UserProfileWriteSerializer,
 )
+from ...services.domains import DomainReadModel
 from .base import ExportViewSet, MigasViewSet
 
 
@@ -197,13 +198,7 @@ class PermissionViewSet(DatabaseCheckMixin, mixins.ListModelMixin, viewsets.Gene
 )
 @permission_classes((permissions.DjangoModelPermissions,))
 class DomainViewSet(DatabaseCheckMixin, viewsets.ModelViewSet, MigasViewSet, ExportViewSet):
-    queryset = Domain.objects.prefetch_related(
-        'included_attributes',
-        'included_attributes__property_att',
-        'excluded_attributes',
-        'excluded_attributes__property_att',
-        'userprofile_set',
-    )
+    queryset = Domain.objects.all()
     serializer_class = DomainSerializer
     filterset_class = DomainFilter
     search_fields = ('name',)
@@ -226,14 +221,7 @@ class DomainViewSet(DatabaseCheckMixin, viewsets.ModelViewSet, MigasViewSet, Exp
         if self.action == 'list':
             return self.queryset
 
-        return self.queryset.prefetch_related(
-            'included_attributes',
-            'included_attributes__property_att',
-            'excluded_attributes',
-            'excluded_attributes__property_att',
-            'tags',
-            'domains',
-        )
+        return self.queryset.prefetch_related(*DomainReadModel.prefetches())
 
 
 @extend_schema(tags=['scopes'])
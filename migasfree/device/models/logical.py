@@ -15,15 +15,21 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from ...core.models import Attribute, MigasLink
 from .capability import Capability
+from .connection import Connection
 from .device import Device
 from .driver import Driver
+from .manufacturer import Manufacturer
+from .model import Model
+from .type import Type
 
 
 class LogicalManager(models.Manager):
@@ -81,18 +87,19 @@ class Logical(models.Model, MigasLink):
         return self.alternative_capability_name if self.alternative_capability_name else self.capability.name
 
     def as_dict(self, project):
-        driver_as_dict = {}
-        try:
-            driver = Driver.objects.filter(
-                project__id=project.id, model__id=self.device.model.id, capability__id=self.capability_id
-            )[0]
-            if driver:
-                driver_as_dict = driver.as_dict()
-        except IndexError:
-            pass
+        driver = Driver.objects.filter(
+            project__id=project.id, model__id=self.device.model_id, capability__id=self.capability_id
+        ).first()
 
+        return self.as_dict_with_driver(driver)
+
+    def as_dict_with_driver(self, driver):
+        """
+        as_dict with the driver already resolved (None if the project has no driver)
+        """
+        device_type = self.device.connection.device_type.name
         ret = {
-            self.device.connection.device_type.name: {
+            device_type: {
                 'capability': self.get_name(),
                 'feature': self.get_name(),  # compatibility with client 4.x
                 'id': self.id,
@@ -100,12 +107,9 @@ class Logical(models.Model, MigasLink):
             }
         }
 
-        device_as_dict = self.device.as_dict()
-        for key, value in list(device_as_dict.items()):
-            ret[self.device.connection.device_type.name][key] = value
-
-        for key, value in list(driver_as_dict.items()):
-            ret[self.device.connection.device_type.name][key] = value
+        ret[device_type].update(self.device.as_dict())
+        if driver:
+            ret[device_type].update(driver.as_dict())
 
         return ret
 
@@ -136,3 +140,19 @@ class Logical(models.Model, MigasLink):
         ]
         unique_together = (('device', 'capability'),)
         db_table_comment = 'logical device features'
+
+
+@receiver([post_save, post_delete], sender=Type)
+@receiver([post_save, post_delete], sender=Manufacturer)
+@receiver([post_save, post_delete], sender=Connection)
+@receiver([post_save, post_delete], sender=Capability)
+@receiver([post_save, post_delete], sender=Model)
+@receiver([post_save, post_delete], sender=Device)
+@receiver([post_save, post_delete], sender=Driver)
+@receiver([post_save, post_delete], sender=Logical)
+def invalidate_device_manifests(sender, instance, **kwargs):
+    from ...core.services.device_manifest import DeviceManifestService
+
+    # again on commit, in case a manifest is compiled before the change is visible
+    DeviceManifestService.invalidate()
+    transaction.on_commit(DeviceManifestService.invalidate)
@@ -0,0 +1,53 @@
+# Copyright (c) 2026 Jose Antonio Chavarría <jachavar@gmail.com>
+# Copyright (c) 2026 Alberto Gacías <alberto@migasfree.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from django.middleware.gzip import GZipMiddleware
+
+COMPRESSIBLE_CONTENT_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/x-yaml',
+    'image/svg+xml',
+)
+COMPRESSIBLE_SUFFIXES = ('+json', '+xml')
+
+
+def is_compressible(response):
+    """
+    Only textual contents are worth compressing
+    (packages, archives and images are already compressed)
+    """
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+
+    return content_type.startswith(COMPRESSIBLE_CONTENT_TYPES) or content_type.endswith(COMPRESSIBLE_SUFFIXES)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that only spends CPU when compression pays off. It skips:
+      * streaming responses (package and repository files),
+      * contents that are already compressed (by their content type),
+      * encrypted payloads (responses marked with skip_compression, see
+        SafeConnectionMixin, which compresses them before encryption).
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or getattr(response, 'skip_compression', False) or not is_compressible(response):
+            return response
+
+        return super().process_response(request, response)
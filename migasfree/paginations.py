@@ -14,10 +14,85 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+from itertools import islice
+
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
 
 
 class DefaultPagination(pagination.PageNumberPagination):
     page_size = 100
     max_page_size = 10000
     page_size_query_param = 'page_size'
+
+
+class DefaultCursorPagination(pagination.CursorPagination):
+    page_size = DefaultPagination.page_size
+    max_page_size = DefaultPagination.max_page_size
+    page_size_query_param = 'page_size'
+    ordering = 'id'
+
+
+class RankedCursorPagination(DefaultCursorPagination):
+    """
+    Cursor pagination of ids ranked outside the database (as the members of
+    a Redis sorted set), limited to a queryset (the scope of the user).
+
+    The ranking is a callable (after, reverse) returning the (score, id) after
+    a position in that order. It is consumed in chunks, and only the ids of
+    each chunk are checked against the queryset, until the page is filled.
+    """
+
+    chunk_size = 1000
+
+    def paginate_ranking(self, ranking, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+
+        reverse = bool(self.cursor and self.cursor.reverse)
+        after = self._decode_position(self.cursor.position) if self.cursor and self.cursor.position else None
+
+        found = []
+        ranked = ranking(after, reverse)
+        while len(found) <= self.page_size and (chunk := list(islice(ranked, self.chunk_size))):
+            in_scope = set(queryset.filter(pk__in=[pk for _, pk in chunk]).values_list('pk', flat=True))
+            found.extend(item for item in chunk if item[1] in in_scope)
+
+        has_more = len(found) > self.page_size
+        found = found[: self.page_size]
+        if reverse:
+            found.reverse()
+
+        self.has_next = after is not None if reverse else has_more
+        self.has_previous = has_more if reverse else after is not None
+        self.first = found[0] if found else after
+        self.last = found[-1] if found else after
+
+        objects = queryset.in_bulk([pk for _, pk in found])
+
+        return [objects[pk] for _, pk in found if pk in objects]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        return self.encode_cursor(pagination.Cursor(offset=0, reverse=False, position=self._encode_position(self.last)))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        return self.encode_cursor(pagination.Cursor(offset=0, reverse=True, position=self._encode_position(self.first)))
+
+    @staticmethod
+    def _encode_position(position):
+        return f'{position[0]!r}:{position[1]}'
+
+    def _decode_position(self, position):
+        try:
+            score, pk = position.split(':')
+            return float(score), int(pk)
+        except ValueError as e:
+            raise NotFound(self.invalid_cursor_message) from e
@@ -33,6 +33,8 @@ ALG_SIGN = 'RS256'
 ALG_ENC = 'RSA-OAEP-256'
 ENC_CONTENT = 'A256CBC-HS512'
 TYPE_JWE = 'JWE'
+ZIP_DEFLATE = 'DEF'  # JWE compression of the plaintext (RFC 7516)
+ZIP_MIN_LENGTH = 1024  # smaller payloads are not worth compressing (bytes)
 
 logger = logging.getLogger('migasfree')
 
@@ -92,9 +94,11 @@ def verify(jwt, pub_key):
     return jws_token.payload
 
 
-def encrypt(claims, pub_key):
+def encrypt(claims, pub_key, compress=False):
     """
-    string encrypt(dict claims, string pub_key)
+    string encrypt(dict claims, string pub_key, bool compress)
+    If compress, the plaintext (JSON) is deflated before encryption
+    (ciphertext does not compress afterwards)
     """
     pub_jwk = load_jwk(pub_key)
 
@@ -104,7 +108,11 @@ def encrypt(claims, pub_key):
         'typ': TYPE_JWE,
         'kid': pub_jwk.thumbprint(),
     }
-    jwe_token = jwe.JWE(json.dumps(claims).encode('utf-8'), recipient=pub_jwk, protected=protected_header)
+    plaintext = json.dumps(claims).encode('utf-8')
+    if compress and len(plaintext) >= ZIP_MIN_LENGTH:
+        protected_header['zip'] = ZIP_DEFLATE
+
+    jwe_token = jwe.JWE(plaintext, recipient=pub_jwk, protected=protected_header)
 
     return jwe_token.serialize()
 
@@ -122,13 +130,13 @@ def decrypt(jwt, priv_key):
     return payload.decode('utf-8') if isinstance(payload, bytes) else str(payload)
 
 
-def wrap(data, sign_key, encrypt_key):
+def wrap(data, sign_key, encrypt_key, compress=False):
     """
-    string wrap(dict data, string sign_key, string encrypt_key)
+    string wrap(dict data, string sign_key, string encrypt_key, bool compress)
     """
     claims = {'data': data, 'sign': sign(data, sign_key)}
 
-    return encrypt(claims, encrypt_key)
+    return encrypt(claims, encrypt_key, compress=compress)
 
 
 def unwrap(data, decrypt_key, verify_key):
@@ -62,6 +62,7 @@ from .migasfree import (  # noqa: F401
     MIGASFREE_NOTIFY_CHANGE_UUID,
     MIGASFREE_NOTIFY_NEW_COMPUTER,
     MIGASFREE_ORGANIZATION,
+    MIGASFREE_PACKAGE_HISTORY_RETENTION,
     MIGASFREE_PACKAGER_PRI_KEY,
     MIGASFREE_PACKAGER_PUB_KEY,
     MIGASFREE_PRIVATE_KEY,
@@ -95,6 +96,7 @@ LOGGING['loggers']['celery'] = {
 
 MIGASFREE_PUBLIC_DIR = os.path.join(MIGASFREE_PROJECT_DIR, 'pub')
 MIGASFREE_KEYS_DIR = os.path.join(MIGASFREE_APP_DIR, 'keys')
+MIGASFREE_CACHE_DIR = os.path.join(MIGASFREE_PROJECT_DIR, 'cache')
 
 MIGASFREE_FQDN = 'localhost:2345'  # noqa: F811
 
@@ -87,6 +87,9 @@ MIGASFREE_NOTIFY_CHANGE_IP = False
 # PERIOD HARDWARE CAPTURE (DAYS)
 MIGASFREE_HW_PERIOD = 30
 
+# PACKAGE HISTORY CLOSED BEFORE THESE DAYS IS ARCHIVED (None: never)
+MIGASFREE_PACKAGE_HISTORY_RETENTION = None
+
 # Programming Languages for Properties and Fault Definitions
 MIGASFREE_PROGRAMMING_LANGUAGES = (
     (0, 'bash'),
@@ -64,6 +64,7 @@ from .migasfree import (  # noqa: F401
     MIGASFREE_NOTIFY_CHANGE_UUID,
     MIGASFREE_NOTIFY_NEW_COMPUTER,
     MIGASFREE_ORGANIZATION,
+    MIGASFREE_PACKAGE_HISTORY_RETENTION,
     MIGASFREE_PACKAGER_PRI_KEY,
     MIGASFREE_PACKAGER_PUB_KEY,
     MIGASFREE_PRIVATE_KEY,
@@ -88,6 +89,7 @@ ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost').split(',')
 
 MIGASFREE_PUBLIC_DIR = '/var/lib/migasfree-backend/public'
 MIGASFREE_KEYS_DIR = '/var/lib/migasfree-backend/keys'
+MIGASFREE_CACHE_DIR = '/var/lib/migasfree-backend/cache'
 
 STATIC_ROOT = '/var/lib/migasfree-backend/static'
 MEDIA_ROOT = MIGASFREE_PUBLIC_DIR
@@ -14,16 +14,66 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
+from .tasks import (
+    DASHBOARD_HEARTBEAT,
+    alerts_group,
+    alerts_scope,
+    alerts_snapshot,
+    register_dashboard,
+    unregister_dashboard,
+)
+
+
+def user_alerts_scope(user):
+    """
+    Anonymous connections see the global alerts
+    """
+    profile = getattr(user, 'userprofile', None) if user and user.is_authenticated else None
+
+    return alerts_scope(profile)
+
 
 class StatsConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Alerts of the user scope: the current ones on connect ('snapshot')
+    and then only the changes ('delta') pushed by the alerts task
+    """
+
+    alerts_scope = None
+    heartbeat = None
+
     async def connect(self):
-        await self.channel_layer.group_add('stats', self.channel_name)
+        self.alerts_scope = await database_sync_to_async(user_alerts_scope)(self.scope.get('user'))
+        await self.channel_layer.group_add(alerts_group(self.alerts_scope), self.channel_name)
         await self.accept()
 
+        dashboards = await database_sync_to_async(register_dashboard)(self.alerts_scope, self.channel_name)
+        self.heartbeat = asyncio.create_task(self.keep_registered())
+
+        # alerts of a scope without other dashboards are not up to date
+        snapshot = await database_sync_to_async(alerts_snapshot)(self.alerts_scope, refresh=dashboards == 1)
+        await self.send_json({'type': 'snapshot', 'alerts': snapshot})
+
+    async def keep_registered(self):
+        # the registration expires if this process dies without disconnecting
+        while True:
+            await asyncio.sleep(DASHBOARD_HEARTBEAT)
+            await database_sync_to_async(register_dashboard)(self.alerts_scope, self.channel_name)
+
     async def disconnect(self, code):
-        await self.channel_layer.group_discard('stats', self.channel_name)
+        if self.heartbeat is not None:
+            self.heartbeat.cancel()
+
+        if self.alerts_scope is None:
+            return
+
+        await self.channel_layer.group_discard(alerts_group(self.alerts_scope), self.channel_name)
+        await database_sync_to_async(unregister_dashboard)(self.alerts_scope, self.channel_name)
 
     async def send_alerts(self, event):
         await self.send_json(event['text'])
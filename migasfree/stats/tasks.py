@@ -16,7 +16,8 @@
 
 import json
 import logging
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from operator import gt, le
 
 from asgiref.sync import async_to_sync
@@ -27,23 +28,109 @@ from django.db.models import Q
 from django.utils.translation import gettext
 from django_redis import get_redis_connection
 
-from ..client.models import Computer, Error, Fault, Notification
-from ..core.models import Deployment, Package, PackageSet
+from ..client.models import Computer, Error, Fault, FaultDefinition, Notification
+from ..core.models import Deployment, Package, PackageSet, UserProfile
 from ..utils import decode_dict, decode_set
-from .utils import filter_computers_by_date
+from .utils import count_computers_by_date, filter_computers_by_date
 
 logger = logging.getLogger('celery')
 
+ALL_SCOPES = 'all'
+SCOPED_ALERTS = ('syncs', 'orphan_packages', 'orphan_package_sets', 'delayed', 'faults', 'errors')
+ALERTS = (
+    'repos',
+    'syncs',
+    'active_deploys',
+    'orphan_packages',
+    'orphan_package_sets',
+    'notifications',
+    'delayed',
+    'finished_deploys',
+    'faults',
+    'errors',
+)
+DASHBOARDS_KEY = 'migasfree:alerts:dashboards'  # '<scope> <channel>' -> expiration timestamp
+DASHBOARD_TTL = 60  # seconds without heartbeat
+DASHBOARD_HEARTBEAT = 20  # seconds
+ALERTS_SNAPSHOT_TTL = 60 * 60 * 24  # seconds
+
+
+def alerts_scope(user):
+    """
+    Scope of the alerts seen by a user: 'all' or '<domain id>-<scope id>'
+    (users with the same preferences share the same values), followed by
+    '-u<user id>' if the user has their own fault definitions
+    """
+    if user is None or user.is_view_all():
+        scope = ALL_SCOPES
+    else:
+        scope = f'{user.domain_preference_id or 0}-{user.scope_preference_id or 0}'
+
+    if user is not None and user.pk and FaultDefinition.objects.filter(users=user).exists():
+        scope = f'{scope}-u{user.pk}'
+
+    return scope
+
+
+def preferences_scope(scope):
+    """
+    Part of a scope given by the domain and scope preferences
+    """
+    return scope.partition('-u')[0]
+
+
+def scope_user(scope):
+    """
+    A (not saved) user with the preferences of a scope, to filter querysets
+    """
+    if scope == ALL_SCOPES:
+        return None
+
+    preferences, _, user_id = scope.partition('-u')
+    domain = scope_ = None
+    if preferences != ALL_SCOPES:
+        domain, scope_ = (int(value) or None for value in preferences.split('-'))
+
+    return UserProfile(id=int(user_id) if user_id else None, domain_preference_id=domain, scope_preference_id=scope_)
+
+
+def count_scope_computers_by_date(comparison_operator, scope, con):
+    user = scope_user(scope)
+    if user is None or user.is_view_all():
+        return count_computers_by_date(comparison_operator, con)
+
+    computers, delayed_time = filter_computers_by_date(comparison_operator, con)
+
+    return len(set(computers).intersection(user.get_computers())), delayed_time
+
+
+def alert_key(name, scope=ALL_SCOPES):
+    if name != 'faults':  # only faults depend on the user (their fault definitions)
+        scope = preferences_scope(scope)
 
-def add_orphan_packages():
+    if scope == ALL_SCOPES or name not in SCOPED_ALERTS:
+        return f'migasfree:chk:{name}'
+
+    return f'migasfree:chk:{name}:{scope}'
+
+
+def alerts_group(scope):
+    return f'stats.{scope}'
+
+
+def alerts_snapshot_key(scope):
+    return f'migasfree:alerts:{scope}:snapshot'
+
+
+def add_orphan_packages(scope=ALL_SCOPES):
     con = get_redis_connection()
     con.hset(
-        'migasfree:chk:orphan_packages',
+        alert_key('orphan_packages', scope),
         mapping={
             'msg': gettext('Orphan Packages'),
             'target': 'server',
             'level': 'warning',
-            'result': Package.orphan_count(),
+            'result': Package.orphan_count(scope_user(scope)),
             'api': json.dumps(
                 {
                     'model': 'packages',
@@ -59,15 +146,15 @@ def add_orphan_packages():
     con.sadd('migasfree:watch:chk', 'orphan_packages')
 
 
-def add_orphan_package_sets():
+def add_orphan_package_sets(scope=ALL_SCOPES):
     con = get_redis_connection()
     con.hset(
-        'migasfree:chk:orphan_package_sets',
+        alert_key('orphan_package_sets', scope),
         mapping={
             'msg': gettext('Orphan Package Sets'),
             'target': 'server',
             'level': 'warning',
-            'result': PackageSet.orphan_count(),
+            'result': PackageSet.orphan_count(scope_user(scope)),
             'api': json.dumps(
                 {
                     'model': 'package_sets',
@@ -97,15 +184,17 @@ def add_unchecked_notifications():
     con.sadd('migasfree:watch:chk', 'notifications')
 
 
-def add_unchecked_faults():
+def add_unchecked_faults(scope=ALL_SCOPES):
+    user = scope_user(scope)
+
     con = get_redis_connection()
     con.hset(
-        'migasfree:chk:faults',
+        alert_key('faults', scope),
         mapping={
             'msg': gettext('Unchecked Faults'),
             'target': 'computer',
             'level': 'critical',
-            'result': Fault.unchecked_count(),
+            'result': Fault.unchecked.scope(user).count() if user else Fault.unchecked_count(),
             'api': json.dumps(
                 {
                     'model': 'faults',
@@ -120,15 +209,15 @@ def add_unchecked_faults():
     con.sadd('migasfree:watch:chk', 'faults')
 
 
-def add_unchecked_errors():
+def add_unchecked_errors(scope=ALL_SCOPES):
     con = get_redis_connection()
     con.hset(
-        'migasfree:chk:errors',
+        alert_key('errors', scope),
         mapping={
             'msg': gettext('Unchecked Errors'),
             'target': 'computer',
             'level': 'critical',
-            'result': Error.unchecked_count(),
+            'result': Error.unchecked_count(scope_user(scope)),
             'api': json.dumps({'model': 'errors', 'query': {'checked': False}}),
         },
     )
@@ -155,17 +244,17 @@ def add_generating_repos():
     con.sadd('migasfree:watch:chk', 'repos')
 
 
-def add_synchronizing_computers():
-    result, delayed_time = filter_computers_by_date(gt)
-
+def add_synchronizing_computers(scope=ALL_SCOPES):
     con = get_redis_connection()
+    result, delayed_time = count_scope_computers_by_date(gt, scope, con)
+
     con.hset(
-        'migasfree:chk:syncs',
+        alert_key('syncs', scope),
         mapping={
             'msg': gettext('Synchronizing Computers Now'),
             'target': 'computer',
             'level': 'info',
-            'result': len(result),
+            'result': result,
             'api': json.dumps(
                 {
                     'model': 'messages',
@@ -177,17 +266,17 @@ def add_synchronizing_computers():
     con.sadd('migasfree:watch:chk', 'syncs')
 
 
-def add_delayed_computers():
-    result, delayed_time = filter_computers_by_date(le)
-
+def add_delayed_computers(scope=ALL_SCOPES):
     con = get_redis_connection()
+    result, delayed_time = count_scope_computers_by_date(le, scope, con)
+
     con.hset(
-        'migasfree:chk:delayed',
+        alert_key('delayed', scope),
         mapping={
             'msg': gettext('Delayed Computers'),
             'target': 'computer',
             'level': 'warning',
-            'result': len(result),
+            'result': result,
             'api': json.dumps(
                 {'model': 'messages', 'query': {'created_at__lt': datetime.strftime(delayed_time, '%Y-%m-%dT%H:%M:%S')}}
             ),
@@ -202,15 +291,12 @@ def add_active_schedule_deployments():
     """
     con = get_redis_connection()
 
-    result = 0
-    for item in (
-        Deployment.objects.select_related('schedule')
-        .prefetch_related('schedule__delays')
-        .filter(schedule__isnull=False, enabled=True)
-    ):
-        timeline = item.schedule_timeline()
-        if timeline and int(timeline['percent']) < 100:
-            result += 1
+    result = (
+        Deployment.objects.filter(schedule__isnull=False, enabled=True)
+        .with_schedule_percent()
+        .filter(schedule_percent__lt=100)
+        .count()
+    )
 
     con.hset(
         'migasfree:chk:active_deploys',
@@ -240,10 +326,12 @@ def add_finished_schedule_deployments():
     """
     con = get_redis_connection()
 
-    result = 0
-    for item in Deployment.objects.filter(schedule__isnull=False, enabled=True):
-        if int(item.schedule_timeline()['percent']) == 100:
-            result += 1
+    result = (
+        Deployment.objects.filter(schedule__isnull=False, enabled=True)
+        .with_schedule_percent()
+        .filter(schedule_percent__gte=100)
+        .count()
+    )
 
     con.hset(
         'migasfree:chk:finished_deploys',
@@ -267,101 +355,348 @@ def add_finished_schedule_deployments():
     con.sadd('migasfree:watch:chk', 'finished_deploys')
 
 
-def get_alerts():
+def add_global_alerts():
+    """
+    Alerts that are the same for every scope
+    """
+    add_generating_repos()
+    add_active_schedule_deployments()
+    add_unchecked_notifications()
+    add_finished_schedule_deployments()
+
+
+def add_scoped_alerts(scope, faults_only=False):
+    """
+    Alerts that depend on the scope (faults_only, if the alerts of its
+    preferences are already calculated)
+    """
+    if not faults_only:
+        preferences = preferences_scope(scope)
+
+        add_synchronizing_computers(preferences)
+        add_orphan_packages(preferences)
+        add_orphan_package_sets(preferences)
+        add_delayed_computers(preferences)
+        add_unchecked_errors(preferences)
+
+    add_unchecked_faults(scope)
+
+
+def add_alerts(scope=ALL_SCOPES):
+    add_global_alerts()
+    add_scoped_alerts(scope)
+
+
+def get_alerts(scope=ALL_SCOPES):
     con = get_redis_connection()
 
-    response = [
-        decode_dict(con.hgetall('migasfree:chk:repos')),
-        decode_dict(con.hgetall('migasfree:chk:syncs')),
-        decode_dict(con.hgetall('migasfree:chk:active_deploys')),
-        decode_dict(con.hgetall('migasfree:chk:orphan_packages')),
-        decode_dict(con.hgetall('migasfree:chk:orphan_package_sets')),
-        decode_dict(con.hgetall('migasfree:chk:notifications')),
-        decode_dict(con.hgetall('migasfree:chk:delayed')),
-        decode_dict(con.hgetall('migasfree:chk:finished_deploys')),
-        decode_dict(con.hgetall('migasfree:chk:faults')),
-        decode_dict(con.hgetall('migasfree:chk:errors')),
-    ]
-
-    for item in response:
+    response = []
+    for name in ALERTS:
+        item = decode_dict(con.hgetall(alert_key(name, scope)))
+        item['id'] = name
         item['api'] = json.loads(item.get('api', '{}'))
         item['msg'] = gettext(item.get('msg', ''))
+        response.append(item)
+
+    return [item for item in response if int(item.get('result', 0)) != 0]
+
+
+def alerts_delta(previous, current):
+    """
+    Alerts (by id) changed or added, and ids removed, from previous to current
+    Returns None if there are no differences
+    """
+    changed = [item for id_, item in current.items() if previous.get(id_) != item]
+    removed = [id_ for id_ in previous if id_ not in current]
+    if not changed and not removed:
+        return None
+
+    return {'changed': changed, 'removed': removed}
+
+
+def alerts_snapshot(scope, refresh=False):
+    """
+    Alerts of a scope as last pushed to its dashboards
+    (calculated, if there is no push yet or refresh is requested)
+    """
+    con = get_redis_connection()
+    snapshot = con.get(alerts_snapshot_key(scope))
+    if snapshot and not refresh:
+        return list(json.loads(snapshot).values())
+
+    add_alerts(scope)
+
+    current = get_alerts(scope)
+    con.set(alerts_snapshot_key(scope), json.dumps({item['id']: item for item in current}), ex=ALERTS_SNAPSHOT_TTL)
+
+    return current
+
+
+def publish_alerts(scope):
+    """
+    Sends to the dashboards of a scope only the alerts that have changed
+    since the last push (nothing, if no alert has changed)
+    """
+    con = get_redis_connection()
+    snapshot = con.get(alerts_snapshot_key(scope))
+    previous = json.loads(snapshot) if snapshot else {}
+    current = {item['id']: item for item in get_alerts(scope)}
+
+    delta = alerts_delta(previous, current)
+    if delta is None:
+        return None
+
+    con.set(alerts_snapshot_key(scope), json.dumps(current), ex=ALERTS_SNAPSHOT_TTL)
+
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        alerts_group(scope), {'type': 'send_alerts', 'text': {'type': 'delta', **delta}}
+    )
+
+    return delta
+
 
-    return [item for item in response if int(item['result']) != 0]
+def dashboards(con):
+    """
+    Scopes of the connected dashboards (one item per dashboard),
+    discarding those without a recent heartbeat
+    """
+    con.zremrangebyscore(DASHBOARDS_KEY, '-inf', time.time())
+
+    return [member.decode().split(' ', 1)[0] for member in con.zrange(DASHBOARDS_KEY, 0, -1)]
+
+
+def register_dashboard(scope, channel_name):
+    """
+    Registers a connected dashboard (again on each heartbeat)
+    Returns the number of connected dashboards of its scope
+    """
+    con = get_redis_connection()
+    con.zadd(DASHBOARDS_KEY, {f'{scope} {channel_name}': time.time() + DASHBOARD_TTL})
+
+    return dashboards(con).count(scope)
+
+
+def unregister_dashboard(scope, channel_name):
+    con = get_redis_connection()
+    con.zrem(DASHBOARDS_KEY, f'{scope} {channel_name}')
+
+
+def active_scopes():
+    """
+    Scopes with connected dashboards
+    """
+    return sorted(set(dashboards(get_redis_connection())))
 
 
 @shared_task(queue='default', time_limit=120)
 def alerts():
+    scopes = active_scopes()
+    if not scopes:
+        return  # nobody is watching (the API calculates the alerts of each request)
+
     con = get_redis_connection()
 
-    # info
-    add_generating_repos()
-    add_synchronizing_computers()
-    add_active_schedule_deployments()
+    add_global_alerts()
 
-    # warning
-    add_orphan_packages()
-    add_orphan_package_sets()
-    add_unchecked_notifications()
-    add_delayed_computers()
-    add_finished_schedule_deployments()
+    # only scopes with connected dashboards, and only if something has changed
+    calculated = set()
+    for scope in scopes:
+        preferences = preferences_scope(scope)
+        add_scoped_alerts(scope, faults_only=preferences in calculated)
+        calculated.add(preferences)
 
-    # error
-    add_unchecked_faults()
-    add_unchecked_errors()
+        publish_alerts(scope)
 
     logger.debug(con.smembers('migasfree:watch:chk'))
 
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)('stats', {'type': 'send_alerts', 'text': get_alerts()})
 
+ASSIGNMENT_PENDING = 'pending'
+ASSIGNMENT_RUNNING = 'running'
+ASSIGNMENT_DONE = 'done'
+ASSIGNMENT_FAILED = 'failed'
 
-def assigned_computers_to_deployment(deployment_id):
-    try:
-        deploy = Deployment.objects.get(pk=deployment_id)
-    except ObjectDoesNotExist:
-        return
+ASSIGNMENT_CHUNK_SIZE = 5000
+# a pending update not started after this time is considered lost (broker purged, worker killed...)
+ASSIGNMENT_PENDING_TIMEOUT = 60 * 10  # seconds
 
-    computers = set(
-        Computer.objects.filter(
-            project=deploy.project,
-            status__in=Computer.PRODUCTIVE_STATUS,
+
+def deployment_computers_key(deployment_id):
+    return f'migasfree:deployments:{deployment_id}:computers'
+
+
+def deployment_assignment_key(deployment_id):
+    return f'migasfree:deployments:{deployment_id}:assignment'
+
+
+def deployment_signature(deploy):
+    """
+    Attributes (and schedule) that determine the computers assigned to a deployment
+    """
+    delays = []
+    if deploy.schedule:
+        delays = sorted(
+            set(deploy.schedule.delays.filter(attributes__isnull=False).values_list('attributes__id', flat=True))
         )
-        .filter(Q(sync_attributes__in=deploy.included_attributes.all()) | Q(tags__in=deploy.included_attributes.all()))
-        .values_list('id', flat=True)
+
+    return {
+        'project': deploy.project_id,
+        'schedule': deploy.schedule_id,
+        'included': sorted(deploy.included_attributes.values_list('id', flat=True)),
+        'excluded': sorted(deploy.excluded_attributes.values_list('id', flat=True)),
+        'delays': delays,
+    }
+
+
+def changed_attributes(old, new):
+    """
+    Returns the attribute ids whose role in the deployment has changed
+    (None if the whole assignment must be recalculated)
+    """
+    if not old or old['project'] != new['project']:
+        return None
+
+    changed = set()
+    for field in ('included', 'excluded', 'delays'):
+        changed |= set(old[field]) ^ set(new[field])
+
+    return changed
+
+
+def get_assigned_computers(deploy, candidates=None):
+    """
+    Computers assigned to a deployment by its included attributes (or tags)
+    and schedule, minus the excluded ones.
+    If candidates is given, only those computers are evaluated.
+    """
+    queryset = Computer.objects.filter(
+        project=deploy.project,
+        status__in=Computer.PRODUCTIVE_STATUS,
     )
+    if candidates is not None:
+        queryset = queryset.filter(id__in=candidates)
 
-    if deploy.schedule and deploy.schedule.delays:
-        for delay in deploy.schedule.delays.all():
-            computers = computers.union(
-                set(
-                    Computer.objects.filter(
-                        project=deploy.project,
-                        status__in=Computer.PRODUCTIVE_STATUS,
-                    )
-                    .filter(Q(sync_attributes__in=delay.attributes.all()) | Q(tags__in=delay.attributes.all()))
-                    .values_list('id', flat=True)
-                )
-            )
-
-    computers = computers.difference(
-        set(
-            Computer.objects.filter(
-                project=deploy.project,
-                status__in=Computer.PRODUCTIVE_STATUS,
-            )
-            .filter(
-                Q(sync_attributes__in=deploy.excluded_attributes.all()) | Q(tags__in=deploy.excluded_attributes.all())
-            )
-            .values_list('id', flat=True)
+    attributes = list(deploy.included_attributes.values_list('id', flat=True))
+    if deploy.schedule:
+        attributes.extend(
+            deploy.schedule.delays.filter(attributes__isnull=False).values_list('attributes__id', flat=True)
         )
+
+    computers = set(
+        queryset.filter(Q(sync_attributes__in=attributes) | Q(tags__in=attributes)).values_list('id', flat=True)
     )
 
+    excluded = list(deploy.excluded_attributes.values_list('id', flat=True))
+    if computers and excluded:
+        computers -= set(
+            queryset.filter(Q(sync_attributes__in=excluded) | Q(tags__in=excluded)).values_list('id', flat=True)
+        )
+
+    return computers
+
+
+def get_assignment_progress(deployment_id):
+    con = get_redis_connection()
+
+    return decode_dict(con.hgetall(deployment_assignment_key(deployment_id)))
+
+
+def is_assignment_pending(progress):
+    """
+    Whether an update of the assigned computers is queued and not started yet
+    (recently enough to be trusted)
+    """
+    if progress.get('status') != ASSIGNMENT_PENDING:
+        return False
+
+    try:
+        updated_at = datetime.fromisoformat(progress['updated_at'])
+    except (KeyError, ValueError):
+        return False
+
+    return datetime.now() - updated_at < timedelta(seconds=ASSIGNMENT_PENDING_TIMEOUT)
+
+
+def set_assignment_progress(deployment_id, **kwargs):
     con = get_redis_connection()
-    key = f'migasfree:deployments:{deployment_id}:computers'
-    con.delete(key)
-    if computers:
-        con.sadd(key, *list(computers))
+    kwargs['updated_at'] = datetime.now().isoformat()
+    con.hset(deployment_assignment_key(deployment_id), mapping=kwargs)
+
+
+def assigned_computers_to_deployment(deployment_id, full=True):
+    """
+    Maintains the set of computers assigned to a deployment.
+
+    Only the difference with the stored set is applied (SADD/SREM).
+    If full is False and the previous signature is known, only the computers
+    having an attribute whose role in the deployment has changed are evaluated.
+    """
+    try:
+        deploy = Deployment.objects.select_related('schedule').get(pk=deployment_id)
+    except ObjectDoesNotExist:
+        return None
+
+    con = get_redis_connection()
+    key = deployment_computers_key(deployment_id)
+
+    set_assignment_progress(deployment_id, status=ASSIGNMENT_RUNNING, processed=0, added=0, removed=0)
+
+    signature = deployment_signature(deploy)
+    candidates = None
+    if not full and con.exists(key):
+        previous = con.hget(deployment_assignment_key(deployment_id), 'signature')
+        candidates = changed_attributes(json.loads(previous) if previous else None, signature)
+
+    if candidates is not None:
+        candidates = set(
+            Computer.objects.filter(project=deploy.project)
+            .filter(Q(sync_attributes__in=candidates) | Q(tags__in=candidates))
+            .values_list('id', flat=True)
+        )
+        candidates = list(candidates)
+        current = (
+            {item for item, member in zip(candidates, con.smismember(key, candidates), strict=True) if member}
+            if candidates
+            else set()
+        )
+    else:
+        current = set(map(int, con.smembers(key)))
+
+    computers = get_assigned_computers(deploy, candidates)
+
+    to_add = list(computers - current)
+    to_remove = list(current - computers)
+    total = len(to_add) + len(to_remove)
+
+    processed = 0
+    for operation, items in ((con.sadd, to_add), (con.srem, to_remove)):
+        for i in range(0, len(items), ASSIGNMENT_CHUNK_SIZE):
+            chunk = items[i : i + ASSIGNMENT_CHUNK_SIZE]
+            operation(key, *chunk)
+            processed += len(chunk)
+            set_assignment_progress(deployment_id, processed=processed, total=total)
+
+    set_assignment_progress(
+        deployment_id,
+        status=ASSIGNMENT_DONE,
+        added=len(to_add),
+        removed=len(to_remove),
+        processed=processed,
+        total=total,
+        computers=con.scard(key),
+        signature=json.dumps(signature),
+    )
+
+    return {'added': len(to_add), 'removed': len(to_remove)}
+
+
+@shared_task(queue='default', time_limit=600, soft_time_limit=570)
+def update_deployment_computers(deployment_id):
+    try:
+        return assigned_computers_to_deployment(deployment_id, full=False)
+    except Exception as e:
+        set_assignment_progress(deployment_id, status=ASSIGNMENT_FAILED, error=str(e))
+        raise
 
 
 @shared_task(queue='default', time_limit=1800, soft_time_limit=1740)
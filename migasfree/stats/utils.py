@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import math
 from datetime import datetime, timedelta
 from operator import gt
 
@@ -21,24 +22,114 @@ from django.conf import settings
 from django.utils import timezone
 from django_redis import get_redis_connection
 
+# computer id -> timestamp of its last message (see client.messages)
+MESSAGE_DATES_KEY = 'migasfree:watch:msg:dates'
 
-def filter_computers_by_date(comparison_operator=gt):
-    con = get_redis_connection()
 
-    result = []
-    delayed_time = timezone.localtime(timezone.now()) - timedelta(seconds=settings.MIGASFREE_SECONDS_MESSAGE_ALERT)
+def get_delayed_time():
+    return timezone.localtime(timezone.now()) - timedelta(seconds=settings.MIGASFREE_SECONDS_MESSAGE_ALERT)
 
-    computers = con.smembers('migasfree:watch:msg')
-    for computer_id in computers:
+
+def index_message_dates(con):
+    """
+    Indexes the dates of the messages stored before the sorted set existed
+    (only when the watched computers and the indexed ones differ)
+    """
+    if con.scard('migasfree:watch:msg') == con.zcard(MESSAGE_DATES_KEY):
+        return
+
+    dates = {}
+    for computer_id in con.smembers('migasfree:watch:msg'):
         date = con.hget(f'migasfree:msg:{int(computer_id)}', 'date')
-        aware_date = (
-            timezone.make_aware(
+        if date:
+            dates[int(computer_id)] = timezone.make_aware(
                 datetime.strptime(date.decode(), '%Y-%m-%dT%H:%M:%S.%f'), timezone.get_default_timezone()
-            )
-            if date
-            else None
-        )
-        if aware_date and comparison_operator(aware_date, delayed_time):
-            result.append(int(computer_id))
+            ).timestamp()
+
+    if dates:
+        con.zadd(MESSAGE_DATES_KEY, dates)
+
+
+def _score_range(comparison_operator, delayed_time):
+    """
+    gt: messages after delayed time (synchronizing now)
+    le: messages until delayed time (delayed computers)
+    """
+    if comparison_operator is gt:
+        return f'({delayed_time.timestamp()}', '+inf'
+
+    return '-inf', delayed_time.timestamp()
+
+
+def filter_computers_by_date(comparison_operator=gt, con=None):
+    con = con or get_redis_connection()
+    index_message_dates(con)
+
+    delayed_time = get_delayed_time()
+    result = [
+        int(computer_id)
+        for computer_id in con.zrangebyscore(MESSAGE_DATES_KEY, *_score_range(comparison_operator, delayed_time))
+    ]
 
     return result, delayed_time
+
+
+def computers_by_date(comparison_operator=gt, after=None, reverse=False, chunk_size=1000, con=None):
+    """
+    Computers (score, id) ordered by the date of their last message (the
+    newest first if reverse), only after the position (score, id) if given.
+    The sorted set is read in chunks (ZRANGEBYSCORE ... LIMIT), so only the
+    consumed part of it is transferred.
+    """
+    con = con or get_redis_connection()
+    index_message_dates(con)
+
+    # bounds: (score, exclusive)
+    delayed_time = get_delayed_time().timestamp()
+    if comparison_operator is gt:
+        low, high = (delayed_time, True), (math.inf, False)
+    else:
+        low, high = (-math.inf, False), (delayed_time, False)
+
+    if after is not None:
+        # ties with the position are discarded below
+        if reverse and after[0] < high[0]:
+            high = (after[0], False)
+        elif not reverse and after[0] > low[0]:
+            low = (after[0], False)
+
+    def bound(score, exclusive):
+        if math.isinf(score):
+            return '+inf' if score > 0 else '-inf'
+
+        return f'({score!r}' if exclusive else repr(score)
+
+    low, high = bound(*low), bound(*high)
+    after = after and (after[0], str(after[1]))
+
+    offset = 0
+    while True:
+        if reverse:
+            items = con.zrevrangebyscore(MESSAGE_DATES_KEY, high, low, start=offset, num=chunk_size, withscores=True)
+        else:
+            items = con.zrangebyscore(MESSAGE_DATES_KEY, low, high, start=offset, num=chunk_size, withscores=True)
+
+        for member, score in items:
+            # same order as the sorted set (by score, then by member)
+            position = (score, member.decode())
+            if after is None or (position < after if reverse else position > after):
+                yield score, int(member)
+
+        if len(items) < chunk_size:
+            return
+
+        offset += chunk_size
+
+
+def count_computers_by_date(comparison_operator=gt, con=None):
+    con = con or get_redis_connection()
+    index_message_dates(con)
+
+    delayed_time = get_delayed_time()
+
+    return con.zcount(MESSAGE_DATES_KEY, *_score_range(comparison_operator, delayed_time)), delayed_time
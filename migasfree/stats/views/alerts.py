@@ -20,7 +20,7 @@ from rest_framework.decorators import permission_classes
 from rest_framework.response import Response
 
 from ...mixins import DatabaseCheckMixin
-from ..tasks import get_alerts
+from ..tasks import active_scopes, add_alerts, alerts_scope, get_alerts
 
 
 @extend_schema(tags=['stats'])
@@ -56,4 +56,8 @@ class AlertsViewSet(DatabaseCheckMixin, viewsets.ViewSet):
         ],
     )
     def list(self, request):
-        return Response(get_alerts(), status=status.HTTP_200_OK)
+        scope = alerts_scope(request.user.userprofile)
+        if scope not in active_scopes():
+            add_alerts(scope)  # not kept up to date by the alerts task
+
+        return Response(get_alerts(scope), status=status.HTTP_200_OK)
@@ -30,6 +30,7 @@ from rest_framework.response import Response
 from ...client.models import Computer
 from ...core.models import Deployment, Project, ScheduleDelay
 from ...utils import time_horizon
+from ..tasks import get_assignment_progress
 
 
 @extend_schema(tags=['stats'])
@@ -48,6 +49,18 @@ class DeploymentStatsViewSet(viewsets.ViewSet):
     def assigned_computers(self, request, pk=None):
         return Response(self._get_deployment_set(pk, 'computers'), status=status.HTTP_200_OK)
 
+    @extend_schema(description='Progress of the last update of the computers assigned to the deployment.')
+    @action(methods=['get'], detail=True, url_path='computers/assignment')
+    def assignment(self, request, pk=None):
+        deploy = get_object_or_404(Deployment, pk=pk)
+        progress = get_assignment_progress(deploy.id)
+        progress.pop('signature', None)
+        for field in ('processed', 'total', 'added', 'removed', 'computers'):
+            if field in progress:
+                progress[field] = int(progress[field])
+
+        return Response(progress, status=status.HTTP_200_OK)
+
     @action(methods=['get'], detail=True, url_path='computers/status/ok')
     def computers_with_ok_status(self, request, pk=None):
         return Response(self._get_deployment_set(pk, 'ok'), status=status.HTTP_200_OK)
@@ -2,11 +2,13 @@ import uuid
 from datetime import datetime
 
 import pytest
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import make_aware
 
 from migasfree.client.models import Computer
-from migasfree.core.models import Platform, Project
+from migasfree.core.models import Attribute, Platform, Project, Property
 
 
 @pytest.mark.django_db
@@ -77,3 +79,29 @@ class TestComputerModel(TestCase):
             {'year': 2022, 'month': 1, 'project_id': self.project.id, 'count': 1},
             {'year': 2023, 'month': 1, 'project_id': self.project.id, 'count': 1},
         ]
+
+    def test_update_sync_attributes_applies_only_differences(self):
+        prop = Property.objects.create(prefix='ORG', name='ORGANIZATION', enabled=True, kind='N', sort='client')
+        att_a = Attribute.objects.create(property_att=prop, value='A')
+        att_b = Attribute.objects.create(property_att=prop, value='B')
+        att_c = Attribute.objects.create(property_att=prop, value='C')
+        computer = Computer.objects.create(name='PC1', project=self.project, uuid=str(uuid.uuid4()))
+        computer.sync_attributes.add(att_a, att_b)
+        through = Computer.sync_attributes.through
+        kept = through.objects.get(computer=computer, attribute=att_a).pk
+
+        computer.update_sync_attributes([att_a.id, att_c.id, att_c.id])
+
+        assert set(computer.sync_attributes.values_list('id', flat=True)) == {att_a.id, att_c.id}
+        assert through.objects.get(computer=computer, attribute=att_a).pk == kept
+
+    def test_update_sync_attributes_unchanged(self):
+        prop = Property.objects.create(prefix='ORG', name='ORGANIZATION', enabled=True, kind='N', sort='client')
+        att_a = Attribute.objects.create(property_att=prop, value='A')
+        computer = Computer.objects.create(name='PC1', project=self.project, uuid=str(uuid.uuid4()))
+        computer.sync_attributes.add(att_a)
+
+        with CaptureQueriesContext(connection) as context:
+            computer.update_sync_attributes([att_a.id])
+
+        assert not [query for query in context.captured_queries if not query['sql'].startswith(('SELECT', 'EXPLAIN'))]
@@ -0,0 +1,82 @@
+import uuid
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from migasfree.client.models import Computer, ComputerIdentity
+from migasfree.client.views.safe import get_computer
+from migasfree.core.models import Platform, Project
+from migasfree.utils import uuid_change_format
+
+
+class TestComputerIdentity(TestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', platform=self.platform, pms='apt', architecture='amd64')
+        self.computer = Computer.objects.create(
+            name='PC1', project=self.project, uuid='12345678-1234-1234-1234-123456789012'
+        )
+        self.computer.mac_address = '001122334455AABBCCDDEEFF'
+        self.computer.save()
+
+    def identities(self, computer):
+        return set(computer.identities.values_list('kind', 'value'))
+
+    def test_identities_are_maintained_on_save(self):
+        self.assertEqual(
+            self.identities(self.computer),
+            {
+                (ComputerIdentity.KIND_UUID, '12345678-1234-1234-1234-123456789012'),
+                (ComputerIdentity.KIND_SWAPPED_UUID, '78563412-3412-3412-1234-123456789012'),
+                (ComputerIdentity.KIND_MAC, '001122334455'),
+                (ComputerIdentity.KIND_MAC, 'AABBCCDDEEFF'),
+                (ComputerIdentity.KIND_NAME, 'PC1'),
+            },
+        )
+
+        self.computer.mac_address = '001122334455'
+        self.computer.update_name('PC2')
+
+        identities = self.identities(self.computer)
+        self.assertNotIn((ComputerIdentity.KIND_MAC, 'AABBCCDDEEFF'), identities)
+        self.assertNotIn((ComputerIdentity.KIND_NAME, 'PC1'), identities)
+        self.assertIn((ComputerIdentity.KIND_NAME, 'PC2'), identities)
+
+    def test_get_computer_by_uuid_forms(self):
+        self.assertEqual(get_computer(self.computer.uuid, 'other'), self.computer)
+        self.assertEqual(get_computer(uuid_change_format(self.computer.uuid), 'other'), self.computer)
+
+    def test_get_computer_by_individual_mac_address(self):
+        self.assertEqual(get_computer('00000000-0000-0000-0000-aabbccddeeff', None), self.computer)
+        # MAC addresses are not matched across boundaries
+        self.assertIsNone(get_computer('00000000-0000-0000-0000-445566778899', None))
+
+    def test_get_computer_by_ambiguous_mac_address(self):
+        other = Computer.objects.create(name='PC3', project=self.project, uuid=str(uuid.uuid4()))
+        other.mac_address = 'AABBCCDDEEFF'
+        other.save()
+
+        self.assertIsNone(get_computer('00000000-0000-0000-0000-AABBCCDDEEFF', None))
+        self.assertEqual(get_computer('00000000-0000-0000-0000-AABBCCDDEEFF', 'PC3'), other)
+
+    def test_get_computer_by_name(self):
+        self.assertEqual(get_computer(str(uuid.uuid4()), 'PC1'), self.computer)
+
+        Computer.objects.create(name='PC1', project=self.project, uuid=str(uuid.uuid4()))
+
+        self.assertIsNone(get_computer(str(uuid.uuid4()), 'PC1'))
+
+    def test_resolution_cost_does_not_grow_with_fleet(self):
+        for fleet in (10, 200):
+            Computer.objects.bulk_create(
+                [Computer(name=f'PC-{fleet}-{i}', project=self.project, uuid=str(uuid.uuid4())) for i in range(fleet)]
+            )
+
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(get_computer(self.computer.uuid, 'PC1'), self.computer)
+                self.assertIsNone(get_computer(str(uuid.uuid4()), 'unknown'))
+
+            # profilers (silk) may add their own EXPLAIN queries
+            queries = [query for query in context.captured_queries if not query['sql'].startswith('EXPLAIN')]
+            self.assertEqual(len(queries), 2)
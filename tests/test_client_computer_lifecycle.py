@@ -0,0 +1,180 @@
+import uuid
+from unittest.mock import patch
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from migasfree.client.models import Computer, Migration, PackageHistory, StatusLog
+from migasfree.client.tasks import inventory_digest_key
+from migasfree.core.models import (
+    Attribute,
+    Deployment,
+    Package,
+    Platform,
+    Project,
+    Property,
+    ServerAttribute,
+    UserProfile,
+)
+from migasfree.core.services.computer_lifecycle import ComputerLifecycleService
+from migasfree.device.models import Capability, Connection, Device, Logical, Manufacturer, Model, Type
+
+
+class TestComputerLifecycle(APITestCase):
+    def setUp(self):
+        Property.objects.create(prefix='CID', name='Computer ID', sort='basic')
+        tag_property = Property.objects.create(prefix='TAG', name='Tag', sort='server', kind='N')
+        self.tag = ServerAttribute.objects.create(property_att=tag_property, value='LAB')
+
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.new_project = Project.objects.create(
+            name='Vitalinux2', pms='apt', architecture='amd64', platform=self.platform
+        )
+        self.computers = [
+            Computer.objects.create(name=f'PC{i}', project=self.project, uuid=str(uuid.uuid4())) for i in range(4)
+        ]
+        for computer in self.computers:
+            computer.tags.add(self.tag)
+
+        device_type = Type.objects.create(name='PRINTER')
+        connection_ = Connection.objects.create(name='TCP', device_type=device_type)
+        model = Model.objects.create(
+            name='LaserJet', manufacturer=Manufacturer.objects.create(name='HP'), device_type=device_type
+        )
+        self.logical = Logical.objects.create(
+            device=Device.objects.create(name='Printer', model=model, connection=connection_),
+            capability=Capability.objects.create(name='COLOR'),
+        )
+        self.logical.attributes.add(*[computer.get_cid_attribute() for computer in self.computers])
+
+        with patch('migasfree.stats.tasks.update_deployment_computers.apply_async'):
+            self.deployment = Deployment.objects.create(name='Deploy', project=self.project)
+            self.deployment.included_attributes.add(self.computers[0].get_cid_attribute())
+
+        self.user = UserProfile.objects.create(
+            username='test', email='test@test.com', password='test', is_superuser=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def ids(self, computers):
+        return Computer.objects.filter(id__in=[computer.id for computer in computers])
+
+    def test_change_status_as_save(self):
+        """bulk changes have the same effects as saving each computer"""
+        self.computers[0].change_status('unsubscribed')
+        expected_cid = set(Attribute.objects.filter(logical=self.logical).values_list('id', flat=True))
+
+        with patch.object(Deployment, 'update_assigned_computers') as update_assigned_computers:
+            changed = ComputerLifecycleService.change_status(self.ids(self.computers[1:3]), 'unsubscribed')
+
+        self.assertEqual(changed, 2)
+        self.assertEqual(
+            list(Computer.objects.filter(status='unsubscribed').order_by('id').values_list('id', flat=True)),
+            [computer.id for computer in self.computers[:3]],
+        )
+        self.assertEqual(
+            StatusLog.objects.filter(status='unsubscribed').count(),
+            3,
+        )
+        self.assertEqual(list(Computer.objects.filter(tags=self.tag)), [self.computers[3]])
+        self.assertEqual(
+            set(Attribute.objects.filter(logical=self.logical).values_list('id', flat=True)),
+            expected_cid - {self.computers[1].get_cid_attribute().id, self.computers[2].get_cid_attribute().id},
+        )
+        update_assigned_computers.assert_not_called()  # the deployment was released by the first save
+
+    def test_release_deployments(self):
+        with patch.object(Deployment, 'update_assigned_computers') as update_assigned_computers:
+            ComputerLifecycleService.change_status(self.ids(self.computers), 'available')
+
+        update_assigned_computers.assert_called_once()
+        self.assertFalse(self.deployment.included_attributes.exists())
+
+    def test_unchanged_status(self):
+        self.assertEqual(ComputerLifecycleService.change_status(self.ids(self.computers), self.computers[0].status), 0)
+        self.assertEqual(StatusLog.objects.count(), len(self.computers))  # on creation
+        self.assertEqual(Computer.objects.filter(tags=self.tag).count(), len(self.computers))
+
+        with self.assertRaises(ValueError):
+            ComputerLifecycleService.change_status(self.ids(self.computers), 'unknown_status')
+
+    def test_change_status_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            ComputerLifecycleService.change_status(Computer.objects.all(), 'unsubscribed')
+
+        queries = [query for query in context.captured_queries if not query['sql'].startswith('EXPLAIN')]
+        self.assertLess(len(queries), 20)
+
+    def test_change_project(self):
+        package = Package.objects.create(
+            fullname='vim_1.0_amd64.deb',
+            name='vim',
+            version='1.0',
+            architecture='amd64',
+            project=self.project,
+            store=None,
+        )
+        PackageHistory.objects.create(computer=self.computers[0], package=package)
+        self.computers[1].update_project(self.new_project)
+
+        changed = ComputerLifecycleService.change_project(self.ids(self.computers[:2]), self.new_project)
+
+        self.assertEqual(changed, 1)
+        self.assertEqual(Computer.objects.filter(project=self.new_project).count(), 2)
+        self.assertEqual(
+            list(Migration.objects.values_list('computer', 'project')), [(self.computers[0].id, self.new_project.id)]
+        )
+        self.assertIsNotNone(PackageHistory.objects.get().uninstall_date)
+
+    def test_lifecycle_view(self):
+        con = get_redis_connection()
+        con.set(inventory_digest_key(self.computers[0].id), 'digest')
+
+        response = self.client.post(
+            reverse('computer-lifecycle'),
+            {
+                'computers': [computer.id for computer in self.computers[:2]],
+                'status': 'reserved',
+                'reset_software_inventory': True,
+            },
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'computers': 2, 'status': 2, 'software_inventory': 0})
+        self.assertEqual(Computer.objects.filter(status='reserved').count(), 2)
+        self.assertFalse(con.exists(inventory_digest_key(self.computers[0].id)))
+
+    def test_lifecycle_view_by_filter(self):
+        self.computers[0].change_status('available')
+
+        response = self.client.post(
+            f'{reverse("computer-lifecycle")}?status=available', {'status': 'unsubscribed'}, format='json'
+        )
+
+        self.assertEqual(response.json(), {'computers': 1, 'status': 1})
+        self.assertEqual(Computer.objects.get(status='unsubscribed'), self.computers[0])
+
+    def test_lifecycle_view_errors(self):
+        url = reverse('computer-lifecycle')
+
+        self.assertEqual(self.client.post(url, {'status': 'reserved'}, format='json').status_code, 400)
+        # params that do not filter the computers
+        for params in ('format=json', 'page_size=10', 'ordering=id', 'status='):
+            self.assertEqual(
+                self.client.post(f'{url}?{params}', {'status': 'reserved'}, format='json').status_code, 400
+            )
+        self.assertFalse(Computer.objects.filter(status='reserved').exists())
+        self.assertEqual(
+            self.client.post(url, {'computers': [self.computers[0].id], 'status': 'x'}, format='json').status_code,
+            400,
+        )
+        self.assertEqual(
+            self.client.post(url, {'computers': [self.computers[0].id], 'project': 999}, format='json').status_code,
+            404,
+        )
@@ -0,0 +1,158 @@
+import uuid
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from migasfree.client.models import Computer
+from migasfree.core.models import Attribute, Platform, Project, Property, UserProfile
+from migasfree.core.services.logical_devices import LogicalDeviceAssignmentService
+from migasfree.core.services.sync_plan import plan_key
+from migasfree.device.models import Capability, Connection, Device, Driver, Logical, Manufacturer, Model, Type
+
+
+class TestComputerLogicalDevices(APITestCase):
+    def setUp(self):
+        Property.objects.create(prefix='CID', name='Computer ID', sort='basic')
+
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.other_project = Project.objects.create(
+            name='Windows', pms='winget', architecture='x64', platform=self.platform
+        )
+        self.computers = [
+            Computer.objects.create(name=f'PC{i}', project=self.project, uuid=str(uuid.uuid4())) for i in range(3)
+        ]
+
+        device_type = Type.objects.create(name='PRINTER')
+        connection = Connection.objects.create(name='TCP', device_type=device_type)
+        self.model = Model.objects.create(
+            name='LaserJet', manufacturer=Manufacturer.objects.create(name='HP'), device_type=device_type
+        )
+        self.model.connections.add(connection)
+        device = Device.objects.create(name='Lab printer', model=self.model, connection=connection)
+
+        self.color = Capability.objects.create(name='COLOR')
+        self.duplex = Capability.objects.create(name='DUPLEX')
+        self.logical_color = Logical.objects.create(device=device, capability=self.color)
+        self.logical_duplex = Logical.objects.create(device=device, capability=self.duplex)
+        Driver.objects.create(model=self.model, project=self.project, capability=self.color)
+        Driver.objects.create(model=self.model, project=self.project, capability=self.duplex)
+        Driver.objects.create(model=self.model, project=self.other_project, capability=self.color)
+
+        self.user = UserProfile.objects.create(
+            username='test', email='test@test.com', password='test', is_superuser=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def assigned(self, computer):
+        return set(Logical.objects.filter(attributes=computer.get_cid_attribute()).values_list('id', flat=True))
+
+    def test_missing_drivers(self):
+        other = Computer.objects.create(name='PC9', project=self.other_project, uuid=str(uuid.uuid4()))
+
+        errors = LogicalDeviceAssignmentService.missing_drivers(
+            [*self.computers, other], [self.logical_color.id, self.logical_duplex.id, 999]
+        )
+
+        self.assertEqual(len(errors), 2)
+        self.assertIn('DUPLEX', errors[0])
+        self.assertIn('Windows', errors[0])
+        self.assertIn('999', errors[1])
+
+    def test_update(self):
+        computer = self.computers[0]
+        result = LogicalDeviceAssignmentService.update([computer], [self.logical_color.id, self.logical_duplex.id])
+
+        self.assertEqual(result, {'assigned': 2, 'unassigned': 0})
+        self.assertEqual(self.assigned(computer), {self.logical_color.id, self.logical_duplex.id})
+
+        result = LogicalDeviceAssignmentService.update([computer], [self.logical_duplex.id], replace=True)
+
+        self.assertEqual(result, {'assigned': 0, 'unassigned': 1})
+        self.assertEqual(self.assigned(computer), {self.logical_duplex.id})
+
+    def test_cid_attributes_in_batch(self):
+        Attribute.objects.filter(property_att__prefix='CID').delete()
+        cid = self.computers[0].get_cid_attribute()
+
+        with CaptureQueriesContext(connection) as context:
+            cid_attributes = LogicalDeviceAssignmentService.cid_attributes(self.computers)
+
+        # profilers (silk) may add their own queries
+        self.assertEqual(len([query for query in context.captured_queries if query['sql'].startswith('SELECT')]), 3)
+        self.assertEqual(cid_attributes[self.computers[0].id], cid.id)
+        self.assertEqual(cid_attributes, {computer.id: computer.get_cid_attribute().id for computer in self.computers})
+
+    def test_update_invalidates_sync_plans(self):
+        con = get_redis_connection()
+        con.hset(plan_key(self.computers[0].id), 'digest', '{}')
+
+        LogicalDeviceAssignmentService.update([self.computers[0]], [self.logical_color.id])
+
+        self.assertFalse(con.exists(plan_key(self.computers[0].id)))
+
+    def test_partial_update(self):
+        computer = self.computers[0]
+        url = reverse('computer-detail', kwargs={'pk': computer.pk})
+
+        response = self.client.patch(url, {'assigned_logical_devices_to_cid': [self.logical_color.id]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.assigned(computer), {self.logical_color.id})
+
+        response = self.client.patch(url, {'assigned_logical_devices_to_cid': []}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.assigned(computer), set())
+
+    def test_partial_update_without_driver(self):
+        computer = Computer.objects.create(name='PC9', project=self.other_project, uuid=str(uuid.uuid4()))
+
+        response = self.client.patch(
+            reverse('computer-detail', kwargs={'pk': computer.pk}),
+            {'assigned_logical_devices_to_cid': [self.logical_color.id, self.logical_duplex.id]},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('DUPLEX', response.json()['error'])
+        self.assertEqual(self.assigned(computer), set())
+
+    def test_bulk_assignment(self):
+        url = reverse('computer-logical_devices')
+        computers = [computer.id for computer in self.computers]
+        LogicalDeviceAssignmentService.update([self.computers[0]], [self.logical_duplex.id])
+
+        response = self.client.post(
+            url, {'computers': computers, 'assign': [self.logical_color.id, self.logical_duplex.id]}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'assigned': 5, 'unassigned': 0})
+        for computer in self.computers:
+            self.assertEqual(self.assigned(computer), {self.logical_color.id, self.logical_duplex.id})
+
+        response = self.client.post(url, {'computers': computers, 'unassign': [self.logical_color.id]}, format='json')
+
+        self.assertEqual(response.json(), {'assigned': 0, 'unassigned': 3})
+        self.assertEqual(self.assigned(self.computers[1]), {self.logical_duplex.id})
+
+    def test_bulk_assignment_errors(self):
+        url = reverse('computer-logical_devices')
+        other = Computer.objects.create(name='PC9', project=self.other_project, uuid=str(uuid.uuid4()))
+
+        response = self.client.post(
+            url, {'computers': [self.computers[0].id, other.id], 'assign': [self.logical_duplex.id]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.assigned(self.computers[0]), set())
+
+        response = self.client.post(url, {'computers': [999], 'assign': [self.logical_color.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.post(url, {'computers': ['x']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
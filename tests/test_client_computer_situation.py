@@ -0,0 +1,134 @@
+import uuid
+from datetime import UTC, datetime
+from unittest.mock import patch
+
+from django.conf import settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from migasfree.client.models import Computer, Migration, StatusLog
+from migasfree.core.models import Platform, Project, UserProfile
+from migasfree.core.services.computer_lifecycle import ComputerLifecycleService
+
+
+def day(number):
+    return datetime(2026, 1, number, 12, 0, 0, tzinfo=UTC)
+
+
+class TestComputerSituation(APITestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.new_project = Project.objects.create(
+            name='Vitalinux2', pms='apt', architecture='amd64', platform=self.platform
+        )
+
+        with patch('django.utils.timezone.now', return_value=day(1)):
+            self.computers = [
+                Computer.objects.create(name=f'PC{i}', project=self.project, uuid=str(uuid.uuid4())) for i in range(2)
+            ]
+
+        computer = self.computers[0]
+        self.migrations = []
+        for date, project in ((day(2), self.project), (day(5), self.new_project)):
+            with patch('django.utils.timezone.now', return_value=date):
+                self.migrations.append(Migration.objects.create(computer, project))
+
+        computer.status = 'reserved'
+        with patch('django.utils.timezone.now', return_value=day(3)):
+            StatusLog.objects.create(computer)
+
+        self.user = UserProfile.objects.create(
+            username='test', email='test@test.com', password='test', is_superuser=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_validity_is_maintained_on_insert(self):
+        self.assertEqual(
+            list(
+                Migration.objects.filter(computer=self.computers[0]).order_by('id').values_list('valid_to', flat=True)
+            ),
+            [day(5), None],
+        )
+        self.assertEqual(
+            list(StatusLog.objects.filter(computer=self.computers[0]).order_by('id').values_list('status', 'valid_to')),
+            [('assigned', day(3)), ('reserved', None)],
+        )
+
+    def test_situation(self):
+        computer_id = self.computers[0].id
+
+        self.assertIsNone(Migration.situation(computer_id, day(1), None))
+        self.assertEqual(Migration.situation(computer_id, day(2), None), self.migrations[0])
+        self.assertEqual(Migration.situation(computer_id, day(4), None), self.migrations[0])
+        self.assertEqual(Migration.situation(computer_id, day(6), None), self.migrations[1])
+
+        self.assertEqual(StatusLog.situation(computer_id, day(2), None).status, 'assigned')
+        self.assertEqual(StatusLog.situation(computer_id, day(4), None).status, 'reserved')
+
+    def test_fleet_situation(self):
+        self.assertEqual(
+            sorted(StatusLog.at(day(2)).values_list('computer_id', 'status')),
+            [(self.computers[0].id, 'assigned'), (self.computers[1].id, 'assigned')],
+        )
+        self.assertEqual(list(Migration.at(day(4)).values_list('project_id', flat=True)), [self.project.id])
+
+    def test_bulk_changes_close_the_previous_situation(self):
+        with patch('django.utils.timezone.now', return_value=day(7)):
+            ComputerLifecycleService.change_status(Computer.objects.all(), 'in repair')
+            ComputerLifecycleService.change_project(Computer.objects.all(), self.new_project)
+
+        self.assertEqual(
+            sorted(StatusLog.at(day(8)).values_list('computer_id', 'status')),
+            [(self.computers[0].id, 'in repair'), (self.computers[1].id, 'in repair')],
+        )
+        self.assertEqual(StatusLog.situation(self.computers[0].id, day(6), None).status, 'reserved')
+        self.assertEqual(Migration.objects.get(id=self.migrations[1].id).valid_to, day(7))
+
+    def test_situation_view(self):
+        url = reverse('computer-situation', kwargs={'pk': self.computers[0].pk})
+
+        response = self.client.get(url, {'date': '2026-01-04T12:00:00'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['project']['id'], self.project.id)
+        self.assertEqual(response.json()['status'], 'reserved')
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.json()['project']['id'], self.new_project.id)
+
+        response = self.client.get(url, {'date': 'x'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_fleet_situation_view(self):
+        response = self.client.get(reverse('computer-fleet_situation'), {'date': '2026-01-06T12:00:00'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()['results'],
+            [
+                {'id': self.computers[0].id, 'project': self.new_project.id, 'status': 'reserved'},
+                {'id': self.computers[1].id, 'project': None, 'status': 'assigned'},
+            ],
+        )
+
+    def test_fleet_situation_view_without_status_logs(self):
+        StatusLog.objects.filter(computer=self.computers[1]).delete()
+        with patch('django.utils.timezone.now', return_value=day(7)):
+            new_computer = Computer.objects.create(name='PC2', project=self.project, uuid=str(uuid.uuid4()))
+        StatusLog.objects.filter(computer=new_computer).delete()
+
+        response = self.client.get(reverse('computer-fleet_situation'), {'date': '2026-01-06T12:00:00'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item['id'], item['status']) for item in response.json()['results']],
+            [
+                (self.computers[0].id, 'reserved'),
+                (self.computers[1].id, settings.MIGASFREE_DEFAULT_COMPUTER_STATUS),
+                (new_computer.id, None),  # not created yet
+            ],
+        )
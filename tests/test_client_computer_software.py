@@ -0,0 +1,163 @@
+import uuid
+from datetime import UTC, datetime
+
+from django.db import connection
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from migasfree.client.models import Computer, PackageHistory
+from migasfree.client.tasks import inventory_digest_key
+from migasfree.core.models import Package, Platform, Project, UserProfile
+
+
+class TestComputerSoftware(APITestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.computers = [
+            Computer.objects.create(name=f'PC{i}', project=self.project, uuid=str(uuid.uuid4())) for i in range(3)
+        ]
+
+        self.packages = {
+            (name, version): Package.objects.create(
+                fullname=f'{name}_{version}_amd64.deb',
+                name=name,
+                version=version,
+                architecture='amd64',
+                project=self.project,
+                store=None,
+            )
+            for name, version in (('vim', '1.0'), ('vim', '2.0'), ('nano', '1.0'), ('zsh', '1.0'))
+        }
+
+        self.install_date = datetime(2026, 1, 10, 8, 30, 15, 123456, tzinfo=UTC)
+        self.uninstall_date = datetime(2026, 3, 1, 12, 0, 0, tzinfo=UTC)
+        computer = self.computers[0]
+        for key in (('vim', '1.0'), ('nano', '1.0'), ('zsh', '1.0')):
+            PackageHistory.objects.create(computer=computer, package=self.packages[key])
+        PackageHistory.objects.update(install_date=self.install_date)
+        PackageHistory.objects.filter(package=self.packages[('zsh', '1.0')]).update(uninstall_date=self.uninstall_date)
+
+        PackageHistory.objects.create(computer=self.computers[1], package=self.packages[('vim', '2.0')])
+        PackageHistory.objects.create(computer=self.computers[2], package=self.packages[('vim', '1.0')])
+
+        self.user = UserProfile.objects.create(
+            username='test', email='test@test.com', password='test', is_superuser=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def get(self, url_name, params=None, computer=None):
+        computer = computer or self.computers[0]
+        response = self.client.get(reverse(url_name, kwargs={'pk': computer.pk}), params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return response.json()
+
+    def test_inventory(self):
+        data = self.get('computer-software_inventory')
+
+        self.assertEqual(
+            data,
+            [
+                {'id': self.packages[('nano', '1.0')].id, 'name': 'nano_1.0_amd64.deb'},
+                {'id': self.packages[('vim', '1.0')].id, 'name': 'vim_1.0_amd64.deb'},
+            ],
+        )
+        self.assertEqual([item['name'] for item in data], self.computers[0].get_software_inventory())
+
+    def test_inventory_search_and_pagination(self):
+        data = self.get('computer-software_inventory', {'package': 'VIM', 'page_size': 1})
+
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'], [{'id': self.packages[('vim', '1.0')].id, 'name': 'vim_1.0_amd64.deb'}])
+
+        data = self.get('computer-software_inventory', {'page_size': 1, 'page': 2})
+
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([item['name'] for item in data['results']], ['vim_1.0_amd64.deb'])
+
+    def test_package_search_uses_trigram_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+        plan = Package.objects.filter(fullname__icontains='vim').explain()
+
+        self.assertIn('package_fullname_trgm_idx', plan)
+
+    def test_delete_inventory(self):
+        con = get_redis_connection()
+        con.set(inventory_digest_key(self.computers[0].id), 'digest')
+
+        response = self.client.delete(reverse('computer-software_inventory', kwargs={'pk': self.computers[0].pk}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), [])
+        # the next inventory sent by the computer is not skipped
+        self.assertFalse(con.exists(inventory_digest_key(self.computers[0].id)))
+
+    def test_history(self):
+        data = self.get('computer-software_history')
+
+        self.assertEqual(
+            data,
+            {
+                '2026-03-01T12:00:00': [
+                    {'id': self.packages[('zsh', '1.0')].id, 'name': 'zsh_1.0_amd64.deb', 'mode': '-'}
+                ],
+                '2026-01-10T08:30:15': [
+                    {'id': self.packages[('nano', '1.0')].id, 'name': 'nano_1.0_amd64.deb', 'mode': '+'},
+                    {'id': self.packages[('vim', '1.0')].id, 'name': 'vim_1.0_amd64.deb', 'mode': '+'},
+                    {'id': self.packages[('zsh', '1.0')].id, 'name': 'zsh_1.0_amd64.deb', 'mode': '+'},
+                ],
+            },
+        )
+        self.assertEqual(list(data), ['2026-03-01T12:00:00', '2026-01-10T08:30:15'])
+
+    def test_history_filters_and_pagination(self):
+        data = self.get('computer-software_history', {'package': 'zsh', 'page': 1})
+
+        self.assertEqual(
+            data['results'],
+            [
+                {
+                    'date': '2026-03-01T12:00:00',
+                    'id': self.packages[('zsh', '1.0')].id,
+                    'name': 'zsh_1.0_amd64.deb',
+                    'mode': '-',
+                },
+                {
+                    'date': '2026-01-10T08:30:15',
+                    'id': self.packages[('zsh', '1.0')].id,
+                    'name': 'zsh_1.0_amd64.deb',
+                    'mode': '+',
+                },
+            ],
+        )
+
+        data = self.get('computer-software_history', {'date__gte': '2026-02-01', 'date__lt': '2026-04-01'})
+
+        self.assertEqual(list(data), ['2026-03-01T12:00:00'])
+
+        response = self.client.get(
+            reverse('computer-software_history', kwargs={'pk': self.computers[0].pk}), {'date__gte': 'x'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_computers_with_package(self):
+        url = reverse('computer-list')
+
+        response = self.client.get(url, {'installed_package_name': 'vim', 'installed_package_version': '1.0'})
+        self.assertEqual(
+            sorted(item['id'] for item in response.json()['results']), [self.computers[0].id, self.computers[2].id]
+        )
+
+        response = self.client.get(url, {'installed_package_name': 'vim'})
+        self.assertEqual(len(response.json()['results']), 3)
+
+        response = self.client.get(url, {'installed_package_name': 'zsh'})  # uninstalled
+        self.assertEqual(response.json()['results'], [])
+
+        response = self.client.get(url, {'installed_package_version': '2.0'})
+        self.assertEqual([item['id'] for item in response.json()['results']], [self.computers[1].id])
@@ -0,0 +1,189 @@
+import importlib
+import uuid
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from migasfree.client.models import (
+    Computer,
+    ComputerSummary,
+    Error,
+    Fault,
+    FaultDefinition,
+    Synchronization,
+    User,
+)
+from migasfree.core.models import Attribute, Platform, Project, Property, UserProfile
+from migasfree.hardware.models import Configuration, Node
+
+backfill = importlib.import_module('migasfree.client.migrations.0009_computer_summary')
+
+
+class SummaryMixin:
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.computer = Computer.objects.create(name='PC1', project=self.project, uuid=str(uuid.uuid4()))
+
+    def add_hardware(self, computer, vendor='Dell Inc.', chassis='notebook', width=64):
+        root = Node.objects.create(
+            data={'computer': computer, 'level': 1, 'name': 'computer', 'class_name': 'system', 'vendor': vendor}
+        )
+        Configuration.objects.create(node=root, name='chassis', value=chassis)
+        Node.objects.create(
+            data={
+                'computer': computer,
+                'level': 2,
+                'name': 'cpu',
+                'class_name': 'processor',
+                'width': width,
+                'parent': root,
+            }
+        )
+        Node.objects.create(
+            data={
+                'computer': computer,
+                'level': 2,
+                'name': 'network',
+                'class_name': 'network',
+                'description': 'Ethernet interface',
+                'serial': '00:11:22:33:44:55',
+                'parent': root,
+            }
+        )
+        computer.update_hardware_resume()
+
+
+class TestComputerSummary(SummaryMixin, TestCase):
+    def summary(self):
+        return ComputerSummary.objects.get(computer=self.computer)
+
+    def test_created_with_computer(self):
+        summary = self.summary()
+
+        self.assertEqual(summary.product_system, '')
+        self.assertIsNone(summary.sync_pms_status_ok)
+        self.assertEqual((summary.unchecked_errors, summary.unchecked_faults, summary.attributes), (0, 0, 0))
+
+    def test_hardware_facts(self):
+        self.add_hardware(self.computer)
+
+        summary = self.summary()
+        self.assertEqual(summary.product_system, 'laptop')
+        self.assertEqual(summary.architecture, 64)
+
+    def test_errors_and_faults(self):
+        error = Error.objects.create(self.computer, self.project, 'error')
+        definition = FaultDefinition.objects.create(name='One', enabled=True)
+        Fault.objects.create(self.computer, definition, 'fault')
+        Fault.objects.create(self.computer, definition, 'fault').checked_ok()
+
+        self.assertEqual((self.summary().unchecked_errors, self.summary().unchecked_faults), (1, 1))
+
+        error.checked_ok()
+        self.assertEqual(self.summary().unchecked_errors, 0)
+
+        Fault.objects.all().delete()
+        self.assertEqual(self.summary().unchecked_faults, 0)
+
+    def test_sync(self):
+        property_ = Property.objects.create(prefix='ORG', name='ORGANIZATION', enabled=True, kind='N', sort='client')
+        self.computer.sync_attributes.add(
+            Attribute.objects.create(property_att=property_, value='A'),
+            Attribute.objects.create(property_att=property_, value='B'),
+        )
+        self.computer.update_sync_user(User.objects.create('user'))
+
+        Synchronization.objects.create(self.computer, pms_status_ok=True)
+        self.assertTrue(self.summary().sync_pms_status_ok)
+        self.assertEqual(self.summary().attributes, 2)
+
+        Synchronization.objects.create(self.computer, pms_status_ok=False)
+        self.assertFalse(self.summary().sync_pms_status_ok)
+
+    def test_backfill_matches_refresh(self):
+        virtual = Computer.objects.create(name='VM1', project=self.project, uuid=str(uuid.uuid4()))
+        desktop = Computer.objects.create(name='PC2', project=self.project, uuid=str(uuid.uuid4()))
+        docker = Computer.objects.create(
+            name='DOCKER', project=self.project, uuid='00000000-0000-0000-0000-0242ac110002'
+        )
+        self.add_hardware(self.computer)
+        self.add_hardware(virtual, vendor='QEMU', chassis='other', width=32)
+        self.add_hardware(desktop, chassis='desktop')
+        docker.update_hardware_resume()  # not privileged docker without network card
+        Error.objects.create(self.computer, self.project, 'error')
+
+        expected = set(ComputerSummary.objects.values_list())
+        ComputerSummary.objects.all().delete()
+
+        with connection.schema_editor() as schema_editor:
+            backfill.backfill_summaries(None, schema_editor)
+
+        self.assertEqual(set(ComputerSummary.objects.values_list()), expected)
+        self.assertEqual(
+            dict(ComputerSummary.objects.values_list('computer', 'product_system')),
+            {self.computer.id: 'laptop', virtual.id: 'virtual', desktop.id: 'desktop', docker.id: 'docker'},
+        )
+
+
+class TestComputerSummaryDeletion(SummaryMixin, TransactionTestCase):
+    def test_delete_computer_with_errors_and_faults(self):
+        Property.objects.create(prefix='CID', name='Computer ID', sort='basic')
+        Error.objects.create(self.computer, self.project, 'error')
+        Fault.objects.create(self.computer, FaultDefinition.objects.create(name='One', enabled=True), 'fault')
+
+        self.computer.delete()
+
+        self.assertFalse(Computer.objects.exists())
+        self.assertFalse(ComputerSummary.objects.exists())
+
+
+class TestComputerSummaryViews(SummaryMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = UserProfile.objects.create(
+            username='test', email='test@test.com', password='test', is_superuser=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.virtual = Computer.objects.create(name='VM1', project=self.project, uuid=str(uuid.uuid4()))
+        self.add_hardware(self.computer)
+        self.add_hardware(self.virtual, vendor='QEMU', chassis='other', width=32)
+
+    def list_queries(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('computer-list'), params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # profilers (silk) may add their own queries
+        queries = [query['sql'] for query in context.captured_queries if not query['sql'].startswith('EXPLAIN')]
+
+        return response.json(), queries
+
+    def test_list_reads_summary(self):
+        data, queries = self.list_queries()
+
+        products = {item['id']: item['product_system'] for item in data['results']}
+        self.assertEqual(products, {self.computer.id: 'laptop', self.virtual.id: 'virtual'})
+        self.assertEqual(data['results'][0]['unchecked_errors'], 0)
+        self.assertFalse(any('hardware_node' in query or 'hardware_configuration' in query for query in queries))
+
+    def test_filters_read_summary(self):
+        data, queries = self.list_queries(product_system='virtual')
+        self.assertEqual([item['id'] for item in data['results']], [self.virtual.id])
+
+        data, queries = self.list_queries(architecture=64)
+        self.assertEqual([item['id'] for item in data['results']], [self.computer.id])
+        self.assertFalse(any('hardware_node' in query for query in queries))
+
+    def test_detail_architecture(self):
+        response = self.client.get(reverse('computer-detail', kwargs={'pk': self.virtual.pk}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['architecture'], '32')
+        self.assertEqual(response.json()['product_system'], 'virtual')
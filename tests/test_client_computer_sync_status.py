@@ -0,0 +1,141 @@
+import uuid
+from datetime import timedelta
+from operator import gt, le
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django_redis import get_redis_connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from migasfree.client.messages import add_computer_message, remove_computer_messages
+from migasfree.client.models import Computer
+from migasfree.core.models import Attribute, Domain, Platform, Project, Property, UserProfile
+from migasfree.paginations import RankedCursorPagination
+from migasfree.stats.utils import MESSAGE_DATES_KEY, count_computers_by_date, filter_computers_by_date
+
+
+class MessageDatesMixin:
+    def setUp(self):
+        self.con = get_redis_connection()
+        self.clear()
+
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.computers = [
+            Computer.objects.create(name=f'PC{i}', project=self.project, uuid=str(uuid.uuid4())) for i in range(4)
+        ]
+
+    def tearDown(self):
+        self.clear()
+        super().tearDown()
+
+    def clear(self):
+        keys = [*self.con.keys('migasfree:msg:*'), 'migasfree:watch:msg', MESSAGE_DATES_KEY]
+        self.con.delete(*keys)
+
+    def delay(self, computer):
+        """the last message of the computer is older than the alert time"""
+        date = timezone.localtime(timezone.now()) - timedelta(seconds=settings.MIGASFREE_SECONDS_MESSAGE_ALERT + 60)
+        self.con.hset(f'migasfree:msg:{computer.id}', 'date', date.strftime('%Y-%m-%dT%H:%M:%S.%f'))
+        self.con.zadd(MESSAGE_DATES_KEY, {computer.id: date.timestamp()})
+
+
+class TestMessageDates(MessageDatesMixin, TestCase):
+    def test_messages_are_indexed_by_date(self):
+        for computer in self.computers:
+            add_computer_message(computer, 'Synchronizing...')
+        self.delay(self.computers[0])
+
+        self.assertEqual(sorted(filter_computers_by_date(gt)[0]), [computer.id for computer in self.computers[1:]])
+        self.assertEqual(filter_computers_by_date(le)[0], [self.computers[0].id])
+        self.assertEqual(count_computers_by_date(gt)[0], 3)
+
+        remove_computer_messages(self.computers[1].id)
+
+        self.assertEqual(self.con.zcard(MESSAGE_DATES_KEY), 3)
+        self.assertEqual(count_computers_by_date(gt)[0], 2)
+
+    def test_messages_before_the_index(self):
+        for computer in self.computers:
+            add_computer_message(computer, 'Synchronizing...')
+        self.delay(self.computers[0])
+        self.con.delete(MESSAGE_DATES_KEY)
+
+        self.assertEqual(filter_computers_by_date(le)[0], [self.computers[0].id])
+        self.assertEqual(self.con.zcard(MESSAGE_DATES_KEY), 4)
+
+
+class TestSyncStatusViews(MessageDatesMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = UserProfile.objects.create(
+            username='test', email='test@test.com', password='test', is_superuser=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+        for computer in self.computers:
+            add_computer_message(computer, 'Synchronizing...')
+        self.delay(self.computers[0])
+
+    def test_synchronizing_is_paginated(self):
+        response = self.client.get(reverse('computer-synchronizing'), {'page_size': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual([item['id'] for item in data['results']], [self.computers[1].id, self.computers[2].id])
+        self.assertIsNotNone(data['next'])
+
+        data = self.client.get(data['next']).json()
+        self.assertEqual([item['id'] for item in data['results']], [self.computers[3].id])
+        self.assertIsNone(data['next'])
+
+    def test_synchronizing_pages_back_and_forth(self):
+        data = self.client.get(reverse('computer-synchronizing'), {'page_size': 1}).json()
+        self.assertIsNone(data['previous'])
+
+        data = self.client.get(data['next']).json()
+        self.assertEqual([item['id'] for item in data['results']], [self.computers[2].id])
+
+        data = self.client.get(data['previous']).json()
+        self.assertEqual([item['id'] for item in data['results']], [self.computers[1].id])
+        self.assertIsNone(data['previous'])
+
+    def test_sorted_set_is_read_in_chunks(self):
+        for i in range(20):
+            self.con.zadd(MESSAGE_DATES_KEY, {1_000_000 + i: timezone.now().timestamp()})
+
+        with (
+            patch.object(RankedCursorPagination, 'chunk_size', 5),
+            patch.object(self.con, 'zrangebyscore', wraps=self.con.zrangebyscore) as mock_range,
+            patch('migasfree.stats.utils.get_redis_connection', return_value=self.con),
+        ):
+            data = self.client.get(reverse('computer-synchronizing'), {'page_size': 2}).json()
+
+        # unknown computers are skipped and only the needed chunks are read
+        self.assertEqual([item['id'] for item in data['results']], [self.computers[1].id, self.computers[2].id])
+        self.assertIsNotNone(data['next'])
+        self.assertEqual({call.kwargs['num'] for call in mock_range.call_args_list}, {5})
+
+    def test_delayed(self):
+        response = self.client.get(reverse('computer-delayed'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.json()['results']], [self.computers[0].id])
+
+    def test_scope_of_the_user(self):
+        property_ = Property.objects.create(prefix='ORG', name='ORGANIZATION', enabled=True, kind='N', sort='client')
+        attribute = Attribute.objects.create(property_att=property_, value='A')
+        domain = Domain.objects.create(name='Domain')
+        domain.included_attributes.add(attribute)
+        self.computers[2].sync_attributes.add(attribute)
+
+        self.user.domain_preference = domain
+        self.user.save()
+
+        response = self.client.get(reverse('computer-synchronizing'))
+
+        self.assertEqual([item['id'] for item in response.json()['results']], [self.computers[2].id])
@@ -1,7 +1,14 @@
+import uuid
+from datetime import timedelta
+
 import pytest
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from migasfree.client.models import Computer, PackageHistory
+from migasfree.client.models import Computer, PackageHistory, PackageHistoryArchive
+from migasfree.client.tasks import archive_package_history
 from migasfree.core.models import Package, Platform, Project
 
 
@@ -62,3 +69,93 @@ class PackageHistoryModelTestCase(TestCase):
     def test_uninstall_computer_packages_invalid(self):
         with self.assertRaises(ValueError):
             PackageHistory.uninstall_computer_packages(None)
+
+
+class PackageHistoryMaintenanceTestCase(TestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.computers = [
+            Computer.objects.create(project=self.project, name=f'pc{i}', uuid=str(uuid.uuid4())) for i in range(3)
+        ]
+        self.packages = [
+            Package.objects.create(
+                fullname=f'pkg{i}_1.0_all.deb',
+                name=f'pkg{i}',
+                version='1.0',
+                architecture='all',
+                project=self.project,
+                store=None,
+            )
+            for i in range(3)
+        ]
+
+    def install(self, computers, packages):
+        PackageHistory.objects.bulk_create(
+            PackageHistory(computer_id=computer, package_id=package) for computer in computers for package in packages
+        )
+
+    def open_pairs(self):
+        return set(PackageHistory.objects.filter(uninstall_date=None).values_list('computer_id', 'package_id'))
+
+    def statements(self, context):
+        # profilers (silk) may add their own EXPLAIN queries
+        return [query for query in context.captured_queries if not query['sql'].startswith('EXPLAIN')]
+
+    def test_close_many_computers_in_one_statement(self):
+        self.install([computer.id for computer in self.computers], [p.id for p in self.packages])
+        closed_before = timezone.now() - timedelta(days=1)
+        PackageHistory.objects.filter(computer=self.computers[0], package=self.packages[0]).update(
+            uninstall_date=closed_before
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            closed = PackageHistory.objects.close(
+                [self.computers[0].id, self.computers[1].id], packages=[self.packages[0].id, self.packages[1].id]
+            )
+
+        self.assertEqual(len(self.statements(context)), 1)
+        self.assertEqual(closed, 3)
+        # already closed rows keep their date
+        self.assertEqual(
+            PackageHistory.objects.get(computer=self.computers[0], package=self.packages[0]).uninstall_date,
+            closed_before,
+        )
+        self.assertEqual(len(self.open_pairs()), 5)
+
+    def test_software_history_only_closes_open_rows_of_the_project(self):
+        computer = self.computers[0]
+        self.install([computer.id], [self.packages[0].id, self.packages[1].id])
+        closed_before = timezone.now() - timedelta(days=1)
+        old = PackageHistory.objects.create(computer=computer, package=self.packages[0], uninstall_date=closed_before)
+
+        computer.update_software_history({'uninstalled': ['pkg0_1.0_all.deb']})
+
+        old.refresh_from_db()
+        self.assertEqual(old.uninstall_date, closed_before)
+        self.assertEqual(self.open_pairs(), {(computer.id, self.packages[1].id)})
+
+    def test_archive_closed_history_in_batches(self):
+        self.install([computer.id for computer in self.computers], [p.id for p in self.packages])
+        old = timezone.now() - timedelta(days=400)
+        PackageHistory.objects.close([self.computers[0].id, self.computers[1].id], date=old)
+        PackageHistory.objects.close([self.computers[2].id], packages=[self.packages[0].id])
+
+        archived = PackageHistory.objects.archive(timezone.now() - timedelta(days=365), batch_size=4)
+
+        self.assertEqual(archived, 6)
+        self.assertEqual(PackageHistoryArchive.objects.count(), 6)
+        self.assertFalse(PackageHistoryArchive.objects.filter(computer=self.computers[2]).exists())
+        self.assertEqual(PackageHistory.objects.count(), 3)
+        self.assertEqual(PackageHistoryArchive.objects.filter(uninstall_date=old).count(), 6)
+
+    def test_archive_task_needs_retention(self):
+        self.install([self.computers[0].id], [self.packages[0].id])
+        PackageHistory.objects.close([self.computers[0].id], date=timezone.now() - timedelta(days=40))
+
+        self.assertEqual(archive_package_history(), 0)
+
+        with override_settings(MIGASFREE_PACKAGE_HISTORY_RETENTION=30):
+            self.assertEqual(archive_package_history(), 1)
+
+        self.assertFalse(PackageHistory.objects.exists())
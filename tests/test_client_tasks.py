@@ -1,13 +1,14 @@
 import uuid
+from unittest.mock import patch
 
 import pytest
 from celery import states
 from django.conf import settings
 from django.test import TestCase
 
-from migasfree.client.models import Computer
-from migasfree.client.tasks import update_software_inventory
-from migasfree.core.models import Platform, Project
+from migasfree.client.models import Computer, PackageHistory
+from migasfree.client.tasks import clear_inventory_digest, update_software_inventory
+from migasfree.core.models import Package, Platform, Project
 
 
 @pytest.mark.celery(result_backend=settings.CELERY_BROKER_URL)
@@ -32,3 +33,54 @@ class TestUpdateSoftwareInventoryTask(TestCase):
         result = update_software_inventory.apply(args=(self.computer.id, inventory))
 
         self.assertEqual(result.status, states.SUCCESS)
+
+
+class TestUpdateSoftwareInventoryRaw(TestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', platform=self.platform, pms='apt', architecture='amd64')
+        self.computer = Computer.objects.create(
+            project=self.project,
+            name='Computer1',
+            uuid=str(uuid.uuid4()),
+        )
+        clear_inventory_digest(self.computer.id)
+
+    def tearDown(self):
+        clear_inventory_digest(self.computer.id)
+        super().tearDown()
+
+    def update(self, inventory):
+        with self.captureOnCommitCallbacks(execute=True):
+            update_software_inventory(self.computer.id, inventory)
+
+    def test_reconciles_inventory(self):
+        self.update(['package1_1.0_amd64.deb', 'package2_2.0_amd64.deb', 'package2_2.0_amd64.deb'])
+
+        self.assertEqual(self.computer.get_software_inventory(), ['package1_1.0_amd64.deb', 'package2_2.0_amd64.deb'])
+
+        self.update(['package2_2.0_amd64.deb', 'package3_3.0_amd64.deb'])
+
+        self.assertEqual(self.computer.get_software_inventory(), ['package2_2.0_amd64.deb', 'package3_3.0_amd64.deb'])
+        self.assertTrue(
+            PackageHistory.objects.filter(
+                computer=self.computer, package__fullname='package1_1.0_amd64.deb', uninstall_date__isnull=False
+            ).exists()
+        )
+        self.assertEqual(Package.objects.filter(project=self.project).count(), 3)
+
+    def test_unchanged_inventory_is_skipped(self):
+        self.update(['package1_1.0_amd64.deb', 'package2_2.0_amd64.deb'])
+
+        with patch('migasfree.client.tasks.update_software_inventory_raw') as mock_raw:
+            self.update(['package2_2.0_amd64.deb', 'package1_1.0_amd64.deb'])
+
+        mock_raw.assert_not_called()
+
+    def test_deleted_history_invalidates_digest(self):
+        self.update(['package1_1.0_amd64.deb'])
+        self.computer.delete_software_history()
+
+        self.update(['package1_1.0_amd64.deb'])
+
+        self.assertEqual(self.computer.get_software_inventory(), ['package1_1.0_amd64.deb'])
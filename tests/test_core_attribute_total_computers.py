@@ -0,0 +1,109 @@
+import uuid
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from migasfree.client.models import Computer
+from migasfree.core.models import Attribute, ClientAttribute, Domain, Platform, Project, Property, UserProfile
+
+
+class TotalComputersMixin:
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.property = Property.objects.create(
+            prefix='ORG', name='ORGANIZATION', enabled=True, kind='N', sort='client'
+        )
+        self.attributes = [Attribute.objects.create(property_att=self.property, value=str(i)) for i in range(5)]
+
+        self.computers = [
+            Computer.objects.create(name=f'PC{i}', project=self.project, uuid=str(uuid.uuid4())) for i in range(3)
+        ]
+        for i, computer in enumerate(self.computers):
+            computer.sync_attributes.add(*self.attributes[: i + 2])
+
+        self.user = UserProfile.objects.create(
+            username='test', email='test@test.com', password='test', is_superuser=True
+        )
+
+
+class TestTotalComputersByAttribute(TotalComputersMixin, TestCase):
+    def test_grouped_totals(self):
+        ids = [attribute.id for attribute in self.attributes]
+
+        with CaptureQueriesContext(connection) as context:
+            totals = Attribute.total_computers_by_attribute(ids)
+
+        # profilers (silk) may add their own queries
+        self.assertEqual(len([query for query in context.captured_queries if query['sql'].startswith('SELECT')]), 1)
+
+        self.assertEqual(totals, {attribute.id: attribute.total_computers() for attribute in self.attributes})
+        self.assertEqual([totals[id_] for id_ in ids], [3, 3, 2, 1, 0])
+
+    def test_unproductive_computers(self):
+        Computer.objects.filter(pk=self.computers[0].pk).update(status='available')
+
+        self.assertEqual(Attribute.total_computers_by_attribute([self.attributes[0].id]), {self.attributes[0].id: 2})
+
+    def test_scope_of_the_user(self):
+        domain = Domain.objects.create(name='Domain')
+        domain.included_attributes.add(self.attributes[3])
+        self.user.domain_preference = domain
+        self.user.save()
+
+        totals = Attribute.total_computers_by_attribute([attribute.id for attribute in self.attributes], self.user)
+
+        self.assertEqual(totals, {attribute.id: attribute.total_computers(self.user) for attribute in self.attributes})
+        self.assertEqual(totals[self.attributes[0].id], 1)
+
+
+class TestTotalComputersSerializers(TotalComputersMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.user)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # profilers (silk) may add their own queries
+        queries = [query['sql'] for query in context.captured_queries if not query['sql'].startswith('EXPLAIN')]
+
+        return response.json(), queries
+
+    def count_queries(self, queries):
+        return len(
+            [
+                query
+                for query in queries
+                if query.startswith('SELECT') and 'COUNT(' in query and 'client_computer_sync_attributes' in query
+            ]
+        )
+
+    def test_computer_sync(self):
+        data, queries = self.get(reverse('computer-sync', kwargs={'pk': self.computers[2].pk}))
+
+        self.assertEqual(
+            {item['id']: item['total_computers'] for item in data['sync_attributes']},
+            {self.attributes[0].id: 3, self.attributes[1].id: 3, self.attributes[2].id: 2, self.attributes[3].id: 1},
+        )
+        self.assertEqual(self.count_queries(queries), 1)
+
+    def test_features_list(self):
+        data, queries = self.get(reverse('clientattribute-list'))
+
+        totals = {item['id']: item['total_computers'] for item in data['results']}
+        self.assertEqual(totals, {attribute.id: attribute.total_computers() for attribute in self.attributes})
+        self.assertEqual(self.count_queries(queries), 1)
+
+    def test_feature_detail(self):
+        data, _ = self.get(reverse('clientattribute-detail', kwargs={'pk': self.attributes[1].pk}))
+
+        self.assertEqual(data['total_computers'], 3)
+        self.assertEqual(ClientAttribute.objects.get(pk=self.attributes[1].pk).total_computers(), 3)
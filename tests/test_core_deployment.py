@@ -1,6 +1,9 @@
+import importlib
 from datetime import datetime, timedelta
 
 import pytest
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
 from django.utils import timezone
 
 from migasfree.core.models import (
@@ -12,6 +15,8 @@ from migasfree.core.models import (
 )
 from migasfree.utils import time_horizon
 
+schedule_dates_migration = importlib.import_module('migasfree.core.migrations.0012_deployment_schedule_dates')
+
 
 @pytest.fixture
 def now():
@@ -104,3 +109,77 @@ def test_schedule_timeline_percent(deployment, schedule_delays):
 
     assert 'percent' in result
     assert result['percent'] == 0
+
+
+@pytest.mark.django_db
+def test_schedule_dates_are_stored(deployment, schedule_delays):
+    deployment.refresh_from_db()
+    start_date = deployment.start_date
+
+    assert deployment.schedule_begin_date == time_horizon(start_date, 1)
+    assert deployment.schedule_end_date == time_horizon(start_date, 5)
+
+    ScheduleDelay.objects.create(schedule_id=deployment.schedule_id, delay=10, duration=1)
+    deployment.refresh_from_db()
+    assert deployment.schedule_end_date == time_horizon(start_date, 11)
+
+    ScheduleDelay.objects.filter(schedule_id=deployment.schedule_id, delay=10).get().delete()
+    deployment.refresh_from_db()
+    assert deployment.schedule_end_date == time_horizon(start_date, 5)
+
+    deployment.start_date = start_date - timedelta(days=30)
+    deployment.save()
+    deployment.refresh_from_db()
+    assert deployment.schedule_begin_date == time_horizon(deployment.start_date, 1)
+
+    deployment.schedule = None
+    deployment.save()
+    deployment.refresh_from_db()
+    assert (deployment.schedule_begin_date, deployment.schedule_end_date) == (None, None)
+
+
+@pytest.mark.django_db
+def test_schedule_dates_backfill(deployment, schedule_delays):
+    Deployment.objects.update(schedule_begin_date=None, schedule_end_date=None)
+
+    state = MigrationLoader(connection).project_state(('core', '0012_deployment_schedule_dates'))
+    schedule_dates_migration.backfill_schedule_dates(state.apps, None)
+
+    deployment.refresh_from_db()
+    assert deployment.schedule_begin_date == time_horizon(deployment.start_date, 1)
+    assert deployment.schedule_end_date == time_horizon(deployment.start_date, 5)
+
+
+@pytest.mark.django_db
+def test_schedule_timeline_without_queries(deployment, schedule_delays, django_assert_num_queries):
+    deployment = Deployment.objects.get(pk=deployment.pk)
+
+    with django_assert_num_queries(0):
+        result = deployment.schedule_timeline()
+
+    assert result['end_date'] == str(deployment.schedule_end_date)
+
+
+@pytest.mark.django_db
+def test_schedule_percent_in_sql(project, schedule, schedule_delays):
+    today = timezone.localdate()
+    deployments = [
+        Deployment.objects.create(
+            name=f'deploy-{days}', start_date=today - timedelta(days=days), project=project, schedule=schedule
+        )
+        for days in (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 30)
+    ]
+    deployments.append(Deployment.objects.create(name='no-schedule', project=project))
+
+    percents = dict(Deployment.objects.with_schedule_percent().values_list('id', 'schedule_percent'))
+
+    for deployment in deployments:
+        timeline = deployment.schedule_timeline()
+        assert percents[deployment.id] == (timeline['percent'] if timeline else 100)
+
+    active = Deployment.objects.with_schedule_percent().filter(
+        schedule_percent__lt=100, id__in=[item.id for item in deployments]
+    )
+    assert set(active) == {
+        item for item in deployments if item.schedule_timeline() and item.schedule_timeline()['percent'] < 100
+    }
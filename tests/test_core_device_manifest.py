@@ -0,0 +1,105 @@
+import uuid
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django_redis import get_redis_connection
+
+from migasfree.client.models import Computer
+from migasfree.core.models import Platform, Project, Property
+from migasfree.core.services.device_manifest import DeviceManifestService, manifest_generation, manifest_key
+from migasfree.core.services.sync_plan import SyncPlanService
+from migasfree.device.models import Capability, Connection, Device, Driver, Logical, Manufacturer, Model, Type
+
+
+class TestDeviceManifest(TestCase):
+    def setUp(self):
+        self.con = get_redis_connection()
+
+        Property.objects.create(prefix='CID', name='Computer ID', sort='basic')
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.other_project = Project.objects.create(
+            name='Windows', pms='winget', architecture='x64', platform=self.platform
+        )
+
+        device_type = Type.objects.create(name='PRINTER')
+        connection_ = Connection.objects.create(name='TCP', device_type=device_type)
+        self.model = Model.objects.create(
+            name='LaserJet', manufacturer=Manufacturer.objects.create(name='HP'), device_type=device_type
+        )
+        self.model.connections.add(connection_)
+        self.color = Capability.objects.create(name='COLOR')
+
+        self.logical_devices = [
+            Logical.objects.create(
+                device=Device.objects.create(
+                    name=f'Printer {i}', model=self.model, connection=connection_, data={'IP': f'10.0.0.{i}'}
+                ),
+                capability=self.color,
+            )
+            for i in range(5)
+        ]
+        self.driver = Driver.objects.create(
+            model=self.model, project=self.project, capability=self.color, name='hp.ppd', packages_to_install='hplip'
+        )
+        self.ids = [logical.id for logical in self.logical_devices]
+
+    def tearDown(self):
+        DeviceManifestService.invalidate(self.con)
+        super().tearDown()
+
+    def test_same_payload_as_logical(self):
+        for project in (self.project, self.other_project):
+            self.assertEqual(
+                DeviceManifestService.compile(project.id, self.ids),
+                {logical.id: logical.as_dict(project) for logical in self.logical_devices},
+            )
+
+        payload = DeviceManifestService.get(self.project.id, self.ids[:1], self.con)[0]['PRINTER']
+        self.assertEqual(payload['driver'], 'hp.ppd')
+        self.assertEqual(payload['packages'], ['hplip'])
+        self.assertEqual(payload['manufacturer'], 'HP')
+
+    def test_compiled_in_batch_and_cached(self):
+        with CaptureQueriesContext(connection) as context:
+            payloads = DeviceManifestService.get(self.project.id, [*reversed(self.ids), 0], self.con)
+
+        # profilers (silk) may add their own queries
+        self.assertEqual(len([query for query in context.captured_queries if query['sql'].startswith('SELECT')]), 2)
+        self.assertEqual([payload['PRINTER']['id'] for payload in payloads], list(reversed(self.ids)))
+        self.assertEqual(self.con.hlen(manifest_key(self.project.id, manifest_generation(self.con))), len(self.ids))
+
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(DeviceManifestService.get(self.project.id, reversed(self.ids), self.con), payloads)
+
+        self.assertEqual([query for query in context.captured_queries if query['sql'].startswith('SELECT')], [])
+
+    def test_invalidated_on_changes(self):
+        DeviceManifestService.get(self.project.id, self.ids, self.con)
+        generation = manifest_generation(self.con)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.driver.name = 'hp2.ppd'
+            self.driver.save()
+
+        # on save and again on commit
+        self.assertEqual(manifest_generation(self.con), generation + 2)
+        self.assertFalse(self.con.exists(manifest_key(self.project.id, manifest_generation(self.con))))
+        self.assertEqual(
+            DeviceManifestService.get(self.project.id, self.ids, self.con)[0]['PRINTER']['driver'], 'hp2.ppd'
+        )
+
+    def test_sync_plan(self):
+        computer = Computer.objects.create(name='PC1', project=self.project, uuid=str(uuid.uuid4()))
+        cid = computer.get_cid_attribute()
+        computer.sync_attributes.add(cid)
+        for logical in self.logical_devices[:2]:
+            logical.attributes.add(cid)
+
+        plan = SyncPlanService.build(computer)
+
+        self.assertEqual(set(plan.logical_device_ids), set(self.ids[:2]))
+        self.assertEqual(
+            list(plan.logical_devices), DeviceManifestService.get(self.project.id, plan.logical_device_ids, self.con)
+        )
@@ -0,0 +1,88 @@
+import uuid
+from unittest.mock import patch
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from migasfree.client.models import Computer
+from migasfree.core.models import Attribute, Domain, Platform, Project, Property, ServerAttribute, UserProfile
+from migasfree.core.serializers import DomainSerializer
+from migasfree.core.services.domains import DomainReadModel
+
+
+class TestDomainReadModel(APITestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create(
+            username='test', email='test@test.com', password='test', is_superuser=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.property = Property.objects.create(
+            prefix='ORG', name='ORGANIZATION', enabled=True, kind='N', sort='client'
+        )
+        self.tag_property = Property.objects.create(
+            prefix='LOC', name='Location', enabled=True, kind='N', sort='server'
+        )
+
+        self.domains = []
+        for i in range(3):
+            domain = Domain.objects.create(name=f'DOMAIN{i}')
+            domain.included_attributes.add(Attribute.objects.create(property_att=self.property, value=f'IN{i}'))
+            domain.excluded_attributes.add(Attribute.objects.create(property_att=self.property, value=f'OUT{i}'))
+            domain.tags.add(ServerAttribute.objects.create(property_att=self.tag_property, value=f'TAG{i}'))
+            self.user.domains.add(domain)
+            self.domains.append(domain)
+
+        self.dmn_property = Property.objects.get(prefix='DMN')
+        self.subdomain = Attribute.objects.create(property_att=self.dmn_property, value='DOMAIN0.LAB')
+
+    def serialize(self, domains):
+        with CaptureQueriesContext(connection) as context:
+            data = DomainSerializer(Domain.objects.filter(id__in=[domain.id for domain in domains]), many=True).data
+
+        # profilers (silk) may add their own queries
+        return data, len([query for query in context.captured_queries if query['sql'].startswith('SELECT')])
+
+    def test_fixed_number_of_queries(self):
+        data, queries = self.serialize(self.domains[:1])
+        _, more_queries = self.serialize(self.domains)
+
+        self.assertEqual(queries, more_queries)
+        self.assertEqual(data[0]['domain_admins'], [{'id': self.user.id, 'username': 'test'}])
+        self.assertEqual([item['value'] for item in data[0]['included_attributes']], ['IN0'])
+        self.assertEqual([item['value'] for item in data[0]['excluded_attributes']], ['OUT0'])
+        self.assertEqual(data[0]['tags'][0]['property_att']['prefix'], 'LOC')
+
+    def test_retrieve(self):
+        response = self.client.get(reverse('domain-detail', kwargs={'pk': self.domains[1].pk}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['domain_admins'], [{'id': self.user.id, 'username': 'test'}])
+        self.assertEqual([item['value'] for item in response.json()['tags']], ['TAG1'])
+
+    def test_tags(self):
+        tags = DomainReadModel.tags(self.domains)
+
+        self.assertEqual([tag.value for tag in tags[self.domains[0].id]], ['DOMAIN0', 'DOMAIN0.LAB', 'TAG0'])
+        self.assertEqual([tag.value for tag in tags[self.domains[2].id]], ['DOMAIN2', 'TAG2'])
+        self.assertEqual(self.domains[0].get_tags(), tags[self.domains[0].id])
+
+    @patch('migasfree.client.views.safe.computer.SafeComputerViewSet.get_claims')
+    @patch('migasfree.client.views.safe.computer.SafeComputerViewSet.create_response')
+    def test_available_tags_of_the_domains_of_a_computer(self, create_response, get_claims):
+        platform = Platform.objects.create(name='Linux')
+        project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=platform)
+        computer = Computer.objects.create(name='PC', project=project, uuid=str(uuid.uuid4()))
+        computer.tags.add(ServerAttribute.objects.get(id=self.subdomain.id))
+
+        get_claims.return_value = {'id': computer.id}
+        create_response.side_effect = lambda x: x
+
+        response = self.client.post(reverse('computers-available-tags'), {'msg': 'jwt'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['DOMAIN'], [str(tag) for tag in self.domains[0].get_tags()[:2]])
+        self.assertEqual(response.json()['Location'], ['LOC-TAG0'])
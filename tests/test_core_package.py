@@ -1,6 +1,9 @@
+from unittest.mock import patch
+
 import pytest
+from django.db import transaction
 
-from migasfree.core.models import Package, Platform, Project, Store, UserProfile
+from migasfree.core.models import Deployment, Package, Platform, Project, Store, UserProfile
 
 
 @pytest.mark.django_db
@@ -77,3 +80,101 @@ def test_normalized_name_no_match():
     package = Package()
     result = package.normalized_name('no-match')
     assert result == ('no-match', '', '')
+
+
+def create_rpm_package(project, store, fullname):
+    return Package.objects.create(
+        project=project,
+        store=store,
+        fullname=fullname,
+        name=fullname.split('-')[0],
+        version='1.0-1',
+        architecture='noarch',
+    )
+
+
+@pytest.fixture
+def rpm_deployment():
+    platform = Platform.objects.create(name='Linux')
+    project = Project.objects.create(name='Project 1', platform=platform, pms='dnf', architecture='x86_64')
+    store = Store.objects.create(name='Store 1', project=project)
+    deploy = Deployment.objects.create(name='Deploy 1', project=project)
+
+    return deploy, store
+
+
+@pytest.mark.django_db
+def test_package_signals_send_changes_to_repository_rebuild(rpm_deployment, django_capture_on_commit_callbacks):
+    deploy, store = rpm_deployment
+    package = create_rpm_package(deploy.project, store, 'migasfree-1.0-1.noarch.rpm')
+    deploy.available_packages.add(package)
+
+    with patch('migasfree.core.pms.tasks.create_repository_metadata.apply_async') as mock_task:
+        with django_capture_on_commit_callbacks(execute=True):
+            package.save()
+
+        payload = mock_task.call_args.kwargs['kwargs']['payload']
+        assert mock_task.call_args.kwargs['queue'] == 'pms-dnf'
+        assert payload['changes'] == {'added': [package.fullname], 'removed': []}
+
+        with django_capture_on_commit_callbacks(execute=True):
+            package.delete()
+
+        payload = mock_task.call_args.kwargs['kwargs']['payload']
+        assert payload['changes'] == {'added': [], 'removed': ['migasfree-1.0-1.noarch.rpm']}
+        assert payload['available_packages'] == []
+
+
+@pytest.mark.django_db
+def test_package_signals_rebuild_once_per_deployment(rpm_deployment, django_capture_on_commit_callbacks):
+    deploy, store = rpm_deployment
+    other = Deployment.objects.create(name='Deploy 2', project=deploy.project)
+    packages = [create_rpm_package(deploy.project, store, f'pkg{i}-1.0-1.noarch.rpm') for i in range(3)]
+    deploy.available_packages.add(*packages)
+    other.available_packages.add(*packages)
+
+    with (
+        patch('migasfree.core.pms.tasks.create_repository_metadata.apply_async') as mock_task,
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        for package in packages:
+            package.save()
+        packages[0].delete()
+
+    assert mock_task.call_count == 2
+    payloads = {
+        call.kwargs['kwargs']['payload']['id']: call.kwargs['kwargs']['payload'] for call in mock_task.call_args_list
+    }
+    assert set(payloads) == {deploy.id, other.id}
+    # the deleted package is not available any more
+    assert payloads[deploy.id]['changes'] == {
+        'added': [package.fullname for package in packages[1:]],
+        'removed': [packages[0].fullname],
+    }
+    assert len(payloads[deploy.id]['available_packages']) == 2
+
+
+@pytest.mark.django_db
+def test_rolled_back_package_changes_are_not_rebuilt(rpm_deployment, django_capture_on_commit_callbacks):
+    deploy, store = rpm_deployment
+    package = create_rpm_package(deploy.project, store, 'migasfree-1.0-1.noarch.rpm')
+    deploy.available_packages.add(package)
+
+    with (
+        patch('migasfree.core.pms.tasks.create_repository_metadata.apply_async') as mock_task,
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        try:
+            with transaction.atomic():
+                package.save()
+                raise ValueError
+        except ValueError:
+            pass
+
+        package.delete()
+
+    mock_task.assert_called_once()
+    assert mock_task.call_args.kwargs['kwargs']['payload']['changes'] == {
+        'added': [],
+        'removed': ['migasfree-1.0-1.noarch.rpm'],
+    }
@@ -0,0 +1,536 @@
+import os
+import shutil
+import tempfile
+import uuid
+from unittest.mock import patch
+
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from migasfree.core.models import (
+    Attribute,
+    Deployment,
+    Domain,
+    Package,
+    Platform,
+    Project,
+    Property,
+    Store,
+    UserProfile,
+)
+from migasfree.core.routing import ws_urlpatterns
+from migasfree.core.services.package_ingestion import (
+    DIGEST_PATHS_KEY,
+    DIGESTS_KEY,
+    STATUS_FAILED,
+    STATUS_FINISHED,
+    STATUS_SKIPPED,
+    PackageIngestionService,
+    store_package_file,
+)
+
+PUBLIC_DIR = tempfile.mkdtemp()
+
+
+@override_settings(MIGASFREE_PUBLIC_DIR=PUBLIC_DIR)
+class TestPackageIngestionService(TestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.store = Store.objects.create(name='org', project=self.project)
+        self.other_store = Store.objects.create(name='third', project=self.project)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(PUBLIC_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def upload(self, name, content=None):
+        return SimpleUploadedFile(name, content or uuid.uuid4().bytes)
+
+    def test_store_package_file_deduplicates_identical_content(self):
+        content = uuid.uuid4().bytes
+        first = Package.path(self.project.slug, self.store.slug, 'pkg_1.0_amd64.deb')
+        second = Package.path(self.project.slug, self.other_store.slug, 'pkg_1.0_amd64.deb')
+
+        digest1, size, deduplicated1 = store_package_file(self.upload('pkg_1.0_amd64.deb', content), first)
+        digest2, _, deduplicated2 = store_package_file(self.upload('pkg_1.0_amd64.deb', content), second)
+
+        self.assertEqual(digest1, digest2)
+        self.assertEqual(size, len(content))
+        self.assertFalse(deduplicated1)
+        self.assertTrue(deduplicated2)
+        self.assertTrue(os.path.samefile(first, second))
+
+    def test_store_package_file_ignores_overwritten_contents(self):
+        content = uuid.uuid4().bytes
+        first = Package.path(self.project.slug, self.store.slug, 'stale_1.0_amd64.deb')
+        second = Package.path(self.project.slug, self.other_store.slug, 'stale_1.0_amd64.deb')
+
+        store_package_file(self.upload('stale_1.0_amd64.deb', content), first)
+        store_package_file(self.upload('stale_1.0_amd64.deb', b'other content'), first)  # replaced in place
+
+        _, _, deduplicated = store_package_file(self.upload('stale_1.0_amd64.deb', content), second)
+
+        self.assertFalse(deduplicated)
+        with open(second, 'rb') as stored:
+            self.assertEqual(stored.read(), content)
+
+        with open(second, 'wb') as stored:  # rewritten behind the digests index
+            stored.write(b'rewritten content')
+
+        _, _, deduplicated = store_package_file(self.upload('stale_1.0_amd64.deb', content), first)
+
+        self.assertFalse(deduplicated)
+        with open(first, 'rb') as stored:
+            self.assertEqual(stored.read(), content)
+
+    def test_deleted_files_are_forgotten(self):
+        content = uuid.uuid4().bytes
+        first = Package.path(self.project.slug, self.store.slug, 'gone_1.0_amd64.deb')
+        second = Package.path(self.project.slug, self.other_store.slug, 'gone_1.0_amd64.deb')
+
+        digest, _, _ = store_package_file(self.upload('gone_1.0_amd64.deb', content), first)
+        Package.delete_from_store(first)
+
+        con = get_redis_connection()
+        self.assertFalse(con.hexists(DIGESTS_KEY, digest))
+        self.assertFalse(con.hexists(DIGEST_PATHS_KEY, first))
+
+        store_package_file(self.upload('gone_1.0_amd64.deb', content), second)
+        Package.handle_uploaded_file(self.upload('gone_1.0_amd64.deb', b'other content'), second)
+
+        self.assertFalse(con.hexists(DIGESTS_KEY, digest))
+
+    def test_start_without_unparseable_names_skips_pms_workers(self):
+        with (
+            patch('migasfree.core.tasks.finish_package_ingestion.apply_async') as mock_finish,
+            patch('migasfree.core.services.package_ingestion.chord') as mock_chord,
+        ):
+            ingestion_id = PackageIngestionService(self.project, self.store).start(
+                [self.upload('pkg1_1.0_amd64.deb'), self.upload('pkg2_2.0_amd64.deb')]
+            )
+
+        mock_chord.assert_not_called()
+        mock_finish.assert_called_once()
+
+        state = PackageIngestionService.finish(ingestion_id, [])
+
+        self.assertEqual(state['status'], STATUS_FINISHED)
+        self.assertEqual(Package.objects.filter(project=self.project, store=self.store).count(), 2)
+        self.assertEqual({item['status'] for item in state['files']}, {'created'})
+
+    def test_start_dispatches_metadata_for_unparseable_names(self):
+        with patch('migasfree.core.services.package_ingestion.chord') as mock_chord:
+            ingestion_id = PackageIngestionService(self.project, self.store).start([self.upload('weird-package')])
+
+        mock_chord.assert_called_once()
+        self.assertEqual(len(mock_chord.call_args[0][0]), 1)
+
+        state = PackageIngestionService.finish(
+            ingestion_id, [{'name': 'weird', 'version': '1.0', 'architecture': 'amd64'}]
+        )
+
+        package = Package.objects.get(fullname='weird-package', project=self.project)
+        self.assertEqual(package.name, 'weird')
+        self.assertEqual(state['files'][0]['id'], package.id)
+
+    def test_finish_discards_files_without_metadata(self):
+        with patch('migasfree.core.services.package_ingestion.chord'):
+            ingestion_id = PackageIngestionService(self.project, self.store).start([self.upload('weird-package')])
+
+        state = PackageIngestionService.finish(ingestion_id, [{}])
+
+        self.assertEqual(state['files'][0]['status'], STATUS_FAILED)
+        self.assertFalse(Package.objects.filter(fullname='weird-package').exists())
+        self.assertFalse(os.path.exists(state['files'][0]['path']))
+
+    def test_published_files_are_kept_until_validated(self):
+        with patch('migasfree.core.services.package_ingestion.chord'):
+            ingestion_id = PackageIngestionService(self.project, self.store).start([self.upload('weird-package')])
+        PackageIngestionService.finish(ingestion_id, [{'name': 'weird', 'version': '1.0', 'architecture': 'amd64'}])
+        target = Package.path(self.project.slug, self.store.slug, 'weird-package')
+        with open(target, 'rb') as stored:
+            content = stored.read()
+
+        with patch('migasfree.core.services.package_ingestion.chord'):
+            ingestion_id = PackageIngestionService(self.project, self.store).start(
+                [self.upload('weird-package')], overwrite=True
+            )
+
+        with open(target, 'rb') as stored:
+            self.assertEqual(stored.read(), content)
+
+        state = PackageIngestionService.finish(ingestion_id, [{}])
+
+        self.assertEqual(state['files'][0]['status'], STATUS_FAILED)
+        with open(target, 'rb') as stored:
+            self.assertEqual(stored.read(), content)
+        # no staging files left
+        self.assertEqual([name for name in os.listdir(os.path.dirname(target)) if name.startswith('.')], [])
+
+    def test_existing_packages_are_only_overwritten_on_request(self):
+        with patch('migasfree.core.tasks.finish_package_ingestion.apply_async'):
+            ingestion_id = PackageIngestionService(self.project, self.store).start([self.upload('pkg_1.0_amd64.deb')])
+        PackageIngestionService.finish(ingestion_id, [])
+        target = Package.path(self.project.slug, self.store.slug, 'pkg_1.0_amd64.deb')
+        with open(target, 'rb') as stored:
+            content = stored.read()
+
+        with patch('migasfree.core.tasks.finish_package_ingestion.apply_async'):
+            ingestion_id = PackageIngestionService(self.project, self.other_store).start(
+                [self.upload('pkg_1.0_amd64.deb'), self.upload('new_1.0_amd64.deb')]
+            )
+        state = PackageIngestionService.finish(ingestion_id, [])
+
+        self.assertEqual([item['status'] for item in state['files']], [STATUS_FAILED, 'created'])
+        self.assertEqual(Package.objects.get(fullname='pkg_1.0_amd64.deb').store, self.store)
+        with open(target, 'rb') as stored:
+            self.assertEqual(stored.read(), content)
+
+        with (
+            patch('migasfree.core.tasks.finish_package_ingestion.apply_async'),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            ingestion_id = PackageIngestionService(self.project, self.other_store).start(
+                [self.upload('pkg_1.0_amd64.deb')], overwrite=True
+            )
+            state = PackageIngestionService.finish(ingestion_id, [])
+
+        self.assertEqual(state['files'][0]['status'], 'updated')
+        self.assertEqual(Package.objects.get(fullname='pkg_1.0_amd64.deb').store, self.other_store)
+        self.assertFalse(os.path.exists(target))
+
+    def test_packages_registered_while_ingesting_are_rejected(self):
+        with patch('migasfree.core.tasks.finish_package_ingestion.apply_async'):
+            ingestion_id = PackageIngestionService(self.project, self.store).start([self.upload('pkg_1.0_amd64.deb')])
+        Package.objects.create(
+            fullname='pkg_1.0_amd64.deb',
+            name='pkg',
+            version='1.0',
+            architecture='amd64',
+            project=self.project,
+            store=self.other_store,
+        )
+
+        state = PackageIngestionService.finish(ingestion_id, [])
+
+        self.assertEqual(state['files'][0]['status'], STATUS_FAILED)
+        self.assertFalse(os.path.exists(state['files'][0]['path']))
+
+    def test_finish_rebuilds_each_deployment_once(self):
+        packages = [
+            Package.objects.create(
+                fullname=f'pkg{i}_1.0_amd64.deb',
+                name=f'pkg{i}',
+                version='1.0',
+                architecture='amd64',
+                project=self.project,
+                store=self.other_store,
+            )
+            for i in range(3)
+        ]
+        deployment = Deployment.objects.create(name='Deploy', project=self.project)
+        deployment.available_packages.set(packages)
+
+        with patch('migasfree.core.tasks.finish_package_ingestion.apply_async'):
+            ingestion_id = PackageIngestionService(self.project, self.store).start(
+                [self.upload(package.fullname) for package in packages], overwrite=True
+            )
+
+        with (
+            patch('migasfree.core.pms.tasks.create_repository_metadata.apply_async') as mock_rebuild,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            state = PackageIngestionService.finish(ingestion_id, [])
+
+        mock_rebuild.assert_called_once()
+        self.assertEqual(
+            mock_rebuild.call_args.kwargs['kwargs']['payload']['changes'],
+            {'added': [package.fullname for package in packages], 'removed': []},
+        )
+        self.assertEqual(state['deployments'], [deployment.id])
+        self.assertEqual(Package.objects.filter(project=self.project, store=self.store).count(), 3)
+
+
+@override_settings(MIGASFREE_PUBLIC_DIR=PUBLIC_DIR)
+class TestPackageUpload(TestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.store = Store.objects.create(name=f'upload-{uuid.uuid4().hex[:8]}', project=self.project)
+
+    def upload(self, name):
+        return SimpleUploadedFile(name, uuid.uuid4().bytes)
+
+    def store_files(self):
+        path = os.path.dirname(Package.path(self.project.slug, self.store.slug, 'any'))
+        return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+    def test_batch_is_registered_in_constant_transactions(self):
+        for size in (2, 20):
+            files = [self.upload(f'pkg{size}-{i}_1.0_amd64.deb') for i in range(size)]
+
+            with CaptureQueriesContext(connection) as context:
+                items = PackageIngestionService(self.project, self.store).upload(files)
+
+            self.assertEqual({item['status'] for item in items}, {'created'})
+            # profilers (silk) may add their own EXPLAIN queries
+            queries = [query for query in context.captured_queries if not query['sql'].startswith('EXPLAIN')]
+            self.assertEqual(len(queries), 6)
+
+        self.assertEqual(Package.objects.filter(store=self.store).count(), 22)
+        self.assertIn('pkg2-0_1.0_amd64.deb', self.store_files())
+
+    def test_unparseable_names_are_inspected_in_batches(self):
+        with patch('migasfree.core.services.package_ingestion.group') as mock_group:
+            mock_group.return_value.apply_async.return_value.get.return_value = [
+                [
+                    {'name': 'weird', 'version': '1.0', 'architecture': 'amd64'},
+                    {'name': 'odd', 'version': '2.0', 'architecture': 'all'},
+                ]
+            ]
+            items = PackageIngestionService(self.project, self.store).upload(
+                [self.upload('weird-package'), self.upload('pkg_1.0_amd64.deb'), self.upload('odd-package')]
+            )
+
+        mock_group.assert_called_once()
+        self.assertEqual(len(list(mock_group.call_args[0][0])), 1)
+        self.assertEqual([item['status'] for item in items], ['created'] * 3)
+        self.assertEqual(Package.objects.get(fullname='odd-package').version, '2.0')
+
+    def test_batch_is_validated_before_registering(self):
+        with patch('migasfree.core.services.package_ingestion.group') as mock_group:
+            mock_group.return_value.apply_async.return_value.get.return_value = [[{}]]
+            items = PackageIngestionService(self.project, self.store).upload(
+                [self.upload('pkg_1.0_amd64.deb'), self.upload('weird-package')]
+            )
+
+        self.assertEqual([item['status'] for item in items], [STATUS_SKIPPED, STATUS_FAILED])
+        self.assertIn('weird-package', items[1]['error'])
+        self.assertFalse(Package.objects.filter(project=self.project).exists())
+        self.assertEqual(self.store_files(), [])
+
+    def test_duplicated_files_in_batch(self):
+        items = PackageIngestionService(self.project, self.store).upload(
+            [self.upload('pkg_1.0_amd64.deb'), self.upload('pkg_1.0_amd64.deb')]
+        )
+
+        self.assertEqual({item['status'] for item in items}, {STATUS_FAILED})
+        self.assertFalse(Package.objects.filter(project=self.project).exists())
+
+    def test_existing_packages_are_only_overwritten_on_request(self):
+        other_store = Store.objects.create(name=f'other-{uuid.uuid4().hex[:8]}', project=self.project)
+        PackageIngestionService(self.project, other_store).upload([self.upload('pkg_1.0_amd64.deb')])
+        previous = Package.path(self.project.slug, other_store.slug, 'pkg_1.0_amd64.deb')
+
+        items = PackageIngestionService(self.project, self.store).upload(
+            [self.upload('new_1.0_amd64.deb'), self.upload('pkg_1.0_amd64.deb')]
+        )
+
+        self.assertEqual([item['status'] for item in items], [STATUS_SKIPPED, STATUS_FAILED])
+        self.assertIn('pkg_1.0_amd64.deb', items[1]['error'])
+        self.assertEqual(Package.objects.get(fullname='pkg_1.0_amd64.deb').store, other_store)
+        self.assertTrue(os.path.exists(previous))
+        self.assertEqual(self.store_files(), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            items = PackageIngestionService(self.project, self.store).upload(
+                [self.upload('pkg_1.0_amd64.deb')], overwrite=True
+            )
+
+        self.assertEqual(items[0]['status'], 'updated')
+        self.assertEqual(Package.objects.get(fullname='pkg_1.0_amd64.deb').store, self.store)
+        self.assertFalse(os.path.exists(previous))
+
+    def test_placed_files_are_rolled_back_on_failure(self):
+        PackageIngestionService(self.project, self.store).upload([self.upload('pkg_1.0_amd64.deb')])
+        target = Package.path(self.project.slug, self.store.slug, 'pkg_1.0_amd64.deb')
+        with open(target, 'rb') as stored:
+            content = stored.read()
+
+        with (
+            patch(
+                'migasfree.core.services.package_ingestion.RepositoryRebuildService.schedule',
+                side_effect=ConnectionError,
+            ),
+            self.assertRaises(ConnectionError),
+        ):
+            PackageIngestionService(self.project, self.store).upload(
+                [self.upload('pkg_1.0_amd64.deb'), self.upload('new_1.0_amd64.deb')], overwrite=True
+            )
+
+        self.assertEqual(self.store_files(), ['pkg_1.0_amd64.deb'])
+        with open(target, 'rb') as stored:
+            self.assertEqual(stored.read(), content)
+        self.assertFalse(Package.objects.filter(fullname='new_1.0_amd64.deb').exists())
+
+
+@override_settings(MIGASFREE_PUBLIC_DIR=PUBLIC_DIR)
+class TestPackageIngestionViews(APITestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create(
+            username='test', email='test@test.com', password='test', is_superuser=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.store = Store.objects.create(name='org', project=self.project)
+
+    def test_ingest_returns_id_at_once(self):
+        with patch('migasfree.core.tasks.finish_package_ingestion.apply_async') as mock_finish:
+            response = self.client.post(
+                reverse('package-ingest'),
+                {'store': self.store.id, 'files': [SimpleUploadedFile('pkg_1.0_amd64.deb', b'content')]},
+                format='multipart',
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        mock_finish.assert_called_once()
+
+        response = self.client.get(reverse('package-ingestion', kwargs={'ingestion_id': response.json()['id']}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['files'][0]['fullname'], 'pkg_1.0_amd64.deb')
+
+    def test_ingest_overwrite(self):
+        Package.objects.create(
+            fullname='pkg_1.0_amd64.deb',
+            name='pkg',
+            version='1.0',
+            architecture='amd64',
+            project=self.project,
+            store=self.store,
+        )
+
+        def ingest(**data):
+            with patch('migasfree.core.tasks.finish_package_ingestion.apply_async'):
+                response = self.client.post(
+                    reverse('package-ingest'),
+                    {'store': self.store.id, 'files': [SimpleUploadedFile('pkg_1.0_amd64.deb', b'content')], **data},
+                    format='multipart',
+                )
+
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            return PackageIngestionService.state(response.json()['id'])
+
+        self.assertEqual(ingest()['files'][0]['status'], STATUS_FAILED)
+
+        state = ingest(overwrite='true')
+
+        self.assertTrue(state['overwrite'])
+        self.assertNotEqual(state['files'][0]['status'], STATUS_FAILED)
+
+    def test_ingest_without_files(self):
+        response = self.client.post(reverse('package-ingest'), {'store': self.store.id}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_returns_per_file_results(self):
+        response = self.client.post(
+            reverse('package-upload'),
+            {
+                'store': self.store.id,
+                'files': [
+                    SimpleUploadedFile('pkg1_1.0_amd64.deb', b'content1'),
+                    SimpleUploadedFile('pkg2_1.0_amd64.deb', b'content2'),
+                ],
+            },
+            format='multipart',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        files = response.json()['files']
+        self.assertEqual([item['status'] for item in files], ['created', 'created'])
+        self.assertEqual(
+            {item['id'] for item in files}, set(Package.objects.filter(store=self.store).values_list('id', flat=True))
+        )
+
+    def test_upload_with_invalid_file(self):
+        response = self.client.post(
+            reverse('package-upload'),
+            {'store': self.store.id, 'files': [SimpleUploadedFile('pkg1_1.0_amd64.deb', b'content1')] * 2},
+            format='multipart',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Package.objects.filter(store=self.store).exists())
+
+    def test_upload_overwrite(self):
+        def post(**data):
+            return self.client.post(
+                reverse('package-upload'),
+                {
+                    'store': self.store.id,
+                    'files': [SimpleUploadedFile('pkg1_1.0_amd64.deb', uuid.uuid4().bytes)],
+                    **data,
+                },
+                format='multipart',
+            )
+
+        self.assertEqual(post().status_code, status.HTTP_201_CREATED)
+        self.assertEqual(post().status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = post(overwrite='true')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['files'][0]['status'], 'updated')
+
+    def test_unknown_ingestion(self):
+        response = self.client.get(reverse('package-ingestion', kwargs={'ingestion_id': uuid.uuid4().hex}))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(MIGASFREE_PUBLIC_DIR=PUBLIC_DIR)
+class TestPackageIngestionConsumer(TransactionTestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.store = Store.objects.create(name='org', project=self.project)
+
+        with patch('migasfree.core.tasks.finish_package_ingestion.apply_async'):
+            self.ingestion_id = PackageIngestionService(self.project, self.store).start(
+                [SimpleUploadedFile('pkg_1.0_amd64.deb', b'content')]
+            )
+
+    async def connect(self, user=None):
+        communicator = WebsocketCommunicator(
+            URLRouter(ws_urlpatterns), f'/ws/ingestions/{uuid.UUID(self.ingestion_id)}/'
+        )
+        if user is not None:
+            communicator.scope['user'] = user
+
+        connected, _ = await communicator.connect()
+        await communicator.disconnect()
+
+        return connected
+
+    async def test_anonymous_connections_are_rejected(self):
+        self.assertFalse(await self.connect())
+        self.assertFalse(await self.connect(AnonymousUser()))
+
+    async def test_only_users_with_the_project_in_scope(self):
+        admin = await database_sync_to_async(UserProfile.objects.create)(username='admin')
+        self.assertTrue(await self.connect(admin))
+
+        def create_scoped_user():
+            # a domain without computers of the project
+            domain = Domain.objects.create(name='Domain')
+            property_ = Property.objects.create(prefix='ORG', name='ORG', enabled=True, kind='N', sort='client')
+            domain.included_attributes.add(Attribute.objects.create(property_att=property_, value='A'))
+            return UserProfile.objects.create(username='user', domain_preference=domain)
+
+        user = await database_sync_to_async(create_scoped_user)()
+        self.assertFalse(await self.connect(user))
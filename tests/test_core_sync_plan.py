@@ -0,0 +1,130 @@
+import uuid
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from migasfree.client.models import Computer, FaultDefinition
+from migasfree.core.models import Attribute, Deployment, Platform, Project, Property, UserProfile
+from migasfree.core.services.sync_plan import SyncPlan, SyncPlanService, plan_key
+
+
+class SyncPlanMixin:
+    def setUp(self):
+        self.con = get_redis_connection()
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.property = Property.objects.create(
+            prefix='ORG', name='ORGANIZATION', enabled=True, kind='N', sort='client'
+        )
+        self.att_a = Attribute.objects.create(property_att=self.property, value='A')
+        self.att_b = Attribute.objects.create(property_att=self.property, value='B')
+
+        self.computer = Computer.objects.create(name='PC1', project=self.project, uuid=str(uuid.uuid4()))
+        self.computer.sync_attributes.add(self.att_a)
+
+        with patch('migasfree.stats.tasks.update_deployment_computers.apply_async'):
+            self.deploy_a = Deployment.objects.create(
+                name='Deploy A',
+                project=self.project,
+                packages_to_install='vim\ngit\nvim',
+                packages_to_remove='nano',
+            )
+            self.deploy_a.included_attributes.add(self.att_a)
+            self.deploy_b = Deployment.objects.create(
+                name='Deploy B', project=self.project, packages_to_install='git\ncurl'
+            )
+            self.deploy_b.included_attributes.add(self.att_b)
+
+        self.definition = FaultDefinition.objects.create(name='Low disk', enabled=True, language=0, code='df')
+        self.definition.included_attributes.add(self.att_a)
+
+        self.con.delete(plan_key(self.computer.id))
+
+    def tearDown(self):
+        self.con.delete(plan_key(self.computer.id))
+        super().tearDown()
+
+
+class TestSyncPlan(SyncPlanMixin, TestCase):
+    def test_build(self):
+        plan = SyncPlanService.build(self.computer)
+
+        self.assertEqual([item['name'] for item in plan.deployments], ['Deploy A'])
+        self.assertEqual([item['slug'] for item in plan.deployments], ['deploy-a'])
+        self.assertEqual(
+            list(plan.packages_to_install),
+            [
+                {'package': 'vim', 'name': 'Deploy A', 'id': self.deploy_a.id},
+                {'package': 'git', 'name': 'Deploy A', 'id': self.deploy_a.id},
+            ],
+        )
+        self.assertEqual([item['name'] for item in plan.fault_definitions], ['Low disk'])
+        self.assertEqual(plan.mandatory_packages(), {'install': ['vim', 'git'], 'remove': ['nano']})
+        self.assertTrue(plan.capture_hardware)
+
+        with self.assertRaises(AttributeError):
+            plan.deployments = ()
+
+    def test_inputs_are_evaluated_once(self):
+        with (
+            patch.object(
+                Computer, 'get_all_attributes', autospec=True, side_effect=Computer.get_all_attributes
+            ) as attrs,
+            patch.object(
+                Deployment.objects, 'available_deployments', wraps=Deployment.objects.available_deployments
+            ) as deploys,
+        ):
+            SyncPlanService.build(self.computer)
+
+        attrs.assert_called_once()
+        deploys.assert_called_once()
+
+    def test_json_round_trip(self):
+        plan = SyncPlanService.build(self.computer)
+
+        self.assertEqual(SyncPlan.from_json(plan.to_json()), plan)
+
+    def test_cached_by_attributes(self):
+        with patch.object(SyncPlanService, 'build', wraps=SyncPlanService.build) as build:
+            first = SyncPlanService.get(self.computer, self.con)
+            second = SyncPlanService.get(self.computer, self.con)
+            self.assertEqual(build.call_count, 1)
+            self.assertEqual(first, second)
+
+            self.computer.sync_attributes.add(self.att_b)
+            plan = SyncPlanService.get(self.computer, self.con)
+            self.assertEqual(build.call_count, 2)
+            self.assertEqual([item['name'] for item in plan.deployments], ['Deploy A', 'Deploy B'])
+
+            SyncPlanService.invalidate(self.computer.id, self.con)
+            SyncPlanService.get(self.computer, self.con)
+            self.assertEqual(build.call_count, 3)
+
+        # only the plan of the current attributes is kept
+        self.assertEqual(self.con.hlen(plan_key(self.computer.id)), 1)
+
+
+class TestSyncSimulationView(SyncPlanMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = UserProfile.objects.create(
+            username='test', email='test@test.com', password='test', is_superuser=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_simulate_sync(self):
+        response = self.client.get(reverse('computer-simulate-sync', kwargs={'pk': self.computer.pk}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['deployments'], [{'id': self.deploy_a.id, 'name': 'Deploy A', 'source': 'I'}])
+        self.assertEqual(data['fault_definitions'], [{'id': self.definition.id, 'name': 'Low disk'}])
+        self.assertEqual([item['package'] for item in data['packages']['install']], ['vim', 'git'])
+        self.assertEqual(data['packages']['remove'], [{'package': 'nano', 'name': 'Deploy A', 'id': self.deploy_a.id}])
+        self.assertEqual(data['policies'], {'install': [], 'remove': []})
+        self.assertEqual(data['logical_devices'], [])
+        self.assertEqual(data['default_logical_device'], 0)
@@ -0,0 +1,36 @@
+import io
+import json
+
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from migasfree.middleware import CompressionMiddleware
+
+
+class TestCompressionMiddleware(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+    def process(self, response):
+        return CompressionMiddleware(lambda request: response)(self.request)
+
+    def test_json_is_compressed(self):
+        response = self.process(JsonResponse({'items': ['item'] * 500}))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_encrypted_payloads_are_not_compressed(self):
+        response = JsonResponse({'msg': 'eyJ' + 'a' * 2000})
+        response.skip_compression = True
+
+        self.assertFalse(self.process(response).has_header('Content-Encoding'))
+
+    def test_compressed_contents_are_not_compressed(self):
+        response = self.process(HttpResponse(b'\0' * 2000, content_type='application/x-rpm'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_files_are_not_compressed(self):
+        response = self.process(FileResponse(io.BytesIO(json.dumps(['item'] * 500).encode()), filename='a.json'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
@@ -0,0 +1,193 @@
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from migasfree.core.models import Domain, InternalSource, Platform, Project, UserProfile
+from migasfree.core.pms.apt import Apt
+from migasfree.core.pms.builds import (
+    OUTCOME_ERROR,
+    OUTCOME_FAILED,
+    OUTCOME_SUCCESS,
+    RECENT_KEY,
+    BuildJob,
+    build_stats,
+    metadata_size,
+    percentile,
+    recent_builds,
+)
+from migasfree.core.pms.tasks import create_repository_metadata, repository_lock_key, stamp_queued_at
+
+
+def payload(deployment_id=1, name='deploy', pms='apt'):
+    return {
+        'id': deployment_id,
+        'name': name,
+        'slug': name,
+        'project': {'name': 'Vitalinux', 'slug': 'vitalinux', 'pms': pms, 'architecture': 'amd64'},
+        'available_packages': [{'id': 1, 'fullname': 'pkg_1.0_all.deb', 'store': {'name': 'org'}}],
+    }
+
+
+@pytest.fixture
+def con():
+    con = get_redis_connection()
+    con.delete(RECENT_KEY)
+    yield con
+    con.delete(RECENT_KEY)
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile([1, 2, 3, 4], 90) == pytest.approx(3.7)
+    assert percentile([5], 99) == 5
+
+
+def test_metadata_size_does_not_count_packages(tmp_path):
+    (tmp_path / 'Release').write_bytes(b'x' * 10)
+    os.symlink('/dev/null', tmp_path / 'pkg_1.0_all.deb')
+
+    assert metadata_size(str(tmp_path)) == 10
+
+
+class TestBuildJob:
+    def test_phases_and_queue_latency(self, con):
+        build = BuildJob(payload(), queued_at=time.time() - 5, con=con)
+        with build.phase('index'):
+            time.sleep(0.02)
+        build.split('index', 'sign', 0.01)
+
+        record = build.finish(OUTCOME_SUCCESS, size=100)
+
+        assert record['queue_latency'] >= 5
+        assert record['phases']['sign'] == pytest.approx(0.01)
+        assert record['phases']['index'] >= 0.01
+        assert record['duration'] >= 0.02
+        assert recent_builds(con) == [record]
+
+    def test_stats_per_pms(self, con):
+        for duration, outcome, pms in (
+            (1, OUTCOME_SUCCESS, 'apt'),
+            (3, OUTCOME_SUCCESS, 'apt'),
+            (9, OUTCOME_ERROR, 'apt'),
+            (2, OUTCOME_FAILED, 'yum'),
+        ):
+            build = BuildJob(payload(pms=pms), con=con)
+            build.start -= duration
+            build.finish(outcome)
+
+        stats = build_stats(con)
+
+        assert sorted(stats) == ['apt', 'yum']
+        assert stats['apt']['count'] == 3
+        assert stats['apt']['errors'] == 1
+        # only successful builds are measured
+        assert stats['apt']['duration']['p50'] == pytest.approx(2, abs=0.1)
+        assert stats['apt']['duration']['max'] == pytest.approx(3, abs=0.1)
+        assert stats['yum']['failures'] == 1
+        assert stats['yum']['duration']['p50'] is None
+        assert [build['pms'] for build in recent_builds(con, pms='apt', limit=2)] == ['apt', 'apt']
+
+
+class TestCreateRepositoryMetadata:
+    @pytest.fixture(autouse=True)
+    def public_dir(self, tmp_path):
+        with (
+            patch('migasfree.core.pms.tasks.MIGASFREE_PUBLIC_DIR', str(tmp_path)),
+            patch('migasfree.core.pms.tasks.app.control.inspect') as mock_inspect,
+        ):
+            mock_inspect.return_value.active.return_value = None
+            yield tmp_path
+
+    def test_build_is_registered(self, con):
+        def create_repository(pms, path, arch):
+            with open(os.path.join(path, 'Release'), 'w') as f:
+                f.write('x' * 10)
+            with pms.timing('sign'):
+                pass
+
+            return 0, '', ''
+
+        with patch.object(Apt, 'create_repository', autospec=True, side_effect=create_repository):
+            create_repository_metadata.apply(kwargs={'payload': payload()})
+
+        [build] = recent_builds(con)
+        assert build['deployment'] == 1
+        assert build['outcome'] == OUTCOME_SUCCESS
+        # Release and its gzipped variant
+        assert build['size'] > 10
+        assert build['queue_latency'] is None
+        assert set(build['phases']) == {'symlink', 'index', 'sign', 'publish'}
+        assert not con.sismember('migasfree:watch:repos', 1)
+
+    def test_failed_build_is_registered(self, con):
+        with patch.object(Apt, 'create_repository', side_effect=OSError('disk full')):
+            create_repository_metadata.apply(kwargs={'payload': payload()})
+
+        [build] = recent_builds(con)
+        assert build['outcome'] == OUTCOME_FAILED
+        assert build['error'] == 'disk full'
+        assert not con.sismember('migasfree:watch:repos', 1)
+
+    def test_builds_of_a_deployment_are_serialized(self, con):
+        con.lock(repository_lock_key(1), timeout=1).acquire()  # a build in progress
+        start = time.time()
+
+        with patch.object(Apt, 'create_repository', return_value=(0, '', '')) as mock_create:
+            create_repository_metadata.apply(kwargs={'payload': payload()})
+
+        mock_create.assert_called_once()
+        assert time.time() - start >= 0.9
+        assert not con.exists(repository_lock_key(1))
+
+    def test_publication_is_stamped(self):
+        headers = {}
+        stamp_queued_at(headers=headers)
+
+        assert time.time() - headers['queued_at'] < 1
+
+
+class TestBuildsView(APITestCase):
+    def setUp(self):
+        self.con = get_redis_connection()
+        self.con.delete(RECENT_KEY)
+
+        platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=platform)
+        with patch('migasfree.stats.tasks.update_deployment_computers.apply_async'):
+            self.deploy = InternalSource.objects.create(name='deploy', project=self.project)
+            self.other = InternalSource.objects.create(
+                name='other', project=self.project, domain=Domain.objects.create(name='OTHER')
+            )
+
+        for deploy in (self.deploy, self.other, self.deploy):
+            BuildJob(payload(deploy.id, deploy.name), con=self.con).finish(OUTCOME_SUCCESS)
+
+        self.user = UserProfile.objects.create(username='admin', is_superuser=True)
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        self.con.delete(RECENT_KEY)
+        super().tearDown()
+
+    def test_recent_builds(self):
+        response = self.client.get(reverse('internalsource-builds'), {'deployment': self.deploy.id, 'limit': 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([build['deployment'] for build in response.json()], [self.deploy.id])
+
+        for limit in ('all', 0, -1):
+            response = self.client.get(reverse('internalsource-builds'), {'limit': limit})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_builds_stats(self):
+        response = self.client.get(reverse('internalsource-builds-stats'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['apt']['count'], 3)
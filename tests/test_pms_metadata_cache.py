@@ -0,0 +1,90 @@
+import os
+import tempfile
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from migasfree.core.pms.apk import Apk
+from migasfree.core.pms.metadata_cache import PackageMetadataCache, file_digest
+
+
+@pytest.fixture
+def package():
+    with tempfile.TemporaryDirectory() as path:
+        package_path = os.path.join(path, f'{uuid.uuid4().hex}.apk')
+        with open(package_path, 'wb') as f:
+            f.write(uuid.uuid4().bytes * 1024)
+
+        yield package_path
+
+        cache = PackageMetadataCache()
+        cache.con.delete(cache.file_key(os.path.realpath(package_path)))
+
+
+class TestPackageMetadataCache:
+    def test_file_digest_in_chunks(self, package):
+        assert file_digest(package, chunk_size=7) == file_digest(package)
+
+    def test_digest_is_not_recomputed_for_unchanged_file(self, package):
+        cache = PackageMetadataCache()
+        digest = cache.digest(package)
+
+        with patch('migasfree.core.pms.metadata_cache.file_digest') as mock_digest:
+            assert cache.digest(package) == digest
+
+        mock_digest.assert_not_called()
+
+    def test_digest_changes_with_content(self, package):
+        cache = PackageMetadataCache()
+        digest = cache.digest(package)
+
+        with open(package, 'ab') as f:
+            f.write(b'changed')
+
+        assert cache.digest(package) != digest
+
+    def test_metadata_is_extracted_once_per_content(self, package):
+        cache = PackageMetadataCache()
+        pms = Apk()
+        metadata = {'name': 'pkg', 'version': '1.0', 'architecture': 'x86_64'}
+
+        link = f'{package}.link'
+        os.symlink(package, link)
+
+        with patch.object(Apk, 'package_metadata', return_value=metadata) as mock_metadata:
+            assert pms.cached_package_metadata(package, cache) == metadata
+            assert pms.cached_package_metadata(link, cache) == metadata
+
+        mock_metadata.assert_called_once_with(package)
+        cache.con.delete(cache.metadata_key(pms.name, cache.digest(package)))
+
+    def test_failed_metadata_is_not_cached(self, package):
+        cache = PackageMetadataCache()
+        pms = Apk()
+        empty = {'name': None, 'version': None, 'architecture': None}
+
+        with patch.object(Apk, 'package_metadata', return_value=empty) as mock_metadata:
+            pms.cached_package_metadata(package, cache)
+            pms.cached_package_metadata(package, cache)
+
+        assert mock_metadata.call_count == 2
+
+    def test_only_unknown_contents_are_extracted_together(self, package):
+        cache = PackageMetadataCache()
+        pms = Apk()
+        known = {'name': 'pkg', 'version': '1.0', 'architecture': 'x86_64'}
+        unknown = {'name': 'other', 'version': '2.0', 'architecture': 'x86_64'}
+        other = f'{package}.other'
+        with open(other, 'wb') as f:
+            f.write(uuid.uuid4().bytes)
+
+        with patch.object(Apk, 'package_metadata', return_value=known):
+            pms.cached_package_metadata(package, cache)
+
+        with patch.object(Apk, 'packages_metadata', return_value=[unknown]) as mock_metadata:
+            assert pms.cached_packages_metadata([package, other], cache) == [known, unknown]
+
+        mock_metadata.assert_called_once_with([other])
+        for path in (package, other):
+            cache.con.delete(cache.metadata_key(pms.name, cache.digest(path)), cache.file_key(os.path.realpath(path)))
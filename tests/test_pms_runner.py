@@ -0,0 +1,99 @@
+import os
+import signal
+from unittest.mock import MagicMock, patch
+
+import pytest
+import redis
+
+from migasfree.core.pms.pacman import Pacman
+from migasfree.core.pms.runner import CommandRunner, batched, command_metrics, execute
+from migasfree.core.pms.yum import Yum
+
+
+class TestCommandRunner:
+    def test_output_and_return_code(self):
+        ret, out, err = execute(['sh', '-c', 'echo out; echo err >&2; exit 3'])
+
+        assert (ret, out, err) == (3, 'out\n', 'err\n')
+
+    def test_environment_and_working_directory(self, tmp_path):
+        ret, out, _err = execute(['sh', '-c', 'echo $VALUE; pwd'], cwd=str(tmp_path), env={'VALUE': 'value'})
+
+        assert ret == 0
+        assert out.splitlines() == ['value', os.path.realpath(tmp_path)]
+
+    def test_large_output_is_not_blocked(self):
+        ret, out, _err = execute(['sh', '-c', 'head -c 1000000 /dev/zero | tr "\\0" x'])
+
+        assert ret == 0
+        assert len(out) == 1000000
+
+    @pytest.mark.parametrize('cwd', [None, '/'])
+    def test_timeout_kills_command(self, cwd):
+        ret, _out, err = execute(['sleep', '10'], cwd=cwd, timeout=0.2)
+
+        assert ret == -signal.SIGKILL
+        assert 'killed' in err
+
+    def test_unknown_command(self):
+        with pytest.raises(FileNotFoundError):
+            execute(['migasfree-unknown-command'])
+
+    def test_latency_is_recorded_per_tool(self):
+        before = command_metrics().get('true', {'count': 0, 'errors': 0})
+
+        execute(['true'])
+        execute(['/bin/true'])
+
+        metrics = command_metrics()['true']
+        assert metrics['count'] == before['count'] + 2
+        assert metrics['errors'] == before['errors']
+        assert metrics['seconds'] > 0
+
+    def test_metrics_are_optional(self):
+        con = MagicMock()
+        con.pipeline.side_effect = redis.ConnectionError
+
+        assert CommandRunner(con).run(['true']) == (0, '', '')
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 2)) == []
+
+
+class TestBatchedMetadata:
+    def test_rpm_is_invoked_once_per_batch(self):
+        output = 'a___1.0-1___noarch\nb___2.0-1___x86_64\n'
+        with patch('migasfree.core.pms.yum.execute', return_value=(0, output, '')) as mock_execute:
+            metadata = Yum().packages_metadata(['/a.rpm', '/b.rpm'])
+
+        mock_execute.assert_called_once()
+        assert mock_execute.call_args[0][0][-2:] == ['/a.rpm', '/b.rpm']
+        assert metadata == [
+            {'name': 'a', 'version': '1.0-1', 'architecture': 'noarch'},
+            {'name': 'b', 'version': '2.0-1', 'architecture': 'x86_64'},
+        ]
+
+    def test_failed_batch_is_queried_package_by_package(self):
+        responses = [(1, 'a___1.0-1___noarch\n', 'error'), (0, 'a___1.0-1___noarch', ''), (1, '', 'error')]
+        with patch('migasfree.core.pms.yum.execute', side_effect=responses) as mock_execute:
+            metadata = Yum().packages_metadata(['/a.rpm', '/broken.rpm'])
+
+        assert mock_execute.call_count == 3
+        assert metadata == [
+            {'name': 'a', 'version': '1.0-1', 'architecture': 'noarch'},
+            {'name': None, 'version': None, 'architecture': None},
+        ]
+
+    def test_pacman_info_of_several_packages(self):
+        output = (
+            'Name            : a\nVersion         : 1.0-1\nArchitecture    : any\n\n'
+            'Name            : b\nVersion         : 2.0-1\nArchitecture    : x86_64\n\n'
+        )
+        with patch('migasfree.core.pms.pacman.execute', return_value=(0, output, '')) as mock_execute:
+            metadata = Pacman().packages_metadata(['/a.pkg.tar.zst', '/b.pkg.tar.zst'])
+
+        mock_execute.assert_called_once()
+        assert [item['name'] for item in metadata] == ['a', 'b']
+        assert metadata[1]['architecture'] == 'x86_64'
@@ -0,0 +1,16 @@
+import gzip
+import os
+
+from migasfree.core.pms.tasks import precompress_indexes
+
+
+def test_precompress_indexes(tmp_path):
+    os.makedirs(tmp_path / 'repodata')
+    (tmp_path / 'repodata' / 'repomd.xml').write_text('<repomd/>')
+    (tmp_path / 'repodata' / 'primary.xml.gz').write_bytes(b'compressed')
+
+    precompress_indexes(str(tmp_path), ['repomd.xml'])
+
+    with gzip.open(tmp_path / 'repodata' / 'repomd.xml.gz', 'rt') as f:
+        assert f.read() == '<repomd/>'
+    assert sorted(os.listdir(tmp_path / 'repodata')) == ['primary.xml.gz', 'repomd.xml', 'repomd.xml.gz']
@@ -0,0 +1,82 @@
+import os
+from unittest.mock import patch
+
+from migasfree.core.pms.yum import Yum
+
+
+def create_previous_repository(path, packages):
+    os.makedirs(os.path.join(path, 'repodata'))
+    with open(os.path.join(path, 'repodata', 'repomd.xml'), 'w') as f:
+        f.write('<repomd/>')
+
+    os.makedirs(os.path.join(path, 'PKGS'))
+    for package in packages:
+        open(os.path.join(path, 'PKGS', package), 'w').close()
+
+
+def createrepo_command(mock_execute):
+    return mock_execute.call_args_list[0][0][0]
+
+
+class TestYumCreateRepository:
+    def test_full_build_without_previous_repository(self, tmp_path):
+        path = str(tmp_path / 'tmp' / 'deploy')
+        with patch('migasfree.core.pms.yum.execute', return_value=(0, '', '')) as mock_execute:
+            Yum().create_repository(path, 'x86_64', previous_path=str(tmp_path / 'repos' / 'deploy'))
+
+        assert createrepo_command(mock_execute) == ['createrepo', '--cachedir', 'checksum', path]
+        assert mock_execute.call_args_list[1][0][0][0] == 'gpg'
+
+    def test_incremental_build_skips_stat_of_unchanged_packages(self, tmp_path):
+        previous = str(tmp_path / 'repos' / 'deploy')
+        create_previous_repository(previous, ['a-1.0-1.noarch.rpm', 'b-1.0-1.noarch.rpm'])
+        cache = str(tmp_path / 'cache')
+
+        with patch('migasfree.core.pms.yum.execute', return_value=(0, '', '')) as mock_execute:
+            Yum().create_repository(
+                str(tmp_path / 'tmp' / 'deploy'),
+                'x86_64',
+                previous_path=previous,
+                cache_path=cache,
+                changes={'added': ['c-1.0-1.noarch.rpm'], 'removed': ['b-1.0-1.noarch.rpm']},
+            )
+
+        cmd = createrepo_command(mock_execute)
+        assert cmd[:3] == ['createrepo', '--cachedir', os.path.join(cache, 'checksum')]
+        assert '--update' in cmd
+        assert cmd[cmd.index('--update-md-path') + 1] == previous
+        assert '--skip-stat' in cmd
+
+    def test_replaced_package_is_stat_checked(self, tmp_path):
+        previous = str(tmp_path / 'repos' / 'deploy')
+        create_previous_repository(previous, ['a-1.0-1.noarch.rpm'])
+
+        with patch('migasfree.core.pms.yum.execute', return_value=(0, '', '')) as mock_execute:
+            Yum().create_repository(
+                str(tmp_path / 'tmp' / 'deploy'),
+                'x86_64',
+                previous_path=previous,
+                changes={'added': ['a-1.0-1.noarch.rpm'], 'removed': []},
+            )
+
+        cmd = createrepo_command(mock_execute)
+        assert '--update' in cmd
+        assert '--skip-stat' not in cmd
+
+    def test_unknown_changes_are_stat_checked(self, tmp_path):
+        previous = str(tmp_path / 'repos' / 'deploy')
+        create_previous_repository(previous, ['a-1.0-1.noarch.rpm'])
+
+        with patch('migasfree.core.pms.yum.execute', return_value=(0, '', '')) as mock_execute:
+            Yum().create_repository(str(tmp_path / 'tmp' / 'deploy'), 'x86_64', previous_path=previous)
+
+        cmd = createrepo_command(mock_execute)
+        assert '--update' in cmd
+        assert '--skip-stat' not in cmd
+
+    def test_createrepo_failure_is_not_signed(self, tmp_path):
+        with patch('migasfree.core.pms.yum.execute', return_value=(1, '', 'error')) as mock_execute:
+            ret = Yum().create_repository(str(tmp_path / 'deploy'), 'x86_64')
+
+        assert ret == (1, '', 'error')
+        mock_execute.assert_called_once()
@@ -1,3 +1,4 @@
+import base64
 import json
 import os
 import shutil
@@ -7,6 +8,7 @@ from django.test import TestCase, override_settings
 from django.utils.translation import gettext
 
 from migasfree import secure
+from migasfree.core.mixins import COMPRESSION_CLAIM, SafeConnectionMixin
 
 # Create a temporary directory for keys
 TEMP_KEYS_DIR = tempfile.mkdtemp()
@@ -93,3 +95,50 @@ class SecureTestCase(TestCase):
         result = secure.unwrap(token, f'{recipient}.pri', f'{sender}.pub')
 
         self.assertEqual(result, gettext('Invalid Signature'))
+
+    def protected_header(self, token):
+        header = json.loads(token)['protected']
+        return json.loads(base64.urlsafe_b64decode(header + '=' * (-len(header) % 4)))
+
+    def test_wrap_compressed(self):
+        secure.generate_rsa_keys('sender')
+        secure.generate_rsa_keys('recipient')
+        data = {'packages': [f'package-{i}_1.0_amd64.deb' for i in range(500)]}
+
+        plain = secure.wrap(data, 'sender.pri', 'recipient.pub')
+        compressed = secure.wrap(data, 'sender.pri', 'recipient.pub', compress=True)
+
+        self.assertNotIn('zip', self.protected_header(plain))
+        self.assertEqual(self.protected_header(compressed)['zip'], secure.ZIP_DEFLATE)
+        self.assertLess(len(compressed), len(plain) / 2)
+        self.assertEqual(secure.unwrap(compressed, 'recipient.pri', 'sender.pub'), data)
+
+    def test_small_payloads_are_not_compressed(self):
+        secure.generate_rsa_keys('recipient')
+
+        token = secure.encrypt({'small': 'data'}, 'recipient.pub', compress=True)
+
+        self.assertNotIn('zip', self.protected_header(token))
+
+    def test_compression_negotiated_by_claim(self):
+        secure.generate_rsa_keys('client')
+        secure.generate_rsa_keys('server')
+        data = {'id': 1, COMPRESSION_CLAIM: secure.ZIP_DEFLATE}
+
+        mixin = SafeConnectionMixin()
+        mixin.decrypt_key = mixin.sign_key = 'server.pri'
+        mixin.verify_key = mixin.encrypt_key = 'client.pub'
+
+        claims = mixin.get_claims({'msg': secure.wrap(data, 'client.pri', 'server.pub')})
+        response = mixin.create_response({'items': ['item'] * 1000})
+
+        self.assertEqual(claims, {'id': 1})
+        self.assertEqual(self.protected_header(response['msg'])['zip'], secure.ZIP_DEFLATE)
+        self.assertEqual(secure.unwrap(response['msg'], 'client.pri', 'server.pub'), {'items': ['item'] * 1000})
+
+        mixin = SafeConnectionMixin()
+        mixin.decrypt_key = mixin.sign_key = 'server.pri'
+        mixin.verify_key = mixin.encrypt_key = 'client.pub'
+        mixin.get_claims({'msg': secure.wrap({'id': 1}, 'client.pri', 'server.pub')})
+
+        self.assertNotIn('zip', self.protected_header(mixin.create_response({'items': ['item'] * 1000})['msg']))
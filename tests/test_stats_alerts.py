@@ -0,0 +1,166 @@
+import time
+import uuid
+from unittest.mock import AsyncMock, patch
+
+from django.test import TestCase
+from django_redis import get_redis_connection
+
+from migasfree.client.models import Computer, Error, Fault, FaultDefinition
+from migasfree.core.models import Domain, Platform, Project, UserProfile
+from migasfree.stats.tasks import (
+    ALL_SCOPES,
+    DASHBOARDS_KEY,
+    active_scopes,
+    add_scoped_alerts,
+    add_synchronizing_computers,
+    add_unchecked_errors,
+    add_unchecked_faults,
+    alerts,
+    alerts_scope,
+    alerts_snapshot,
+    alerts_snapshot_key,
+    get_alerts,
+    publish_alerts,
+    register_dashboard,
+    unregister_dashboard,
+)
+
+
+class TestScopedAlerts(TestCase):
+    def setUp(self):
+        self.con = get_redis_connection()
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.computer = Computer.objects.create(name='PC1', project=self.project, uuid=str(uuid.uuid4()))
+        self.domain = Domain.objects.create(name='Domain')
+        self.user = UserProfile.objects.create(username='user', domain_preference=self.domain)
+        self.scope = alerts_scope(self.user)
+
+        Error.objects.create(self.computer, self.project, 'Error')
+        self.clear()
+
+    def tearDown(self):
+        self.clear()
+        super().tearDown()
+
+    def clear(self):
+        keys = self.con.keys('migasfree:chk:*') + self.con.keys('migasfree:alerts:*')
+        if keys:
+            self.con.delete(*keys)
+
+    def alert(self, name, scope):
+        return {item['id']: item for item in get_alerts(scope)}.get(name)
+
+    def errors(self, scope):
+        return self.alert('errors', scope)
+
+    def test_scope_of_users(self):
+        self.assertEqual(self.scope, f'{self.domain.id}-0')
+        self.assertEqual(alerts_scope(UserProfile.objects.create(username='admin')), ALL_SCOPES)
+        self.assertEqual(alerts_scope(None), ALL_SCOPES)
+
+    def test_scoped_alerts_only_count_the_scope(self):
+        add_unchecked_errors()
+        add_scoped_alerts(self.scope)
+
+        self.assertEqual(self.errors(ALL_SCOPES)['result'], '1')
+        # the computer is out of the domain
+        self.assertIsNone(self.errors(self.scope))
+
+    def test_publish_only_changes(self):
+        add_unchecked_errors()
+
+        with patch('migasfree.stats.tasks.get_channel_layer') as mock_layer:
+            mock_layer.return_value.group_send = AsyncMock()
+            delta = publish_alerts(ALL_SCOPES)
+            self.assertEqual([item['id'] for item in delta['changed']], ['errors'])
+            self.assertEqual(delta['removed'], [])
+
+            self.assertIsNone(publish_alerts(ALL_SCOPES))
+
+            Error.objects.update(checked=True)
+            add_unchecked_errors()
+            delta = publish_alerts(ALL_SCOPES)
+
+        self.assertEqual(delta, {'changed': [], 'removed': ['errors']})
+        self.assertEqual(mock_layer.return_value.group_send.call_count, 2)
+        group, message = mock_layer.return_value.group_send.call_args[0]
+        self.assertEqual(group, 'stats.all')
+        self.assertEqual(message['text']['type'], 'delta')
+
+    def test_snapshot_is_the_baseline_of_deltas(self):
+        add_unchecked_errors()
+
+        self.assertIn('errors', [item['id'] for item in alerts_snapshot(ALL_SCOPES)])
+        self.assertTrue(self.con.exists(alerts_snapshot_key(ALL_SCOPES)))
+
+        with patch('migasfree.stats.tasks.get_channel_layer'):
+            self.assertIsNone(publish_alerts(ALL_SCOPES))
+
+    def test_user_fault_definitions(self):
+        definition = FaultDefinition.objects.create(name='Mine', code='echo mine')
+        definition.users.add(self.user)
+        Fault.objects.create(self.computer, definition, 'fault')
+
+        scope = alerts_scope(self.user)
+        self.assertEqual(scope, f'{self.domain.id}-0-u{self.user.id}')
+
+        add_unchecked_faults()
+        add_scoped_alerts(scope)
+
+        # a fault of other users is not seen by the global alerts
+        self.assertIsNone(self.alert('faults', ALL_SCOPES))
+        self.assertIsNone(self.alert('faults', scope))  # the computer is out of the domain
+
+        admin = UserProfile.objects.create(username='admin')
+        definition.users.add(admin)
+        admin_scope = alerts_scope(admin)
+        add_scoped_alerts(admin_scope)
+
+        self.assertEqual(admin_scope, f'{ALL_SCOPES}-u{admin.id}')
+        self.assertEqual(self.alert('faults', admin_scope)['result'], '1')
+        # other alerts are shared with the users of the same preferences
+        self.assertEqual(self.errors(admin_scope)['result'], '1')
+
+    def test_synchronizing_computers_of_the_scope(self):
+        self.con.zadd('migasfree:watch:msg:dates', {self.computer.id: time.time()})
+        self.con.sadd('migasfree:watch:msg', self.computer.id)
+        try:
+            add_synchronizing_computers()
+            add_synchronizing_computers(self.scope)
+
+            self.assertGreaterEqual(int(self.alert('syncs', ALL_SCOPES)['result']), 1)
+            self.assertIsNone(self.alert('syncs', self.scope))
+        finally:
+            self.con.zrem('migasfree:watch:msg:dates', self.computer.id)
+            self.con.srem('migasfree:watch:msg', self.computer.id)
+
+    def test_dashboards_registry(self):
+        self.assertEqual(register_dashboard(self.scope, 'channel1'), 1)
+        self.assertEqual(register_dashboard(self.scope, 'channel2'), 2)
+        unregister_dashboard(self.scope, 'channel1')
+
+        self.assertEqual(active_scopes(), [self.scope])
+
+        unregister_dashboard(self.scope, 'channel2')
+
+        self.assertEqual(active_scopes(), [])
+        self.assertFalse(self.con.exists(DASHBOARDS_KEY))
+
+    def test_dashboards_without_heartbeat_expire(self):
+        register_dashboard(self.scope, 'channel1')
+        self.con.zadd(DASHBOARDS_KEY, {f'{self.scope} channel1': time.time() - 1})
+
+        self.assertEqual(active_scopes(), [])
+
+    def test_idle_dashboards_are_not_calculated(self):
+        with (
+            patch('migasfree.stats.tasks.add_global_alerts') as mock_global,
+            patch('migasfree.stats.tasks.add_scoped_alerts') as mock_scoped,
+            patch('migasfree.stats.tasks.get_channel_layer') as mock_layer,
+        ):
+            alerts()
+
+        mock_global.assert_not_called()
+        mock_scoped.assert_not_called()
+        mock_layer.assert_not_called()
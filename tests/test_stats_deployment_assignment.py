@@ -0,0 +1,169 @@
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from migasfree.client.models import Computer
+from migasfree.core.models import Attribute, Deployment, Platform, Project, Property, UserProfile
+from migasfree.stats.tasks import (
+    ASSIGNMENT_DONE,
+    ASSIGNMENT_FAILED,
+    ASSIGNMENT_PENDING,
+    ASSIGNMENT_PENDING_TIMEOUT,
+    assigned_computers_to_deployment,
+    deployment_assignment_key,
+    deployment_computers_key,
+    get_assigned_computers,
+    get_assignment_progress,
+    update_deployment_computers,
+)
+
+
+class AssignmentMixin:
+    def setUp(self):
+        self.con = get_redis_connection()
+        self.platform = Platform.objects.create(name='Linux')
+        self.project = Project.objects.create(name='Vitalinux', pms='apt', architecture='amd64', platform=self.platform)
+        self.property = Property.objects.create(
+            prefix='ORG', name='ORGANIZATION', enabled=True, kind='N', sort='client'
+        )
+        self.att_a = Attribute.objects.create(property_att=self.property, value='A')
+        self.att_b = Attribute.objects.create(property_att=self.property, value='B')
+        self.att_c = Attribute.objects.create(property_att=self.property, value='C')
+
+        self.computers = []
+        for attributes in ([self.att_a], [self.att_a, self.att_c], [self.att_b]):
+            computer = Computer.objects.create(name=uuid.uuid4().hex[:8], project=self.project, uuid=str(uuid.uuid4()))
+            computer.sync_attributes.add(*attributes)
+            self.computers.append(computer)
+
+        with patch('migasfree.stats.tasks.update_deployment_computers.apply_async'):
+            self.deploy = Deployment.objects.create(name='Deploy', project=self.project)
+
+        self.con.delete(deployment_computers_key(self.deploy.id), f'migasfree:deployments:{self.deploy.id}:assignment')
+
+    def tearDown(self):
+        self.con.delete(deployment_computers_key(self.deploy.id), f'migasfree:deployments:{self.deploy.id}:assignment')
+        super().tearDown()
+
+    def assigned(self):
+        return set(map(int, self.con.smembers(deployment_computers_key(self.deploy.id))))
+
+
+class TestDeploymentAssignment(AssignmentMixin, TestCase):
+    def test_full_assignment(self):
+        self.deploy.included_attributes.add(self.att_a)
+        self.deploy.excluded_attributes.add(self.att_c)
+
+        result = assigned_computers_to_deployment(self.deploy.id)
+
+        self.assertEqual(result, {'added': 1, 'removed': 0})
+        self.assertEqual(self.assigned(), {self.computers[0].id})
+        self.assertEqual(get_assignment_progress(self.deploy.id)['status'], ASSIGNMENT_DONE)
+
+    def test_incremental_assignment_only_applies_delta(self):
+        self.deploy.included_attributes.add(self.att_a)
+        assigned_computers_to_deployment(self.deploy.id)
+        self.assertEqual(self.assigned(), {self.computers[0].id, self.computers[1].id})
+
+        self.deploy.included_attributes.add(self.att_b)
+        self.deploy.excluded_attributes.add(self.att_c)
+
+        with patch('migasfree.stats.tasks.get_assigned_computers', wraps=get_assigned_computers) as mock_assigned:
+            result = update_deployment_computers(self.deploy.id)
+
+        # only computers with B or C attributes are evaluated
+        self.assertEqual(set(mock_assigned.call_args[0][1]), {self.computers[1].id, self.computers[2].id})
+        self.assertEqual(result, {'added': 1, 'removed': 1})
+        self.assertEqual(self.assigned(), {self.computers[0].id, self.computers[2].id})
+
+    def test_incremental_without_changes(self):
+        self.deploy.included_attributes.add(self.att_a)
+        assigned_computers_to_deployment(self.deploy.id)
+
+        result = update_deployment_computers(self.deploy.id)
+
+        self.assertEqual(result, {'added': 0, 'removed': 0})
+        self.assertEqual(len(self.assigned()), 2)
+
+    def test_incremental_without_stored_set_recalculates(self):
+        self.deploy.included_attributes.add(self.att_b)
+
+        result = update_deployment_computers(self.deploy.id)
+
+        self.assertEqual(result, {'added': 1, 'removed': 0})
+        self.assertEqual(self.assigned(), {self.computers[2].id})
+
+    def test_save_enqueues_once_until_started(self):
+        with (
+            patch('migasfree.stats.tasks.update_deployment_computers.apply_async') as mock_task,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            self.deploy.save()
+            self.deploy.included_attributes.add(self.att_a)
+
+        mock_task.assert_called_once()
+        self.assertEqual(get_assignment_progress(self.deploy.id)['status'], ASSIGNMENT_PENDING)
+
+    def test_save_enqueues_again_if_publishing_failed(self):
+        with (
+            patch(
+                'migasfree.stats.tasks.update_deployment_computers.apply_async', side_effect=ConnectionError('broker')
+            ),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            self.deploy.save()
+
+        self.assertEqual(get_assignment_progress(self.deploy.id)['status'], ASSIGNMENT_FAILED)
+
+        with (
+            patch('migasfree.stats.tasks.update_deployment_computers.apply_async') as mock_task,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            self.deploy.save()
+
+        mock_task.assert_called_once()
+
+    def test_save_enqueues_again_if_pending_is_stale(self):
+        # a queued task that was lost (never started)
+        stale = datetime.now() - timedelta(seconds=ASSIGNMENT_PENDING_TIMEOUT + 60)
+        self.con.hset(
+            deployment_assignment_key(self.deploy.id),
+            mapping={'status': ASSIGNMENT_PENDING, 'updated_at': stale.isoformat()},
+        )
+
+        with (
+            patch('migasfree.stats.tasks.update_deployment_computers.apply_async') as mock_task,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            self.deploy.save()
+
+        mock_task.assert_called_once()
+        self.assertGreater(datetime.fromisoformat(get_assignment_progress(self.deploy.id)['updated_at']), stale)
+
+
+class TestDeploymentAssignmentView(AssignmentMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = UserProfile.objects.create(
+            username='test', email='test@test.com', password='test', is_superuser=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_assignment_progress(self):
+        self.deploy.included_attributes.add(self.att_a)
+        assigned_computers_to_deployment(self.deploy.id)
+
+        response = self.client.get(reverse('stats-deployments-assignment', kwargs={'pk': self.deploy.id}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['status'], ASSIGNMENT_DONE)
+        self.assertEqual(data['added'], 2)
+        self.assertEqual(data['computers'], 2)
+        self.assertNotIn('signature', data)
@@ -183,10 +183,12 @@ class TestAlerts:
     @patch('migasfree.stats.tasks.add_delayed_computers')
     @patch('migasfree.stats.tasks.add_active_schedule_deployments')
     @patch('migasfree.stats.tasks.add_finished_schedule_deployments')
-    @patch('migasfree.stats.tasks.get_alerts')
+    @patch('migasfree.stats.tasks.publish_alerts')
+    @patch('migasfree.stats.tasks.active_scopes', return_value=['all'])
     def test_calls_all_add_functions(
         self,
-        mock_get_alerts,
+        mock_scopes,
+        mock_publish,
         mock_finished,
         mock_active,
         mock_delayed,
@@ -199,8 +201,6 @@ class TestAlerts:
         mock_pkgs,
     ):
         """Test that alerts task calls all the add_* functions."""
-        mock_get_alerts.return_value = {}
-
         from migasfree.stats.tasks import alerts
 
         alerts()
@@ -215,4 +215,4 @@ class TestAlerts:
         mock_delayed.assert_called_once()
         mock_active.assert_called_once()
         mock_finished.assert_called_once()
-        mock_get_alerts.assert_called_once()
+        mock_publish.assert_called_once_with('all')